@@ -4,12 +4,55 @@
 
 import re
 import os
-import spacy
 import json
 import sys
-nlp = spacy.load("en_core_web_sm")
+import time
+from functools import partial
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+console = Console(stderr=True)
+
+from symbiote.sym_nlp import get_model
+from symbiote.sym_pii_stream import iter_chunks, decode_chunk
+from symbiote.sym_workers import map_ordered
+
+# Maximal runs of word characters, the only text a \b...\b pattern of word characters can match
+WORD = re.compile(r"\w+")
+
+def candidate_runs(alphabet, required):
+    """ Matches the maximal runs of alphabet characters that contain a required one """
+    return re.compile(f"(?<![{alphabet}])[{alphabet}]*[{required}][{alphabet}]*")
+
+# A pattern's matches are made of its alphabet's characters and contain a
+# required one, so each lies within one of these runs, see find_in_spans.
+# Numbers with separators: SSNs, card and phone numbers, IPv4 addresses
+DIGIT_RUNS = candidate_runs(r"\d\s.+()/-", r"\d")
+# Uppercase codes with digits: bank accounts, postal codes
+UPPER_DIGIT_RUNS = candidate_runs(r"A-Z\d\s-", r"\d")
+# Uppercase codes: passport numbers
+UPPER_RUNS = candidate_runs(r"A-Z\d\s", r"A-Z\d")
+# Hex groups with separators: IPv6 and MAC addresses
+HEX_RUNS = candidate_runs(r"A-Fa-f\d:./-", r":.-")
+
+def candidate_spans(runs, text):
+    """ (start, end) of each of the runs in text """
+    return [match.span() for match in runs.finditer(text)]
+
+def find_in_spans(pattern, text, spans=None):
+    """
+    re.findall of pattern over text, only within spans when they are given.
+    Each span is searched with the character after it in view, so \\b at
+    its end sees what it sees in the whole text; when every match lies
+    within a span the result is the same as over the whole text.
+    """
+    if spans is None:
+        return re.findall(pattern, text)
+    regex = re.compile(pattern)
+    return [found for start, end in spans for found in regex.findall(text, start, end + 1)]
 
-def extract_ipv4_and_cidr(text):
+def extract_ipv4_and_cidr(text, digit_spans=None):
     # Regular expression for matching IPv4 addresses (0-255 in each octet)
     ipv4_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
 
@@ -22,16 +65,16 @@ def extract_ipv4_and_cidr(text):
         return all(0 <= int(part) <= 255 for part in parts)
 
     # Extract all IPv4 addresses
-    ipv4_matches = re.findall(ipv4_pattern, text)
+    ipv4_matches = find_in_spans(ipv4_pattern, text, digit_spans)
     ipv4_addresses = [ip for ip in ipv4_matches if validate_ipv4(ip)]
 
     # Extract all CIDR blocks
-    cidr_matches = re.findall(cidr_pattern, text)
+    cidr_matches = find_in_spans(cidr_pattern, text, digit_spans)
     cidr_blocks = [cidr for cidr in cidr_matches if validate_ipv4(cidr.split('/')[0])]
 
     return {"ipv4_addresses": ipv4_addresses, "cidr_blocks": cidr_blocks}
 
-def extract_ipv6_and_cidr(text):
+def extract_ipv6_and_cidr(text, hex_spans=None):
     # Regular expression to match full or shortened IPv6 addresses
     ipv6_pattern = r'\b(?:[A-Fa-f0-9]{1,4}:){7}[A-Fa-f0-9]{1,4}\b|\b(?:[A-Fa-f0-9]{1,4}:){1,7}:|::(?:[A-Fa-f0-9]{1,4}:){0,6}[A-Fa-f0-9]{1,4}\b'
 
@@ -39,10 +82,10 @@ def extract_ipv6_and_cidr(text):
     cidr_pattern = r'\b(?:[A-Fa-f0-9]{1,4}:){1,7}[A-Fa-f0-9]{1,4}/(?:[0-9]|[1-9][0-9]|1[01][0-9]|12[0-8])\b|\b(?:[A-Fa-f0-9]{1,4}:){1,7}:/(?:[0-9]|[1-9][0-9]|1[01][0-9]|12[0-8])\b|::(?:[A-Fa-f0-9]{1,4}:){0,6}[A-Fa-f0-9]{1,4}/(?:[0-9]|[1-9][0-9]|1[01][0-9]|12[0-8])\b'
 
     # Extract IPv6 addresses
-    ipv6_matches = re.findall(ipv6_pattern, text)
+    ipv6_matches = find_in_spans(ipv6_pattern, text, hex_spans)
 
     # Extract IPv6 CIDR blocks
-    cidr_matches = re.findall(cidr_pattern, text)
+    cidr_matches = find_in_spans(cidr_pattern, text, hex_spans)
 
     return {"ipv6_addresses": ipv6_matches, "cidr_blocks": cidr_matches}
 
@@ -59,12 +102,13 @@ def extract_urls(text):
     )
 
     # Find all URLs in the text
-    urls = re.findall(url_pattern, text)
+    urls = re.findall(url_pattern, text) if "://" in text else []
 
     return urls
 
-def extract_geo_coordinates(text):
-    doc = nlp(text)
+def extract_geo_coordinates(text, doc=None):
+    if doc is None:
+        doc = parse_doc(text)
 
     # Regular expression to match decimal degree coordinates (latitude, longitude)
     decimal_pattern = r'\b(-?[1-8]?\d(\.\d+)?|90(\.0+)?),\s*(-?(1[0-7]\d(\.\d+)?|180(\.0+)?|[1-9]?\d(\.\d+)?))\b'
@@ -110,7 +154,7 @@ def extract_geo_coordinates(text):
 
     return {"coordinates": all_coords, "places": places}
 
-def extract_postal_codes(text):
+def extract_postal_codes(text, upper_digit_spans=None):
     """
     Extract postal codes from text for various countries and validate their format
     based on country-specific rules.
@@ -160,7 +204,7 @@ def extract_postal_codes(text):
     postal_code_patterns = f'({usa_pattern})|({canada_pattern})|({uk_pattern})'
 
     # Find all matches in the text
-    postal_codes = re.findall(postal_code_patterns, text)
+    postal_codes = find_in_spans(postal_code_patterns, text, upper_digit_spans)
 
     # Flatten the list of tuples into a list of postal codes
     extracted_codes = [code for match in postal_codes for code in match if code]
@@ -170,7 +214,7 @@ def extract_postal_codes(text):
 
     return valid_codes
 
-def extract_vin_numbers(text):
+def extract_vin_numbers(text, words=None):
     """
     Extract and validate VIN numbers from the given text based on the standard 17-character VIN format.
     Includes check digit validation.
@@ -216,18 +260,20 @@ def extract_vin_numbers(text):
         actual_check_digit = vin[8]  # 9th position is at index 8
         return expected_check_digit == actual_check_digit
 
-    # Define regex pattern for VIN (17 characters, no I, O, or Q)
-    vin_pattern = r'\b[A-HJ-NPR-Z0-9]{17}\b'
+    # Define regex pattern for VIN (17 characters, no I, O, or Q), matched against whole words
+    vin_pattern = r'[A-HJ-NPR-Z0-9]{17}'
 
-    # Find all VIN matches in the text
-    vin_numbers = re.findall(vin_pattern, text)
+    # Find all VIN matches among the words of the text
+    if words is None:
+        words = tokenize_words(text)
+    vin_numbers = [word for word in words if len(word) == 17 and re.fullmatch(vin_pattern, word)]
 
     # Filter the results to only include valid VINs based on the check digit
     valid_vins = [vin for vin in vin_numbers if validate_vin(vin)]
 
     return valid_vins
 
-def extract_mac_addresses(text):
+def extract_mac_addresses(text, hex_spans=None):
     # Define regex patterns for MAC addresses
     # Colon or hyphen-separated MAC addresses (e.g., 00:1A:2B:3C:4D:5E or 00-1A-2B-3C-4D-5E)
     mac_pattern_colon_hyphen = r'\b([A-Fa-f0-9]{2}[:-]){5}[A-Fa-f0-9]{2}\b'
@@ -239,23 +285,25 @@ def extract_mac_addresses(text):
     mac_pattern = f'({mac_pattern_colon_hyphen})|({mac_pattern_dot})'
 
     # Find all matches in the text
-    mac_addresses = re.findall(mac_pattern, text)
+    mac_addresses = find_in_spans(mac_pattern, text, hex_spans)
 
     # Flatten the list of tuples into a list of valid MAC addresses
     extracted_macs = [mac[0] if mac[0] else mac[2] for mac in mac_addresses]
 
     return extracted_macs
 
-def extract_routing_numbers(text):
+def extract_routing_numbers(text, words=None):
     """
     Extract and validate routing numbers from the given text.
     A valid routing number is 9 digits long and passes the checksum validation.
     """
-    # Regular expression to find 9-digit sequences in the text
-    routing_pattern = r'\b\d{9}\b'
+    # Regular expression to find 9-digit words in the text
+    routing_pattern = r'\d{9}'
 
-    # Find all potential routing numbers
-    potential_routing_numbers = re.findall(routing_pattern, text)
+    # Find all potential routing numbers among the words of the text
+    if words is None:
+        words = tokenize_words(text)
+    potential_routing_numbers = [word for word in words if len(word) == 9 and re.fullmatch(routing_pattern, word)]
 
     # Checksum validation within the same function
     valid_routing_numbers = []
@@ -270,7 +318,7 @@ def extract_routing_numbers(text):
 
     return valid_routing_numbers
 
-def extract_bank_account_numbers(text):
+def extract_bank_account_numbers(text, upper_digit_spans=None):
     """
     Extract bank account numbers based on common country formats.
     Includes support for IBAN and generic digit-based account numbers (US, UK, etc.).
@@ -298,14 +346,14 @@ def extract_bank_account_numbers(text):
     account_patterns = f'({iban_pattern})|({usa_pattern})|({uk_pattern})|({canada_pattern})|({australia_pattern})|({india_pattern})'
 
     # Find all potential bank account numbers in the text
-    potential_account_numbers = re.findall(account_patterns, text)
+    potential_account_numbers = find_in_spans(account_patterns, text, upper_digit_spans)
 
     # Flatten the list of tuples into a list of account numbers, removing empty matches
     extracted_accounts = [account for match in potential_account_numbers for account in match if account]
 
     return extracted_accounts
 
-def extract_credit_card_numbers(text):
+def extract_credit_card_numbers(text, digit_spans=None):
     """
     Extract and validate credit card numbers from text based on common card issuer formats.
     """
@@ -331,7 +379,7 @@ def extract_credit_card_numbers(text):
     card_pattern = r'\b(?:\d[ -]*?){13,19}\b'
 
     # Find all potential credit card numbers
-    potential_card_numbers = re.findall(card_pattern, text)
+    potential_card_numbers = find_in_spans(card_pattern, text, digit_spans)
 
     # Clean up the numbers by removing spaces and hyphens, and validate using Luhn algorithm
     valid_card_numbers = []
@@ -342,7 +390,7 @@ def extract_credit_card_numbers(text):
 
     return valid_card_numbers
 
-def extract_social_security_numbers(text):
+def extract_social_security_numbers(text, digit_spans=None):
     """
     Extract and validate Social Security Numbers (SSNs) from text.
     Valid formats include XXX-XX-XXXX or XXXXXXXXX.
@@ -352,7 +400,7 @@ def extract_social_security_numbers(text):
     ssn_pattern = r'\b\d{3}-\d{2}-\d{4}\b|\b\d{9}\b'
 
     # Find all potential SSNs
-    potential_ssns = re.findall(ssn_pattern, text)
+    potential_ssns = find_in_spans(ssn_pattern, text, digit_spans)
 
     # Validate that no part of the SSN is all zeros
     valid_ssns = []
@@ -376,7 +424,7 @@ def extract_email_addresses(text):
     email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
 
     # Find all potential email addresses in the text
-    potential_emails = re.findall(email_pattern, text)
+    potential_emails = re.findall(email_pattern, text) if "@" in text else []
 
     # Validate email addresses to remove any with consecutive dots in the domain part
     valid_emails = []
@@ -390,7 +438,7 @@ def extract_email_addresses(text):
 
     return valid_emails
 
-def extract_phone_numbers(text):
+def extract_phone_numbers(text, digit_spans=None):
     """
     Extract and validate phone numbers from the given text based on common phone number formats.
     This version handles optional country codes, area codes, and different separators.
@@ -426,7 +474,7 @@ def extract_phone_numbers(text):
     phone_regex = re.compile(phone_pattern, re.VERBOSE)
 
     # Find all potential phone numbers
-    potential_phone_numbers = phone_regex.findall(text)
+    potential_phone_numbers = find_in_spans(phone_regex, text, digit_spans)
     
     # Strip whitespace, validate and filter phone numbers based on length and format
     valid_phone_numbers = [num.strip() for num in potential_phone_numbers if validate_phone_number(num.strip())]
@@ -473,7 +521,7 @@ def extract_date_time(text):
 
     return extracted_dates, extracted_times
 
-def extract_passport_numbers(text):
+def extract_passport_numbers(text, upper_spans=None):
     """
     Extract passport numbers based on common country formats.
     Passport numbers typically consist of 6 to 9 alphanumeric characters.
@@ -504,14 +552,14 @@ def extract_passport_numbers(text):
     passport_patterns = f'({usa_pattern})|({uk_pattern})|({canada_pattern})|({india_pattern})|({australia_pattern})|({germany_pattern})|({france_pattern})'
 
     # Find all potential passport numbers in the text
-    potential_passport_numbers = re.findall(passport_patterns, text)
+    potential_passport_numbers = find_in_spans(passport_patterns, text, upper_spans)
 
     # Flatten the list of tuples into a list of passport numbers
     extracted_passports = [passport for match in potential_passport_numbers for passport in match if passport]
 
     return extracted_passports
 
-def extract_swift_codes(text):
+def extract_swift_codes(text, words=None):
     # Complete list of ISO 3166-1 alpha-2 country codes
     ISO_COUNTRY_CODES = {
         "AF", "AX", "AL", "DZ", "AS", "AD", "AO", "AI", "AQ", "AG", "AR", "AM", "AW", "AU", "AT", 
@@ -562,39 +610,225 @@ def extract_swift_codes(text):
         
         return True
 
-    # Regular expression to match possible SWIFT codes (8 or 11 alphanumeric characters)
-    swift_code_pattern = r'\b[A-Z]{4}[A-Z]{2}[A-Z0-9]{2}(?:[A-Z0-9]{3})?\b'
+    # Regular expression to match possible SWIFT codes (8 or 11 alphanumeric characters), matched against whole words
+    swift_code_pattern = r'[A-Z]{4}[A-Z]{2}[A-Z0-9]{2}(?:[A-Z0-9]{3})?'
     
-    # Find all potential SWIFT codes in the text
-    potential_swift_codes = re.findall(swift_code_pattern, text)
+    # Find all potential SWIFT codes among the words of the text
+    if words is None:
+        words = tokenize_words(text)
+    potential_swift_codes = [word for word in words if len(word) in (8, 11) and re.fullmatch(swift_code_pattern, word)]
     
     # Validate each found code and return only the valid ones
     valid_swift_codes = [code for code in potential_swift_codes if validate_swift_code(code)]
     
     return valid_swift_codes
 
-def extract_all_from_text(text):
+def tokenize_words(text):
+    """ The words of text, see WORD """
+    return WORD.findall(text)
+
+def parse_doc(text):
     """
-    This function dynamically calls all functions that start with 'extract_' and aggregates
-    their results into a single JSON-compatible dictionary.
+    The spaCy doc of text, for its named entities.  Text past the model's
+    max_length is left out, as in sym_utils.analyze_texts.
     """
+    nlp = get_model("spacy")
+    return nlp(text[:nlp.max_length])
 
-    # Dictionary to hold the results
-    extracted_data = {}
+class ExtractorRegistry:
+    """
+    Extractors by name, each with the features of the text it takes as
+    keyword arguments, and the functions that compute those features.  A
+    feature is computed once per text and shared by every extractor that
+    declares it; features may require other features.
+    """
+    def __init__(self):
+        self.extractors = {}
+        self.features = {}
+
+    def register(self, name, func, requires=()):
+        self.extractors[name] = (func, tuple(requires))
+
+    def feature(self, name, func, requires=()):
+        self.features[name] = (func, tuple(requires))
+
+    @staticmethod
+    def ready(requires, features):
+        ''' The features named in requires, waiting for those still computed in a thread pool '''
+        values = {}
+        for feature in requires:
+            value = features[feature]
+            values[feature] = value.result() if isinstance(value, Future) else value
+        return values
+
+    @staticmethod
+    def arguments(requires, features):
+        ''' The features named in requires, raising the first one that failed '''
+        arguments = {feature: features[feature] for feature in requires}
+        for value in arguments.values():
+            if isinstance(value, Exception):
+                raise value
+        return arguments
+
+    def order(self, names):
+        ''' The features the extractors named require, each after the features it requires '''
+        ordered = []
+
+        def visit(feature):
+            if feature in ordered:
+                return
+            for required in self.features[feature][1]:
+                visit(required)
+            ordered.append(feature)
+
+        for name in names:
+            for feature in self.extractors[name][1]:
+                visit(feature)
+        return ordered
+
+    def compute(self, feature, text, features, timings):
+        """
+        The value of feature for text.  A feature that fails is kept as its
+        exception, so only the extractors requiring it fail.
+        """
+        func, requires = self.features[feature]
+        available = self.ready(requires, features)
+        start = time.perf_counter()
+        try:
+            value = func(text, **self.arguments(requires, available))
+        except Exception as e:
+            value = e
+        timings[f"feature:{feature}"] = time.perf_counter() - start
+        return value
+
+    def prepare(self, text, names, timings):
+        ''' The features the extractors named require '''
+        features = {}
+        for feature in self.order(names):
+            features[feature] = self.compute(feature, text, features, timings)
+        return features
+
+    def call(self, name, text, features, timings):
+        func, requires = self.extractors[name]
+        available = self.ready(requires, features)
+        start = time.perf_counter()
+        try:
+            result = func(text, **self.arguments(requires, available))
+        except Exception as e:
+            # Handle any exceptions that might occur when calling the function
+            result = f"Error: {str(e)}"
+        timings[name] = time.perf_counter() - start
+        return result
+
+    def run(self, text, names=None, workers=1, executor="thread", timings=None):
+        """
+        {name: result} of the extractors named, all of them by default, in
+        the order they were registered.  An extractor that raises gets
+        "Error: ..." as its result.  With more than one worker features and
+        extractors run in a thread pool, each extractor starting once its
+        own features are ready, so the regular expressions run while spaCy
+        parses the text.  Threads only overlap work that releases the GIL;
+        executor="process" runs workers batches of extractors in the
+        shared worker processes instead.  Seconds per extractor, and per
+        feature as "feature:<name>", are added to timings.
+        """
+        names = list(self.extractors) if names is None else list(names)
+        timings = {} if timings is None else timings
+
+        if workers > 1 and executor == "process":
+            batches = [batch for batch in (names[i::workers] for i in range(workers)) if batch]
+            results = {}
+            for batch_results, batch_timings in map_ordered(run_batch, batches, workers, text):
+                results.update(batch_results)
+                timings.update(batch_timings)
+            return {name: results[name] for name in names}
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Features are submitted after the ones they require and
+                # extractors last, the pool starts tasks in order, so a task
+                # only waits on tasks already running or done
+                futures = {}
+                for feature in self.order(names):
+                    futures[feature] = pool.submit(self.compute, feature, text, futures, timings)
+                results = [pool.submit(self.call, name, text, futures, timings) for name in names]
+                return {name: result.result() for name, result in zip(names, results)}
+
+        features = self.prepare(text, names, timings)
+        return {name: self.call(name, text, features, timings) for name in names}
+
+def run_batch(names, text):
+    """ (results, timings) of registry.run in a worker process """
+    timings = {}
+    return registry.run(text, names, timings=timings), timings
+
+def timing_report(timings):
+    """ A table of the timings from ExtractorRegistry.run, slowest first """
+    total = sum(timings.values())
+    table = Table(title="Extractor timings")
+    table.add_column("Extractor")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Share", justify="right")
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        table.add_row(name, f"{seconds:.4f}", f"{seconds / (total or 1):.1%}")
+    table.add_row("total", f"{total:.4f}", "")
+    return table
+
+registry = ExtractorRegistry()
+registry.feature("words", tokenize_words)
+registry.feature("doc", parse_doc)
+registry.feature("digit_spans", partial(candidate_spans, DIGIT_RUNS))
+registry.feature("upper_digit_spans", partial(candidate_spans, UPPER_DIGIT_RUNS))
+registry.feature("upper_spans", partial(candidate_spans, UPPER_RUNS))
+registry.feature("hex_spans", partial(candidate_spans, HEX_RUNS))
+
+# Dates and times take month names and am/pm, any prose is a candidate, so
+# they are matched over the whole text like URLs and emails, which are
+# skipped when their "://" or "@" is missing
+registry.register("extract_ipv4_and_cidr", extract_ipv4_and_cidr, requires=("digit_spans",))
+registry.register("extract_ipv6_and_cidr", extract_ipv6_and_cidr, requires=("hex_spans",))
+registry.register("extract_urls", extract_urls)
+registry.register("extract_geo_coordinates", extract_geo_coordinates, requires=("doc",))
+registry.register("extract_postal_codes", extract_postal_codes, requires=("upper_digit_spans",))
+registry.register("extract_vin_numbers", extract_vin_numbers, requires=("words",))
+registry.register("extract_mac_addresses", extract_mac_addresses, requires=("hex_spans",))
+registry.register("extract_routing_numbers", extract_routing_numbers, requires=("words",))
+registry.register("extract_bank_account_numbers", extract_bank_account_numbers, requires=("upper_digit_spans",))
+registry.register("extract_credit_card_numbers", extract_credit_card_numbers, requires=("digit_spans",))
+registry.register("extract_social_security_numbers", extract_social_security_numbers, requires=("digit_spans",))
+registry.register("extract_email_addresses", extract_email_addresses)
+registry.register("extract_phone_numbers", extract_phone_numbers, requires=("digit_spans",))
+registry.register("extract_date_time", extract_date_time)
+registry.register("extract_passport_numbers", extract_passport_numbers, requires=("upper_spans",))
+registry.register("extract_swift_codes", extract_swift_codes, requires=("words",))
+
+def extract_all_from_text(text, workers=1, executor="thread", timings=None):
+    """
+    Runs every registered extractor over the text and aggregates their
+    results into a single JSON-compatible dictionary keyed by extractor
+    name, see ExtractorRegistry.run.
+    """
+    return registry.run(text, workers=workers, executor=executor, timings=timings)
 
-    # Iterate over all functions in the current global namespace
-    for name, func in globals().items():
-        # Check if the function name starts with 'extract_' but exclude this function itself and ensure it's callable
-        if name.startswith("extract_") and name != "extract_all_from_text" and callable(func):
-            try:
-                # Call the function with the provided text and store the result
-                result = func(text)
-                extracted_data[name] = result
-            except Exception as e:
-                # Handle any exceptions that might occur when calling the function
-                extracted_data[name] = f"Error: {str(e)}"
+def all_from_chunk(chunk):
+    """
+    (start, end, results) of a chunk from sym_pii_stream.iter_chunks,
+    results being extract_all_from_text of its bytes from start to end.
+    """
+    offset, data, start, end = chunk
+    return offset + start, offset + end, extract_all_from_text(decode_chunk(data[start:end]))
 
-    return extracted_data
+def iter_all_from_stream(source, workers=1, chunk_size=1 << 19):
+    """
+    Yield all_from_chunk for each chunk of a file or stdin ("-") as it is
+    read, in order, so memory use does not grow with the input.  Chunks end
+    at newlines, values split over two lines are not found.  The default
+    chunk_size keeps a chunk's text under spaCy's default max_length of
+    1,000,000 characters, so the "doc" feature covers all of it.  With
+    more than one worker chunks are extracted in parallel processes, each
+    one loading the spaCy model once.
+    """
+    yield from map_ordered(all_from_chunk, iter_chunks(source, chunk_size), workers)
 
 def main():
 # Example usage
@@ -675,8 +909,12 @@ def main():
         with open(abs_path, 'r', encoding='utf-8') as file:
             text = file.read()
 
-    extracted_data = extract_all_from_text(text)
+    # usage: PiiHighConfidence.py [file] [workers], the timings go to stderr
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    timings = {}
+    extracted_data = extract_all_from_text(text, workers=workers, timings=timings)
     print(json.dumps(extracted_data, indent=4))
+    console.print(timing_report(timings))
 
 
 
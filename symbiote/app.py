@@ -30,7 +30,7 @@ import platform
 import pyfiglet
 
 from symbiote.sym_imports import *
-from symbiote.sym_session import SymSession
+from symbiote.sym_lazy import ImportProfiler
 
 def handle_control_c(signum, frame):
     log("\nControl-C detected")
@@ -39,6 +39,8 @@ def handle_control_c(signum, frame):
 signal.signal(signal.SIGINT, handle_control_c)
 disallowed_special=()
 CURRENT_PATH = os.getcwd()
+SYMBIOTE_PATH = os.path.join(os.path.expanduser('~'), ".symbiote")
+PACKAGES_CHECKED = os.path.join(SYMBIOTE_PATH, ".packages_checked")
 
 def check_piped_data():
     # Check if data is piped to the application
@@ -105,15 +107,32 @@ def main():
                             action='store_true',
                             help='Launch symbiote straight to prompt.')
 
+        parser.add_argument('--profile-startup',
+                            action='store_true',
+                            help='Print a per module import time breakdown once the session is ready.')
+
     args = parser.parse_args()
 
-    os.chdir('/tmp')
-    check_libmagic()
-    check_nl_packages()
-    os.chdir(CURRENT_PATH)
+    profiler = None
+    if args.profile_startup:
+        profiler = ImportProfiler().start()
 
+    # Package checks import nltk and spacy, only run them once or on request
+    if args.install or not os.path.exists(PACKAGES_CHECKED):
+        os.chdir('/tmp')
+        check_libmagic()
+        check_nl_packages()
+        os.chdir(CURRENT_PATH)
+        os.makedirs(SYMBIOTE_PATH, exist_ok=True)
+        open(PACKAGES_CHECKED, 'a').close()
+
+    from symbiote.sym_session import SymSession
     session = SymSession(working_directory=CURRENT_PATH)
 
+    if profiler is not None:
+        profiler.stop()
+        print(profiler.report())
+
     if args.api:
         import symbiote.api as api
         symapi = api.SymbioteAPI(session.console(), debug=args.debug)
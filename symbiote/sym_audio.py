@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+#
+# sym_audio.py
+
+import hashlib
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+from symbiote.sym_lazy import lazy_import
+from symbiote.sym_extract_cache import get_extract_cache
+
+np = lazy_import("numpy")
+sr = lazy_import("speech_recognition")
+
+# Bump when segment transcripts change, cached ones of older versions are ignored
+segment_cache_version = 1
+
+def decode_pcm(file_path, sample_rate=16000, block_seconds=1.0):
+    '''
+    Yield the audio of file_path as blocks of 16 bit mono PCM, decoded by an
+    ffmpeg pipe so no intermediate WAV is written.
+    '''
+    command = [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-i", file_path,
+            "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "-",
+        ]
+    block_size = int(sample_rate * block_seconds) * 2
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            block = process.stdout.read(block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        process.stdout.close()
+        process.kill()
+        _, errors = process.communicate()
+
+    if process.returncode not in (0, -9) and errors:
+        log(f"ffmpeg: {errors.decode(errors='ignore').strip()}")
+
+class SilenceSplitter:
+    """
+    Cuts a PCM stream into segments at pauses.
+
+    The stream is measured in frame_ms frames.  Once a segment is at least
+    min_segment seconds long, the middle of the next run of min_silence_ms
+    or more below silence_dbfs ends it.  No segment is longer than
+    max_segment seconds, which keeps each one within what a recognizer
+    request accepts.
+    """
+    def __init__(self, sample_rate=16000, frame_ms=30, silence_dbfs=-40.0, min_silence_ms=400,
+                 min_segment=5.0, max_segment=30.0):
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.threshold = 32768 * 10 ** (silence_dbfs / 20)
+        self.min_silence = max(1, min_silence_ms // frame_ms)
+        self.min_frames = int(min_segment * 1000 / frame_ms)
+        self.max_frames = int(max_segment * 1000 / frame_ms)
+
+    def quiet_frames(self, data):
+        ''' One flag per whole frame of data, True where it is below the threshold '''
+        frames = len(data) // self.frame_bytes
+        samples = np.frombuffer(data, dtype="<i2", count=frames * self.frame_bytes // 2)
+        samples = samples.reshape(frames, -1).astype(np.float32)
+        rms = np.sqrt((samples * samples).mean(axis=1)) if frames else np.zeros(0)
+        return (rms < self.threshold).tolist()
+
+    def split(self, blocks):
+        ''' Yield (start_seconds, pcm) per segment of the blocks of PCM '''
+        segment = bytearray()
+        frames = 0
+        quiet_run = 0
+        start = 0.0
+        pending = b""
+        for block in blocks:
+            data = pending + block
+            usable = len(data) - len(data) % self.frame_bytes
+            pending = data[usable:]
+            for index, quiet in enumerate(self.quiet_frames(data[:usable])):
+                segment += data[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+                frames += 1
+                quiet_run = quiet_run + 1 if quiet else 0
+
+                cut = None
+                if quiet_run >= self.min_silence and frames >= self.min_frames:
+                    # Cut in the middle of the pause, the rest opens the next segment
+                    cut = frames - quiet_run // 2
+                elif frames >= self.max_frames:
+                    cut = frames
+
+                if cut is not None:
+                    yield start, bytes(segment[:cut * self.frame_bytes])
+                    start += cut * self.frame_bytes / 2 / self.sample_rate
+                    segment = segment[cut * self.frame_bytes:]
+                    frames -= cut
+                    quiet_run = min(quiet_run, frames)
+
+        segment += pending
+        if segment and frames > quiet_run:
+            yield start, bytes(segment)
+
+def recognize_segment(pcm, sample_rate=16000):
+    ''' Transcript of one PCM segment, cached by the hash of its samples '''
+    cache = get_extract_cache()
+    digest = hashlib.sha256(pcm).hexdigest()
+    if cache is not None:
+        text = cache.get(digest, "recognize_google", segment_cache_version)
+        if text is not None:
+            return text
+
+    recognizer = sr.Recognizer()
+    try:
+        text = recognizer.recognize_google(sr.AudioData(pcm, sample_rate, 2))
+    except sr.UnknownValueError:
+        # Nothing intelligible, e.g. music or noise
+        text = ""
+
+    if cache is not None:
+        cache.put(digest, "recognize_google", segment_cache_version, text)
+
+    return text
+
+def transcribe_segments(file_path, workers=8, sample_rate=16000, splitter=None):
+    '''
+    Yield (start_seconds, text) per segment of an audio file in order.  The
+    file is decoded and split while earlier segments are being recognized,
+    with at most workers * 2 segments held at once.
+    '''
+    splitter = splitter or SilenceSplitter(sample_rate=sample_rate)
+    segments = splitter.split(decode_pcm(file_path, sample_rate=sample_rate))
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="symbiote-audio") as pool:
+        try:
+            for start, pcm in segments:
+                pending.append((start, pool.submit(recognize_segment, pcm, sample_rate)))
+                if len(pending) >= workers * 2:
+                    start, future = pending.popleft()
+                    yield start, future.result()
+
+            while pending:
+                start, future = pending.popleft()
+                yield start, future.result()
+        finally:
+            for start, future in pending:
+                future.cancel()
+            segments.close()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+#
+# sym_blob_store.py
+
+import os
+import mmap
+import hashlib
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def is_blob(value):
+    ''' True for the reference dict a blob is stored under in the memory tree '''
+    return isinstance(value, dict) and "__blob__" in value and len(value) == 3
+
+class BlobView:
+    """
+    Lazily materialized text of one blob.  Nothing is read until the text
+    is used, uncompressed blobs are read through mmap and previews only
+    touch the pages they need.
+    """
+    def __init__(self, store, digest, size, codec):
+        self.store = store
+        self.digest = digest
+        self.size = size
+        self.codec = codec
+
+    def bytes(self):
+        path = self.store.path(self.digest, self.codec)
+        if self.codec == "zstd":
+            with open(path, "rb") as file:
+                return zstandard.ZstdDecompressor().decompress(file.read(), max_output_size=self.size)
+
+        if self.size == 0:
+            return b""
+
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return data[:]
+
+    def text(self):
+        return self.bytes().decode("utf-8", "surrogatepass")
+
+    def preview(self, chars=1000):
+        ''' The first chars characters, with "..." when the text is longer '''
+        if self.codec == "zstd":
+            text = self.text()
+        else:
+            path = self.store.path(self.digest, self.codec)
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                text = data[:(chars + 1) * 4].decode("utf-8", "ignore")
+
+        return text[:chars] + "..." if len(text) > chars else text
+
+    def reference(self):
+        return {"__blob__": self.digest, "size": self.size, "codec": self.codec}
+
+    def __str__(self):
+        return self.text()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, item):
+        return item in self.text()
+
+    def __eq__(self, other):
+        if isinstance(other, BlobView):
+            return self.digest == other.digest
+        if isinstance(other, str):
+            return self.text() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"<blob {self.digest[:12]} {self.size} bytes {self.codec}>"
+
+class BlobStore:
+    """
+    Content addressed storage for large memory values.  Each value is
+    written once under the sha256 of its utf-8 bytes, zstd compressed when
+    the zstandard module is available.
+    """
+    def __init__(self, directory, threshold=65536, compress=True):
+        self.directory = directory
+        self.threshold = threshold
+        self.codec = "zstd" if compress and zstandard is not None else "raw"
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, digest, codec):
+        suffix = ".zst" if codec == "zstd" else ""
+        return os.path.join(self.directory, digest[:2], digest + suffix)
+
+    def put(self, text):
+        ''' Store text, returning its reference dict '''
+        data = text.encode("utf-8", "surrogatepass")
+        digest = hashlib.sha256(data).hexdigest()
+        size = len(data)
+
+        for codec in ("raw", "zstd"):
+            if os.path.exists(self.path(digest, codec)):
+                return {"__blob__": digest, "size": size, "codec": codec}
+
+        path = self.path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.codec == "zstd":
+            data = zstandard.ZstdCompressor(level=3).compress(data)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+        return {"__blob__": digest, "size": size, "codec": self.codec}
+
+    def view(self, reference):
+        return BlobView(self, reference["__blob__"], reference["size"], reference["codec"])
+
+    def externalize(self, value):
+        ''' Copy of value with every string of threshold bytes or more moved to a blob '''
+        if isinstance(value, str):
+            # At most four utf-8 bytes per character
+            if len(value) * 4 >= self.threshold and \
+                    len(value.encode("utf-8", "surrogatepass")) >= self.threshold:
+                return self.put(value)
+            return value
+        if isinstance(value, BlobView):
+            return value.reference()
+        if isinstance(value, dict):
+            return {key: self.externalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.externalize(item) for item in value]
+        return value
+
+    def resolve(self, value):
+        ''' Copy of value with blob references replaced by BlobViews '''
+        if is_blob(value):
+            return self.view(value)
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+    def collect(self, storage):
+        ''' Delete every blob no longer referenced from storage '''
+        referenced = set()
+        pending = [storage]
+        while pending:
+            value = pending.pop()
+            if is_blob(value):
+                referenced.add(value["__blob__"])
+            elif isinstance(value, dict):
+                pending.extend(value.values())
+            elif isinstance(value, list):
+                pending.extend(value)
+
+        removed = 0
+        for prefix in os.listdir(self.directory):
+            folder = os.path.join(self.directory, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                digest = name.split(".")[0]
+                if digest not in referenced:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+
+        return removed
+
+def materialize(value):
+    ''' Copy of value with every BlobView read into a plain string '''
+    if isinstance(value, BlobView):
+        return value.text()
+    if isinstance(value, dict):
+        return {key: materialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [materialize(item) for item in value]
+    return value
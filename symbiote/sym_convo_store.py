@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+#
+# sym_convo_store.py
+
+import os
+import mmap
+import json
+import time
+import struct
+import atexit
+import threading
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+# Sidecar index entry: the byte offset of one jsonl record.
+index_entry = struct.Struct("<Q")
+
+class ConversationStore:
+    """
+    Append only jsonl conversation log with a sidecar offset index.
+
+    Appends are buffered and written with a single fsync once flush_every
+    records are pending or flush_interval seconds after the first pending
+    record, whichever comes first.  The index (path + ".idx") holds the byte
+    offset of every record so the tail of a conversation is read through
+    mmap without scanning the file.  A missing or short index is repaired
+    from the last indexed record on open.
+    """
+    def __init__(self, path, flush_interval=1.0, flush_every=32):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.pending = []
+        self._lock = threading.RLock()
+        self._timer = None
+
+        with self._lock:
+            self.offsets = self._load_index()
+            self.size = self._file_size()
+            self._repair_index()
+
+        atexit.register(self.close)
+
+    def _file_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return []
+
+        usable = len(data) - len(data) % index_entry.size
+        return [offset for (offset,) in index_entry.iter_unpack(data[:usable])]
+
+    def _repair_index(self):
+        ''' Index any records written after the last indexed one '''
+        # Drop entries that point past the end, e.g. after the log was cleared
+        indexed = len(self.offsets)
+        while self.offsets and self.offsets[-1] >= self.size:
+            self.offsets.pop()
+
+        # Rescan from the last indexed record, it may have been torn by a crash
+        start = self.offsets.pop() if self.offsets else 0
+        if start < self.size:
+            with open(self.path, "rb") as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                position = start
+                while position < self.size:
+                    end = data.find(b"\n", position)
+                    if end == -1:
+                        break
+                    self.offsets.append(position)
+                    position = end + 1
+
+            if position < self.size:
+                log(f"Dropping incomplete conversation record at {position} in {self.path}")
+                os.truncate(self.path, position)
+                self.size = position
+
+        if len(self.offsets) != indexed or self._index_size() != indexed * index_entry.size:
+            with open(self.index_path, "wb") as file:
+                file.write(b"".join(index_entry.pack(offset) for offset in self.offsets))
+
+    def _index_size(self):
+        try:
+            return os.path.getsize(self.index_path)
+        except FileNotFoundError:
+            return -1
+
+    def append(self, message):
+        record = dict(message)
+        record.setdefault("epoch", time.time())
+        line = (json.dumps(record) + "\n").encode("utf-8")
+
+        with self._lock:
+            self.pending.append(line)
+            if len(self.pending) >= self.flush_every:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self.pending:
+                return
+
+            offsets = []
+            position = self.size
+            for line in self.pending:
+                offsets.append(position)
+                position += len(line)
+
+            with open(self.path, "ab") as file:
+                file.write(b"".join(self.pending))
+                file.flush()
+                os.fsync(file.fileno())
+
+            with open(self.index_path, "ab") as file:
+                file.write(b"".join(index_entry.pack(offset) for offset in offsets))
+                file.flush()
+                os.fsync(file.fileno())
+
+            self.offsets.extend(offsets)
+            self.size = position
+            self.pending = []
+
+    def tail(self, count=None, max_tokens=None, counter=None):
+        '''
+        Return the last count messages, or as many of the newest messages as
+        fit max_tokens when a TokenCounter is given, oldest first.
+        '''
+        self.flush()
+
+        with self._lock:
+            offsets = self.offsets if count is None else self.offsets[-count:] if count else []
+            if not offsets:
+                return []
+
+            messages = []
+            tokens = 0
+            with open(self.path, "rb") as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = self.size
+                for offset in reversed(offsets):
+                    try:
+                        message = json.loads(data[offset:end])
+                    except ValueError as e:
+                        log(f"Skipping damaged conversation record at {offset}: {e}")
+                        end = offset
+                        continue
+                    end = offset
+
+                    if max_tokens is not None and counter is not None:
+                        tokens += counter.count_message(message)
+                        if tokens > max_tokens:
+                            break
+
+                    messages.append(message)
+
+        messages.reverse()
+        return messages
+
+    def clear(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            self.pending = []
+            open(self.path, "w").close()
+            open(self.index_path, "w").close()
+            self.offsets = []
+            self.size = 0
+
+    def close(self):
+        # A closed store no longer needs flushing at exit, nor keeping alive
+        atexit.unregister(self.close)
+        try:
+            self.flush()
+        except Exception as e:
+            log(f"Error flushing conversation {self.path}: {e}")
+
+    def __len__(self):
+        return len(self.offsets) + len(self.pending)
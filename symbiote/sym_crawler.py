@@ -40,6 +40,8 @@ class WebCrawler:
         self.found_links = set()
         self.use_selenium = use_selenium
         self.session = requests.Session()
+        # Callable checked before each link is followed, true stops the crawl
+        self.should_stop = None
 
         # Set up WebDriver if using Selenium
         if self.use_selenium:
@@ -256,6 +258,8 @@ class WebCrawler:
         # Crawl deeper if needed
         if self.crawl and (depth is None or depth > 0):
             for link in links:
+                if self.should_stop is not None and self.should_stop():
+                    break
                 if link not in self.visited_urls:
                     self.visited_urls.add(link)
                     self.pull_website_content(link, search_term=self.search_term, crawl=True, depth=depth - 1 if depth else None)
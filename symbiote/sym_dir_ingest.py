@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+#
+# sym_dir_ingest.py
+
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from symbiote.sym_utils import extract_text
+from symbiote.sym_tokenizer import TokenCounter, CharTokenizer
+
+def gitignore_regex(pattern):
+    ''' Translate one .gitignore pattern body to a regex over / separated relative paths '''
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("/**", index) and index + 3 == len(pattern):
+            parts.append("(?:/.*)?")
+            index += 3
+        elif pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            parts.append("[^/]")
+            index += 1
+        elif pattern[index] == "[" and "]" in pattern[index + 2:]:
+            end = pattern.index("]", index + 2)
+            parts.append("[" + pattern[index + 1:end].replace("!", "^", 1) + "]")
+            index = end + 1
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(parts) + r"\Z")
+
+def read_gitignore(directory):
+    ''' Rules of directory/.gitignore as (base, regex, negate, dir_only) '''
+    rules = []
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", errors="ignore") as file:
+            lines = file.read().splitlines()
+    except OSError:
+        return rules
+
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line:
+            rules.append((directory, gitignore_regex(line), negate, dir_only))
+
+    return rules
+
+def is_ignored(path, is_dir, rules):
+    ignored = False
+    for base, regex, negate, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if regex.match(os.path.relpath(path, base).replace(os.sep, "/")):
+            ignored = not negate
+
+    return ignored
+
+def walk_files(root):
+    '''
+    Yield (path, size) for every file under root in sorted order, skipping
+    hidden entries, anything a .gitignore on the way excludes and symlinks.
+    '''
+    pending = [(root, read_gitignore(root))]
+    while pending:
+        directory, rules = pending.pop()
+        try:
+            with os.scandir(directory) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+
+            try:
+                if entry.is_symlink():
+                    continue
+                is_dir = entry.is_dir()
+                if is_ignored(entry.path, is_dir, rules):
+                    continue
+                if is_dir:
+                    subdirectories.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.stat().st_size
+            except OSError:
+                continue
+
+        # Reversed so the stack visits subdirectories in name order
+        for path in reversed(subdirectories):
+            pending.append((path, rules + read_gitignore(path)))
+
+class DirectoryIngester:
+    """
+    Streams the text of the files under a directory as one chunk per file.
+
+    Files are extracted by a worker pool with a bounded number in flight and
+    yielded in walk order.  Chunks count against max_tokens; the file that
+    crosses the budget is truncated and the rest of the tree is only
+    counted, ending the stream with a summary of what was left out.  At most
+    max_workers * 2 extracted files are held at once, whatever the size of
+    the tree.
+    """
+    def __init__(self, root, counter=None, max_tokens=None, max_workers=4, max_file_bytes=32 << 20):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.counter = counter or TokenCounter(CharTokenizer())
+        self.max_tokens = max_tokens
+        self.max_workers = max_workers
+        self.max_file_bytes = max_file_bytes
+
+        self.tokens = 0
+        self.included = 0
+        self.truncated = None
+        self.skipped = 0
+        self.omitted = []
+        self.omitted_count = 0
+
+    def chunk(self, path, content):
+        return f"File name: {path}\n\n```\n{content}\n```\n"
+
+    def _extract(self, path):
+        return path, extract_text(path)
+
+    def _results(self, pool, files):
+        # Keep a window of extractions running ahead of the consumer
+        in_flight = deque()
+        try:
+            for path, size in files:
+                if size > self.max_file_bytes:
+                    self.skipped += 1
+                    continue
+
+                in_flight.append((path, pool.submit(self._extract, path)))
+                if len(in_flight) >= self.max_workers * 2:
+                    yield in_flight.popleft()[1].result()
+
+            while in_flight:
+                yield in_flight.popleft()[1].result()
+        finally:
+            # Closed at the budget, files already submitted are left out
+            for path, future in in_flight:
+                future.cancel()
+                self.omit(path)
+
+    def __iter__(self):
+        files = walk_files(self.root)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="symbiote-ingest") as pool:
+            results = self._results(pool, files)
+            try:
+                for path, content in results:
+                    if not content:
+                        self.skipped += 1
+                        continue
+
+                    chunk = self.chunk(path, content)
+                    tokens = self.counter.count(chunk)
+                    if self.max_tokens is not None and self.tokens + tokens > self.max_tokens:
+                        chunk, tokens = self.truncate(path, content, tokens)
+                        if chunk:
+                            self.truncated = path
+                            self.tokens += tokens
+                            self.included += 1
+                            yield chunk
+                        else:
+                            self.omit(path)
+                        break
+
+                    self.tokens += tokens
+                    self.included += 1
+                    yield chunk
+            finally:
+                # At the budget or when the consumer stops early
+                results.close()
+
+        # Past the budget the rest of the tree is only walked, not extracted
+        for path, size in files:
+            self.omit(path)
+
+        summary = self.summary()
+        if summary:
+            yield summary
+
+    def truncate(self, path, content, tokens):
+        ''' The chunk for the part of content that fits the remaining budget '''
+        remaining = self.max_tokens - self.tokens - self.counter.count(self.chunk(path, ""))
+        if remaining <= 0:
+            return None, 0
+
+        content = content[:len(content) * remaining // tokens]
+        chunk = self.chunk(path, content + "\n[truncated]")
+        return chunk, self.counter.count(chunk)
+
+    def omit(self, path):
+        self.omitted_count += 1
+        if len(self.omitted) < 20:
+            self.omitted.append(path)
+
+    def summary(self):
+        if not self.omitted_count and self.truncated is None:
+            return ""
+
+        summary = f"\nToken budget of {self.max_tokens} reached after {self.included} files from {self.root}.\n"
+        if self.truncated is not None:
+            summary += f"{self.truncated} was truncated.\n"
+        if self.omitted_count:
+            summary += f"{self.omitted_count} more files were not included:\n"
+            summary += "".join(f"- {path}\n" for path in self.omitted)
+            if self.omitted_count > len(self.omitted):
+                summary += f"- ... and {self.omitted_count - len(self.omitted)} more\n"
+
+        return summary
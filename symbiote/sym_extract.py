@@ -12,6 +12,14 @@
 import re
 import sys
 import json
+import bisect
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
 
 from rich.console import Console
 from rich.highlighter import RegexHighlighter
@@ -165,60 +173,392 @@ def extract_pii(content):
     return results
 
 
+def _can_match_newline(items):
+    """ Whether a parsed class (the items of an IN) contains a newline """
+    negate = False
+    found = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            found = found or av == 10
+        elif op is sre_constants.RANGE:
+            found = found or av[0] <= 10 <= av[1]
+        elif op is sre_constants.CATEGORY:
+            found = found or av in NEWLINE_CATEGORIES
+    return found != negate
+
+
+NEWLINE_CATEGORIES = {
+    sre_constants.CATEGORY_SPACE, sre_constants.CATEGORY_NOT_DIGIT, sre_constants.CATEGORY_NOT_WORD,
+    sre_constants.CATEGORY_LINEBREAK, sre_constants.CATEGORY_UNI_SPACE, sre_constants.CATEGORY_UNI_NOT_DIGIT,
+    sre_constants.CATEGORY_UNI_NOT_WORD, sre_constants.CATEGORY_UNI_LINEBREAK,
+}
+
+
+def _analyze_parsed(items, flags):
+    """
+    (requirements, line_safe) of a parsed pattern.  requirements is a list
+    of (literals, folded): a match contains at least one of every set of
+    literal strings, compared lowercase when folded.  line_safe is False
+    when a match could span a newline or depends on what is around a line,
+    so it has to be run line by line.
+    """
+    requirements = []
+    line_safe = True
+    run = []
+    run_folded = False
+
+    def flush():
+        if run:
+            requirements.append(({"".join(run)}, run_folded))
+            run.clear()
+
+    for op, av in items:
+        name = str(op)
+        if op is sre_constants.LITERAL:
+            folded = bool(flags & re.IGNORECASE)
+            if folded != run_folded or av > 127:
+                flush()
+                run_folded = folded
+            if av <= 127:
+                run.append(chr(av).lower() if folded else chr(av))
+            line_safe = line_safe and av != 10
+            continue
+
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            group, add_flags, del_flags, body = av
+            sub_flags = (flags | add_flags) & ~del_flags
+            found, safe = _analyze_parsed(body, sub_flags)
+            requirements.extend(found)
+            line_safe = line_safe and safe
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, high, body = av
+            found, safe = _analyze_parsed(body, flags)
+            if low >= 1:
+                requirements.extend(found)
+            line_safe = line_safe and safe
+        elif name == "ATOMIC_GROUP":
+            found, safe = _analyze_parsed(av, flags)
+            requirements.extend(found)
+            line_safe = line_safe and safe
+        elif op is sre_constants.BRANCH:
+            # A match goes through one alternative, so it contains one of the
+            # literals each alternative requires
+            choices = []
+            for alternative in av[1]:
+                found, safe = _analyze_parsed(alternative, flags)
+                line_safe = line_safe and safe
+                if choices is not None and found:
+                    choices.append(max(found, key=lambda item: min(map(len, item[0]))))
+                else:
+                    choices = None
+            if choices:
+                folded = any(item_folded for literals, item_folded in choices)
+                literals = {literal.lower() if folded else literal for item, item_folded in choices for literal in item}
+                requirements.append((literals, folded))
+        elif op is sre_constants.IN:
+            line_safe = line_safe and not _can_match_newline(av)
+        elif op is sre_constants.NOT_LITERAL:
+            line_safe = line_safe and av == 10
+        elif op is sre_constants.ANY:
+            line_safe = line_safe and not flags & re.DOTALL
+        elif op is sre_constants.AT:
+            # ^, $, \A and \Z mean something else within a line than within the text
+            line_safe = line_safe and av in (sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY)
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            # A lookaround that cannot match a newline sees the same within a line
+            found, safe = _analyze_parsed(av[1], flags)
+            line_safe = line_safe and safe
+        elif op is sre_constants.GROUPREF:
+            pass
+        else:
+            line_safe = False
+
+    flush()
+    return requirements, line_safe
+
+
+CATEGORY_CLASSES = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_SPACE: r"\s",
+}
+
+
+def _first_chars(items, flags):
+    """
+    (fragments, nullable) of a parsed pattern: character class fragments
+    covering every character a match can start with, or None when they
+    cannot be told, and whether it can match the empty string.
+    """
+    fragments = set()
+    for op, av in items:
+        name = str(op)
+        if op is sre_constants.LITERAL:
+            char = chr(av)
+            fragments.add(re.escape(char))
+            if flags & re.IGNORECASE:
+                if av > 127:
+                    return None, False
+                fragments.update((re.escape(char.lower()), re.escape(char.upper())))
+            return fragments, False
+        elif op is sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op is sre_constants.LITERAL and not (flags & re.IGNORECASE and item_av > 127):
+                    char = chr(item_av)
+                    fragments.add(re.escape(char))
+                    if flags & re.IGNORECASE:
+                        fragments.update((re.escape(char.lower()), re.escape(char.upper())))
+                elif item_op is sre_constants.RANGE and not flags & re.IGNORECASE:
+                    fragments.add(f"{re.escape(chr(item_av[0]))}-{re.escape(chr(item_av[1]))}")
+                elif item_op is sre_constants.CATEGORY and item_av in CATEGORY_CLASSES:
+                    fragments.add(CATEGORY_CLASSES[item_av])
+                else:
+                    return None, False
+            return fragments, False
+        elif op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            # Zero width, the match starts with what follows
+            continue
+        elif op is sre_constants.SUBPATTERN or name == "ATOMIC_GROUP":
+            if name == "ATOMIC_GROUP":
+                body, sub_flags = av, flags
+            else:
+                group, add_flags, del_flags, body = av
+                sub_flags = (flags | add_flags) & ~del_flags
+            found, nullable = _first_chars(body, sub_flags)
+            if found is None:
+                return None, False
+            fragments |= found
+            if not nullable:
+                return fragments, False
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, high, body = av
+            found, nullable = _first_chars(body, flags)
+            if found is None:
+                return None, False
+            fragments |= found
+            if low >= 1 and not nullable:
+                return fragments, False
+        elif op is sre_constants.BRANCH:
+            any_nullable = False
+            for alternative in av[1]:
+                found, nullable = _first_chars(alternative, flags)
+                if found is None:
+                    return None, False
+                fragments |= found
+                any_nullable = any_nullable or nullable
+            if not any_nullable:
+                return fragments, False
+        else:
+            return None, False
+
+    return fragments, True
+
+
+class CompiledPattern:
+    """
+    One labeled pattern, compiled once.  requirements are literal strings
+    every match contains (see _analyze_parsed), used to skip the pattern,
+    or the lines, where they do not occur.  When the characters a match
+    can start with are known they are prepended as a lookahead, which lets
+    the regex engine skip to candidate positions; what matches is the same.
+    """
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.labels = list(self.regex.groupindex)
+        try:
+            parsed = sre_parse.parse(pattern)
+            items, flags = list(parsed), parsed.state.flags
+            self.requirements, self.line_safe = _analyze_parsed(items, flags)
+        except Exception:
+            self.requirements, self.line_safe = [], False
+            return
+
+        first, nullable = _first_chars(items, flags)
+        if first and not nullable:
+            try:
+                self.regex = re.compile(f"(?=[{''.join(sorted(first))}])(?:{pattern})", flags)
+            except re.error:
+                # e.g. a global (?i) that has to open the pattern
+                pass
+
+    def anchor(self, text, folded):
+        """
+        (occurrences, literals, folded) of the requirement occurring least
+        in text, occurrences is 0 when the pattern cannot match and None
+        when it has no requirements.  folded is text lowercased.
+        """
+        best = (None, None, False)
+        for literals, is_folded in self.requirements:
+            haystack = folded if is_folded else text
+            occurrences = sum(haystack.count(literal) for literal in literals)
+            if best[0] is None or occurrences < best[0]:
+                best = (occurrences, literals, is_folded)
+            if not occurrences:
+                break
+        return best
+
+
+class PatternSet:
+    """
+    A list of labeled patterns compiled once, with what is needed to scan
+    text in few passes.
+
+    Newlines are match boundaries, no match spans two lines.  Patterns
+    whose matches cannot cross a newline run in a single pass over the
+    whole text.  The others, such as the context patterns built on \s+,
+    run line by line, so a phrase broken over two lines is not found (the
+    old scan glued the lines together instead).  This bounds the
+    backtracking of patterns like (?:\s+\w+)* to one line and makes the
+    results of sym_pii_stream, whose chunks end at newlines, those of the
+    whole text.  A pattern whose required literals are not in the text is
+    skipped, and one whose rarest required literal is on few lines only
+    runs over those lines.  Patterns that fail to compile are kept in
+    errors.
+    """
+    # Below this share of the lines an anchor's lines are scanned instead of all of them
+    sparse = 0.25
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self.errors = []
+        for pattern in patterns:
+            try:
+                self.patterns.append(CompiledPattern(pattern))
+            except re.error as e:
+                self.errors.append((pattern, str(e)))
+
+    @staticmethod
+    def _anchor_lines(literals, text, starts):
+        """ Indices of the lines of text that contain one of literals """
+        anchor = re.compile("|".join(re.escape(literal) for literal in sorted(literals, key=len, reverse=True)))
+        lines = []
+        for match in anchor.finditer(text):
+            line = bisect.bisect_right(starts, match.start()) - 1
+            if not lines or lines[-1] != line:
+                lines.append(line)
+        return lines
+
+    def finditer(self, text):
+        """
+        Yield (label, value, start, end) for every named group of every
+        match, pattern by pattern in order.
+        """
+        for index, label, value, start, end in self.scan(text):
+            yield label, value, start, end
+
+    def scan(self, text):
+        """ finditer, with the index of the pattern first in each tuple """
+        starts = ends = None
+        folded = text.lower()
+        for index, compiled in enumerate(self.patterns):
+            occurrences, literals, is_folded = compiled.anchor(text, folded)
+            if occurrences == 0:
+                continue
+
+            if starts is None and (occurrences is not None or not compiled.line_safe):
+                starts = [0] + [match.end() for match in NEWLINE.finditer(text)]
+                ends = [start - 1 for start in starts[1:]] + [len(text)]
+
+            # Lowercasing keeps offsets only when no character changes length
+            sparse = (occurrences is not None and occurrences < len(starts) * self.sparse
+                      and (not is_folded or len(folded) == len(text)))
+            if sparse:
+                lines = self._anchor_lines(literals, folded if is_folded else text, starts)
+            elif not compiled.line_safe:
+                lines = range(len(starts))
+
+            if compiled.line_safe and not sparse:
+                spans = [(compiled.regex.finditer(text), 0)]
+            elif compiled.line_safe:
+                spans = ((compiled.regex.finditer(text, starts[line], ends[line]), 0) for line in lines)
+            else:
+                # Sliced so that ^ and $ match at the ends of the line
+                spans = ((compiled.regex.finditer(text[starts[line]:ends[line]]), starts[line]) for line in lines)
+
+            for matches, offset in spans:
+                for match in matches:
+                    for label in compiled.labels:
+                        value = match.group(label)
+                        if value:
+                            yield index, label, value, match.start() + offset, match.end() + offset
+
+
+NEWLINE = re.compile(r"\n")
+UNPRINTABLE = re.compile(r"[^\x20-\x7e\n]+")
+
+_pattern_sets = {}
+
+
+def get_pattern_set(patterns):
+    """ The PatternSet of a list of patterns, compiled on first use """
+    if isinstance(patterns, PatternSet):
+        return patterns
+    key = tuple(patterns)
+    pattern_set = _pattern_sets.get(key)
+    if pattern_set is None:
+        pattern_set = _pattern_sets[key] = PatternSet(key)
+    return pattern_set
+
+
+# The default patterns are compiled once, at import
+get_pattern_set(PATTERNS)
+
+
+def sanitize(text):
+    """
+    Drop unprintable characters except newlines, which are kept as match
+    boundaries, and squeeze runs of spaces and of newlines.
+    """
+    # Printable ASCII is kept as is, only the other runs are checked character by character
+    text = UNPRINTABLE.sub(lambda match: "".join(char for char in match.group() if char.isprintable() or char == "\n"), text)
+    text = re.sub(r'\n+', '\n', text)
+    text = re.sub(r' +', ' ', text)
+    return text
+
+
 def extract_and_stitch_matches(text, patterns=PATTERNS):
     """
     Extract labeled matches using regex patterns and stitch contiguous matches
-    into full objects. Newline characters act as absolute boundaries.
+    into full objects. Newline characters act as absolute boundaries: a
+    match never spans two lines, see PatternSet.
     Deduplicates entries before returning results.
 
     Args:
         text (str): The input text to analyze.
-        patterns (List[str]): List of regex patterns with labeled groups.
+        patterns (List[str] | PatternSet): Regex patterns with labeled groups,
+            compiled once per distinct list, see PatternSet.
 
     Returns:
         Dict[str, List[str]]: Extracted and stitched matches grouped by labels.
     """
-    import re
+    pattern_set = get_pattern_set(patterns)
+    if pattern_set.errors:
+        for error in pattern_set.errors:
+            print(error)
+        return
 
-    # Sanitize Text Input
-    text = ''.join(char for char in text if char.isprintable())
-    text = re.sub(r'\n+', ' ', text)  # Replace multiple newlines with a space
-    text = re.sub(r' +', ' ', text)   # Replace multiple spaces with a single space
+    text = sanitize(text)
 
-    # Dictionary to hold matches grouped by label
+    # label -> {value: match}, the first match of each value is kept
     matches_by_label = {}
+    for label, value, start, end in pattern_set.finditer(text):
+        matches = matches_by_label.setdefault(label, {})
+        if value not in matches:
+            matches[value] = {"value": value, "start": start, "end": end}
 
-    compiled_patterns = []
-    errors = []
-    # Verify patterns before continuing
-    for pattern in patterns:
-        try:
-            compiled_patterns.append(re.compile(pattern))
-        except re.error as e:
-            errors.append((pattern, str(e)))
-
-    if errors:
-        for error in errors:
-            print(error)
-        return
+    return stitch_matches(matches_by_label)
 
-    # Iterate through all patterns
-    for pattern in patterns:
-        regex = re.compile(pattern)
-        for match in regex.finditer(text):
-            for label, value in match.groupdict().items():
-                if value:
-                    if label not in matches_by_label:
-                        matches_by_label[label] = []
-
-                    # Avoid duplicate entries
-                    if not any(existing["value"] == value for existing in matches_by_label[label]):
-                        matches_by_label[label].append({
-                            "value": value,
-                            "start": match.start(),
-                            "end": match.end()
-                        })
 
+def stitch_matches(matches_by_label):
+    """
+    Join each label's matches that touch or overlap into one, see
+    extract_and_stitch_matches.  matches_by_label maps a label to its
+    matches, dicts of value, start and end, keyed by value.
+    """
     # Stitch contiguous matches for each label
     stitched_results = {}
     for label, matches in matches_by_label.items():
@@ -226,23 +566,20 @@ def extract_and_stitch_matches(text, patterns=PATTERNS):
             continue
 
         # Sort matches by start position
-        matches = sorted(matches, key=lambda m: m["start"])
+        matches = sorted(matches.values(), key=lambda m: m["start"])
         stitched = []
         current_match = matches[0]
 
         for i in range(1, len(matches)):
             next_match = matches[i]
-            # Get the intervening text between current and next match
-            intervening_text = text[current_match["end"]:next_match["start"]]
-
-            # Check for newline in the intervening text or non-contiguity
-            if "\n" in intervening_text or current_match["end"] < next_match["start"]:
+            # Any text between the two, a newline included, keeps them apart
+            if current_match["end"] < next_match["start"]:
                 # Add the current match as a separate entity
                 stitched.append(current_match)
                 current_match = next_match
             else:
                 # Extend the current match to include the next match
-                current_match["value"] += intervening_text + next_match["value"]
+                current_match["value"] += next_match["value"]
                 current_match["end"] = next_match["end"]
 
         # Add the final match
@@ -322,11 +659,12 @@ Short: fe80::
 Dual: 2001:db8::192.168.1.1
 Invalid: 123::abc::456
 """
-if len(sys.argv) > 1:
-    file = sys.argv[1]
-    with open(file, 'r') as fh:
-        content = fh.read()
-
-# Extract and stitch matches
-pii_data = extract_pii(content)
-print(json.dumps(pii_data, indent=4))
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        file = sys.argv[1]
+        with open(file, 'r') as fh:
+            content = fh.read()
+
+    # Extract and stitch matches
+    pii_data = extract_pii(content)
+    print(json.dumps(pii_data, indent=4))
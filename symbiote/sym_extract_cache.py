@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#
+# sym_extract_cache.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+def file_sha256(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+class ExtractCache:
+    """
+    On disk cache of converter output (pdf, docx, excel, OCR) keyed by the
+    sha256 of the file plus the converter name and version.
+
+    Each file's (device, inode, size, mtime) is remembered with its hash, so
+    an unchanged file is looked up without hashing it again.  Entries are
+    evicted least recently used first once the cached text exceeds
+    max_bytes.  Hits and misses are counted per converter across sessions.
+    """
+    def __init__(self, db_path, max_bytes=1 << 30):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, device INTEGER, inode INTEGER,
+                size INTEGER, mtime_ns INTEGER, sha256 TEXT)""")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS entries (
+                sha256 TEXT, converter TEXT, version INTEGER, content TEXT,
+                size INTEGER, accessed REAL, PRIMARY KEY (sha256, converter, version))""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS stats (
+                converter TEXT PRIMARY KEY, hits INTEGER, misses INTEGER)""")
+        self.connection.commit()
+
+    def file_hash(self, file_path):
+        ''' sha256 of file_path, only hashed when its stat changed since the last lookup '''
+        stat = os.stat(file_path)
+        sha256 = self.known_hash(file_path, stat)
+        if sha256 is None:
+            sha256 = file_sha256(file_path)
+            self.remember(file_path, sha256, stat)
+        return sha256
+
+    def known_hash(self, file_path, stat=None):
+        ''' The remembered sha256 of file_path if its stat is unchanged, else None '''
+        stat = stat or os.stat(file_path)
+        signature = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            row = self.connection.execute(
+                    "SELECT device, inode, size, mtime_ns, sha256 FROM files WHERE path = ?",
+                    (file_path,)
+                ).fetchone()
+        if row is not None and tuple(row[:4]) == signature:
+            return row[4]
+        return None
+
+    def remember(self, file_path, sha256, stat=None):
+        ''' Record a hash computed elsewhere, e.g. by a FileScan '''
+        stat = stat or os.stat(file_path)
+        with self._lock:
+            self.connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    (file_path, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, sha256)
+                )
+            self.connection.commit()
+
+    def get(self, sha256, converter, version):
+        with self._lock:
+            row = self.connection.execute(
+                    "SELECT content FROM entries WHERE sha256 = ? AND converter = ? AND version = ?",
+                    (sha256, converter, version)
+                ).fetchone()
+            if row is not None:
+                self.connection.execute(
+                        "UPDATE entries SET accessed = ? WHERE sha256 = ? AND converter = ? AND version = ?",
+                        (time.time(), sha256, converter, version)
+                    )
+            self._count(converter, hit=row is not None)
+            self.connection.commit()
+
+        return None if row is None else row[0]
+
+    def put(self, sha256, converter, version, content):
+        size = len(content.encode("utf-8", "surrogatepass"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self.connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    (sha256, converter, version, content, size, time.time())
+                )
+            self._evict()
+            self.connection.commit()
+
+    def _count(self, converter, hit):
+        self.connection.execute(
+                "INSERT INTO stats VALUES (?, ?, ?) ON CONFLICT(converter) DO UPDATE "
+                "SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (converter, int(hit), int(not hit))
+            )
+
+    def _evict(self):
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.connection.execute("SELECT rowid, size FROM entries ORDER BY accessed").fetchall()
+        evict = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            evict.append((rowid,))
+            total -= size
+
+        self.connection.executemany("DELETE FROM entries WHERE rowid = ?", evict)
+
+    def convert(self, file_path, converter, version, func, sha256=None):
+        ''' Cached func(file_path), results of None are not cached '''
+        if sha256 is None:
+            sha256 = self.file_hash(file_path)
+        else:
+            self.remember(file_path, sha256)
+
+        content = self.get(sha256, converter, version)
+        if content is not None:
+            return content
+
+        content = func(file_path)
+        if content is not None:
+            self.put(sha256, converter, version, content)
+
+        return content
+
+    def stats(self):
+        ''' Per converter hits, misses and hit rate, plus the cache size '''
+        with self._lock:
+            rows = self.connection.execute("SELECT converter, hits, misses FROM stats ORDER BY converter").fetchall()
+            entries, size = self.connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+
+        converters = {}
+        for converter, hits, misses in rows:
+            total = hits + misses
+            converters[converter] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / total if total else 0.0,
+                }
+
+        return {"entries": entries, "size": size, "max_bytes": self.max_bytes, "converters": converters}
+
+    def clear(self):
+        with self._lock:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("DELETE FROM stats")
+            self.connection.commit()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+extract_cache = None
+
+def set_extract_cache(cache):
+    global extract_cache
+    extract_cache = cache
+    return cache
+
+def get_extract_cache():
+    ''' The cache configured by the session, None when caching is off '''
+    return extract_cache
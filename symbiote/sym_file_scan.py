@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+#
+# sym_file_scan.py
+
+import os
+import re
+import mmap
+import codecs
+import hashlib
+from datetime import datetime
+
+import magic
+
+from symbiote.sym_lazy import lazy_import
+
+np = lazy_import("numpy")
+
+url_pattern = re.compile(rb'https?://[^\s]+')
+
+whitespace = b" \t\n\r\f\v"
+
+def is_text_mime(mime_type):
+    return mime_type.startswith('text/') or mime_type in ['application/json', 'application/xml', 'application/x-yaml', 'text/markdown']
+
+def runs(flags):
+    ''' (starts, ends) of the runs of True in a boolean array '''
+    edges = np.diff(flags.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def printable_mask(data):
+    array = np.frombuffer(data, dtype=np.uint8)
+    return (array >= 0x20) & (array <= 0x7e), array
+
+class Extractor:
+    """
+    Finds matches in a file window by window.  A match that may continue
+    past the end of a window is carried into the next one, up to max_carry
+    bytes, so window boundaries do not split matches.  At most limit matches
+    are kept, total counts all of them.
+    """
+    def __init__(self, limit=10000, max_carry=1 << 20):
+        self.limit = limit
+        self.max_carry = max_carry
+        self.carry = b""
+        self.matches = []
+        self.total = 0
+
+    def spans(self, data, final):
+        ''' (starts, ends, consumed) for the complete matches in data '''
+        raise NotImplementedError
+
+    def decode(self, data):
+        return data.decode('ascii')
+
+    def feed(self, window):
+        data = self.carry + window if self.carry else window
+        starts, ends, consumed = self.spans(data, final=False)
+        if len(data) - consumed > self.max_carry:
+            starts, ends, consumed = self.spans(data, final=True)
+        self._record(data, starts, ends)
+        self.carry = data[consumed:]
+
+    def finish(self):
+        if self.carry:
+            starts, ends, consumed = self.spans(self.carry, final=True)
+            self._record(self.carry, starts, ends)
+            self.carry = b""
+        return self.matches
+
+    def _record(self, data, starts, ends):
+        self.total += len(starts)
+        room = self.limit - len(self.matches)
+        if room > 0:
+            spans = zip(starts[:room].tolist(), ends[:room].tolist())
+            self.matches.extend(self.decode(data[start:end]) for start, end in spans)
+
+class AsciiStrings(Extractor):
+    ''' Runs of at least min_length printable ASCII bytes '''
+    def __init__(self, min_length=4, **kwargs):
+        super().__init__(**kwargs)
+        self.min_length = min_length
+
+    def spans(self, data, final):
+        mask, array = printable_mask(data)
+        starts, ends = runs(mask)
+        consumed = len(data)
+        if not final and len(ends) and ends[-1] == len(data):
+            consumed = int(starts[-1])
+            starts, ends = starts[:-1], ends[:-1]
+
+        keep = ends - starts >= self.min_length
+        return starts[keep], ends[keep], consumed
+
+class WideStrings(Extractor):
+    ''' Runs of at least min_length UTF-16LE printable ASCII characters, at either byte alignment '''
+    def __init__(self, min_length=4, **kwargs):
+        super().__init__(**kwargs)
+        self.min_length = min_length
+
+    def decode(self, data):
+        return data.decode('utf-16-le')
+
+    def spans(self, data, final):
+        mask, array = printable_mask(data)
+        # pairs[i]: a printable byte at i followed by a zero byte
+        pairs = mask[:-1] & (array[1:] == 0)
+        consumed = len(data)
+        if not final and len(data) and mask[-1]:
+            consumed = len(data) - 1
+
+        found = []
+        for parity in (0, 1):
+            starts, ends = runs(pairs[parity::2])
+            starts = parity + 2 * starts
+            ends = parity + 2 * ends
+            if not final and len(ends) and ends[-1] >= len(data) - 1:
+                consumed = min(consumed, int(starts[-1]))
+                starts, ends = starts[:-1], ends[:-1]
+
+            keep = ends - starts >= 2 * self.min_length
+            found.append((starts[keep], ends[keep]))
+
+        # A pair at one alignment never overlaps a pair at the other
+        starts = np.concatenate([found[0][0], found[1][0]])
+        ends = np.concatenate([found[0][1], found[1][1]])
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
+        keep = ends <= consumed
+        return starts[keep], ends[keep], consumed
+
+class Urls(Extractor):
+    ''' http(s) URLs, each kept once '''
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.seen = {}
+
+    def decode(self, data):
+        return data.decode('utf-8', errors='ignore')
+
+    def spans(self, data, final):
+        consumed = len(data)
+        if not final:
+            # A URL may continue past the last whitespace
+            consumed = max(data.rfind(char) for char in whitespace) + 1
+
+        spans = [match.span() for match in url_pattern.finditer(data, 0, consumed)]
+        return [start for start, end in spans], [end for start, end in spans], consumed
+
+    def feed(self, window):
+        # Past the limit there is nothing left to collect
+        if len(self.seen) < self.limit:
+            super().feed(window)
+
+    def _record(self, data, starts, ends):
+        self.total += len(starts)
+        for start, end in zip(starts, ends):
+            if len(self.seen) >= self.limit:
+                break
+            self.seen.setdefault(self.decode(data[start:end]), None)
+        self.matches = list(self.seen)
+
+class FileScan:
+    """
+    Single pass analysis of one file.
+
+    The file is mapped once and read window by window.  Every window feeds
+    the hashes, the byte histogram for entropy, the string and URL
+    extractors and, for text files, an incremental utf-8 decoder, so the
+    file is read once and at most one window plus the extractor carries
+    are held in memory.  The MIME type comes from the first window, which
+    covers what libmagic reads of a file.
+
+    The histogram and string runs are computed with numpy over each window.
+    At most max_strings strings and max_urls URLs are kept, the string
+    count covers all of them.
+    """
+    def __init__(self, file_path, window=8 << 20, text=True, max_strings=10000, max_urls=1000):
+        self.file_path = file_path
+        self.window = window
+        self.text = text
+        self.max_strings = max_strings
+        self.max_urls = max_urls
+
+        self.mime_type = None
+        self.content = None
+        self.hashes = {}
+        self.entropy = 0.0
+        self.magic_numbers = ""
+        self.readable_strings = []
+        self.readable_strings_count = 0
+        self.embedded_urls = []
+
+    def run(self):
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5()
+        counts = np.zeros(256, dtype=np.int64)
+        strings = AsciiStrings(limit=self.max_strings)
+        wide_strings = WideStrings(limit=self.max_strings)
+        urls = Urls(limit=self.max_urls)
+        decoder = None
+        pieces = []
+
+        with open(self.file_path, 'rb') as file:
+            self.stat = os.fstat(file.fileno())
+            size = self.stat.st_size
+
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            try:
+                for position in range(0, max(size, 1), self.window):
+                    window = data[position:position + self.window]
+                    if position == 0:
+                        self.mime_type = magic.from_buffer(window, mime=True)
+                        self.magic_numbers = window[:4].hex()
+                        if self.text and is_text_mime(self.mime_type):
+                            decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
+                    sha256.update(window)
+                    md5.update(window)
+                    counts += np.bincount(np.frombuffer(window, dtype=np.uint8), minlength=256)
+                    strings.feed(window)
+                    wide_strings.feed(window)
+                    urls.feed(window)
+                    if decoder is not None:
+                        pieces.append(decoder.decode(window))
+            finally:
+                if size:
+                    data.close()
+
+        self.hashes = {"sha256": sha256.hexdigest(), "md5": md5.hexdigest()}
+        self.entropy = self.calculate_entropy(counts, size)
+        self.readable_strings = strings.finish()[:self.max_strings]
+        self.readable_strings.extend(wide_strings.finish()[:self.max_strings - len(self.readable_strings)])
+        self.readable_strings_count = strings.total + wide_strings.total
+        self.embedded_urls = urls.finish()
+        if decoder is not None:
+            pieces.append(decoder.decode(b"", final=True))
+            self.content = "".join(pieces)
+
+        return self
+
+    @staticmethod
+    def calculate_entropy(counts, length):
+        """Calculate Shannon entropy to assess randomness in the file."""
+        if not length:
+            return 0.0
+        probabilities = counts[counts > 0] / length
+        return float(-(probabilities * np.log2(probabilities)).sum())
+
+    def metadata(self):
+        ''' The file_info dictionary extract_metadata reports '''
+        return {
+            **stat_metadata(self.file_path, self.stat),
+            "mime_type": str(self.mime_type),
+            "hashes": dict(self.hashes),
+            "readable_strings": self.readable_strings,
+            "readable_strings_count": self.readable_strings_count,
+            "magic_numbers": self.magic_numbers,
+            "embedded_urls": self.embedded_urls,
+            "entropy": self.entropy,
+            "exif": {},
+        }
+
+def stat_metadata(file_path, stat):
+    ''' The fields of FileScan.metadata that come from the file's stat '''
+    return {
+        "file_path": str(file_path),
+        "file_size": str(stat.st_size),
+        "creation_time": str(datetime.fromtimestamp(stat.st_ctime)),
+        "modification_time": str(datetime.fromtimestamp(stat.st_mtime)),
+        "permissions": oct(stat.st_mode & 0o777),
+    }
+
+def scan_file(file_path, window=8 << 20, text=True):
+    return FileScan(file_path, window=window, text=text).run()
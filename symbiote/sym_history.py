@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+# sym_history.py
+
+import threading
+
+from symbiote.sym_tokenizer import CharTokenizer, TokenCounter
+
+class ConversationHistory:
+    """
+    Conversation messages with a token count kept per message and a running
+    total, so budget checks never re-tokenize the history.
+
+    Counts come from a TokenCounter; the total is the sum of the message
+    counts plus the counter's per request reply overhead.  Changes hold
+    lock, background jobs append from their own threads.
+    """
+    def __init__(self, counter=None, messages=None):
+        self.lock = threading.RLock()
+        self.counter = counter or TokenCounter(CharTokenizer())
+        self.messages = []
+        self.tokens = []
+        self.message_tokens = 0
+
+        for message in messages or []:
+            self.append(message)
+
+    def estimate(self, message):
+        return self.counter.count_message(message)
+
+    @property
+    def total_tokens(self):
+        return self.message_tokens + self.counter.per_reply
+
+    def use_counter(self, counter):
+        ''' Switch tokenizers, recounting the history once if it changed '''
+        with self.lock:
+            if counter is self.counter:
+                return
+
+            self.counter = counter
+            self.tokens = [self.estimate(message) for message in self.messages]
+            self.message_tokens = sum(self.tokens)
+
+    def append(self, message):
+        count = self.estimate(message)
+        with self.lock:
+            self.messages.append(message)
+            self.tokens.append(count)
+            self.message_tokens += count
+
+    def pop(self, index=-1):
+        with self.lock:
+            message = self.messages.pop(index)
+            self.message_tokens -= self.tokens.pop(index)
+            return message
+
+    def remove_role(self, role):
+        ''' Drop every message with the given role in one pass '''
+        with self.lock:
+            kept = [(message, count) for message, count in zip(self.messages, self.tokens)
+                    if message['role'] != role]
+            self.messages = [message for message, _ in kept]
+            self.tokens = [count for _, count in kept]
+            self.message_tokens = sum(self.tokens)
+
+    def trim(self, max_tokens):
+        ''' Evict the oldest messages until the total fits max_tokens '''
+        with self.lock:
+            total = self.total_tokens
+            drop = 0
+            while drop < len(self.messages) and total > max_tokens:
+                total -= self.tokens[drop]
+                drop += 1
+
+            if drop:
+                evicted = self.tokens[:drop]
+                del self.messages[:drop]
+                del self.tokens[:drop]
+                self.message_tokens -= sum(evicted)
+
+            return drop
+
+    def clear(self):
+        with self.lock:
+            self.messages = []
+            self.tokens = []
+            self.message_tokens = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
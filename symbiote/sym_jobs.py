@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+#
+# sym_jobs.py
+
+import time
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+_local = threading.local()
+
+def current_job():
+    ''' The Job running on this thread, or None outside a job '''
+    return getattr(_local, "job", None)
+
+class Job:
+    def __init__(self, job_id, name, memory_key=None):
+        self.id = job_id
+        self.name = name
+        self.memory_key = memory_key
+        self.status = "queued"
+        self.progress = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        ''' Cancel a queued job outright, ask a running one to stop '''
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+            self.finished = time.time()
+        elif self.status == "running":
+            self.status = "cancelling"
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def update(self, progress):
+        self.progress = progress
+
+    def elapsed(self):
+        start = self.started or self.submitted
+        end = self.finished or time.time()
+        return end - start
+
+class ForegroundOnly:
+    '''
+    Wraps something that draws on the terminal, e.g. a spinner, so its
+    methods do nothing when called from a job, where they would draw over
+    the prompt.
+    '''
+    def __init__(self, wrapped):
+        self.wrapped = wrapped
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if callable(attr) and current_job() is not None:
+            return lambda *args, **kwargs: None
+        return attr
+
+class JobManager:
+    """
+    Bounded worker pool for commands that run in the background.
+
+    Each submission becomes a Job with an id, status and progress text.
+    Work running inside a job can find it with current_job() to report
+    progress and check for cancellation.  A finished job's result is
+    handed to on_result, which the session uses to store it in memory.
+    """
+    def __init__(self, max_workers=4, on_result=None):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="symbiote-job")
+        self.on_result = on_result
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, *args, memory_key=None, **kwargs):
+        with self._lock:
+            job_id = next(self._ids)
+            job = Job(job_id, name, memory_key=memory_key or f"job_{job_id}")
+            self.jobs[job_id] = job
+
+        job.future = self.pool.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled():
+            job.status = "cancelled"
+            return None
+
+        _local.job = job
+        job.status = "running"
+        job.started = time.time()
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = "cancelled" if job.cancelled() else "done"
+        except Exception as e:
+            job.error = e
+            job.status = "failed"
+            log(f"Job {job.id} {job.name} failed: {e}")
+        finally:
+            job.finished = time.time()
+            _local.job = None
+
+        if job.status == "done" and self.on_result is not None:
+            try:
+                self.on_result(job)
+            except Exception as e:
+                log(f"Job {job.id} {job.name} result not stored: {e}")
+
+        return job.result
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        job.cancel()
+        return job
+
+    def running(self):
+        return [job for job in self.jobs.values() if job.status in ("queued", "running", "cancelling")]
+
+    def wait(self, job, timeout=None):
+        try:
+            return job.future.result(timeout=timeout)
+        except CancelledError:
+            return None
+
+    def shutdown(self):
+        for job in self.running():
+            job.cancel()
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+# sym_lazy.py
+
+import sys
+import time
+import types
+import builtins
+import importlib
+import threading
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is only imported the first time one of its
+    attributes is accessed.  Keeps heavy, command specific dependencies off
+    the startup path.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self._lazy_module = None
+
+    def _load(self):
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(self.__name__)
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name):
+    ''' Return the module if it is already imported, otherwise a LazyModule for it '''
+    if name in sys.modules:
+        return sys.modules[name]
+
+    return LazyModule(name)
+
+class ImportProfiler:
+    """
+    Times every module imported while active by wrapping builtins.__import__.
+    Cumulative time includes nested imports, self time excludes them.
+    """
+    def __init__(self):
+        self.timings = {}
+        self.started = None
+        self.stopped = None
+        self._stack = []
+        self._original_import = None
+        self._thread = None
+
+    def start(self):
+        self._original_import = builtins.__import__
+        self._thread = threading.get_ident()
+        self.started = time.perf_counter()
+        builtins.__import__ = self._import
+        return self
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        self.stopped = time.perf_counter()
+        return self
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        # Only time first time absolute imports on the thread that started us.
+        if (level != 0 or name in sys.modules
+                or threading.get_ident() != self._thread):
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            cumulative, self_time = self.timings.get(name, (0.0, 0.0))
+            self.timings[name] = (cumulative + elapsed, self_time + elapsed - nested)
+
+    def total(self):
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+        return end - self.started
+
+    def report(self, top=25):
+        from rich.table import Table
+        table = Table(title=f"Startup import profile ({self.total():.3f}s to prompt)")
+        table.add_column("Module", style="gold1", no_wrap=True)
+        table.add_column("Cumulative (ms)", justify="right")
+        table.add_column("Self (ms)", justify="right")
+
+        ranked = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (cumulative, self_time) in ranked[:top]:
+            table.add_row(name, f"{cumulative * 1000:.1f}", f"{self_time * 1000:.1f}")
+
+        return table
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+#
+# sym_local_index.py
+
+import os
+import re
+import json
+import gzip
+import math
+import heapq
+import threading
+from functools import lru_cache
+
+from symbiote.sym_lazy import lazy_import
+
+nltk_stem = lazy_import("nltk.stem")
+
+word_pattern = re.compile(r"\w+")
+query_pattern = re.compile(r'([+-]?)(?:"([^"]*)"|(\S+))')
+
+# Lucene's default English stop words, the ones Elasticsearch's english analyzer drops
+stop_words = frozenset((
+        "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "into",
+        "is", "it", "no", "not", "of", "on", "or", "such", "that", "the", "their", "then",
+        "there", "these", "they", "this", "to", "was", "will", "with",
+    ))
+
+stemmer = None
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    global stemmer
+    if stemmer is None:
+        stemmer = nltk_stem.PorterStemmer()
+    return stemmer.stem(word)
+
+def analyze(text):
+    '''
+    (position, term) of the index terms of text: lowercase words, stop
+    words dropped, Porter stemmed.  Positions count the dropped words too,
+    so a phrase matches only with as many words between its terms.
+    '''
+    return [(position, stem(word)) for position, word in enumerate(word_pattern.findall(text.lower()))
+            if word not in stop_words]
+
+def flatten(source, prefix=""):
+    '''
+    Dotted field names to lists of leaf values, the shape of the "fields"
+    of an Elasticsearch hit.
+    '''
+    fields = {}
+    if isinstance(source, dict):
+        for key, value in source.items():
+            for name, values in flatten(value, f"{prefix}{key}.").items():
+                fields.setdefault(name, []).extend(values)
+    elif isinstance(source, (list, tuple)):
+        for item in source:
+            for name, values in flatten(item, prefix).items():
+                fields.setdefault(name, []).extend(values)
+    elif source is not None and source != "":
+        fields[prefix[:-1]] = [source]
+    return fields
+
+def document_text(source):
+    ''' The searchable text of a document, all of its string values '''
+    return " ".join(str(value) for values in flatten(source).values() for value in values if isinstance(value, str))
+
+class Segment:
+    """
+    An immutable batch of documents with its own postings.  Documents are
+    numbered from zero within the segment; postings map each term to
+    parallel lists of document numbers and the term's positions in each.
+    """
+    def __init__(self, name, docs, postings, deleted=()):
+        self.name = name
+        # [doc_id, paths, length, source] per document number
+        self.docs = docs
+        self.postings = postings
+        self.deleted = set(deleted)
+        self.length = sum(doc[2] for doc in docs)
+
+    @classmethod
+    def build(cls, name, documents):
+        ''' A segment from (doc_id, paths, source, terms) tuples, terms as analyze returns them '''
+        docs = []
+        postings = {}
+        for doc_id, paths, source, terms in documents:
+            number = len(docs)
+            docs.append([doc_id, paths, len(terms), source])
+            positions = {}
+            for position, term in terms:
+                positions.setdefault(term, []).append(position)
+            for term, term_positions in positions.items():
+                numbers, all_positions = postings.setdefault(term, ([], []))
+                numbers.append(number)
+                all_positions.append(term_positions)
+        return cls(name, docs, postings)
+
+    @classmethod
+    def load(cls, directory, name, deleted=()):
+        with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(name, data["docs"], data["postings"], deleted)
+
+    def save(self, directory):
+        path = os.path.join(directory, self.name)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8", compresslevel=1) as file:
+            json.dump({"docs": self.docs, "postings": self.postings}, file, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def live(self):
+        for number, doc in enumerate(self.docs):
+            if number not in self.deleted:
+                yield number, doc
+
+    def live_count(self):
+        return len(self.docs) - len(self.deleted)
+
+    def live_length(self, deleted):
+        return self.length - sum(self.docs[number][2] for number in deleted)
+
+class LocalIndex:
+    """
+    In-process full-text index stored under one directory, an alternative
+    to Elasticsearch for index:: and search_index.
+
+    Documents are keyed by the sha256 of their file, files with the same
+    content share one document listing all of their paths.  Adds are
+    buffered in memory and written by commit() as a new immutable segment;
+    a delete marks the document in its segment, so an update is a delete
+    plus an add.  manifest.json lists the live segments and their deletions and is
+    replaced atomically on every commit, so a crash leaves the last
+    committed state.  Once there are more than merge_factor segments the
+    smallest ones are merged into one, dropping deleted documents.
+
+    Queries are ranked with BM25 over all of a document's string values,
+    a quoted phrase counting as one term found where its terms are at the
+    same positions relative to each other.  Segments are held in memory
+    once opened, so a search only walks the postings of its terms.
+    """
+    def __init__(self, directory, merge_factor=8, k1=1.2, b=0.75):
+        self.directory = directory
+        self.merge_factor = merge_factor
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.segments = []
+        self.generation = 0
+        # doc_id -> source of documents not yet committed
+        self.buffer = {}
+        # doc_id -> (segment, number) of committed documents
+        self.locations = {}
+        # path -> doc_id and doc_id -> set of paths of all documents
+        self.paths = {}
+        self.doc_paths = {}
+
+        os.makedirs(directory, exist_ok=True)
+        manifest = os.path.join(directory, "manifest.json")
+        if os.path.exists(manifest):
+            with open(manifest) as file:
+                data = json.load(file)
+            self.generation = data["generation"]
+            for entry in data["segments"]:
+                self.segments.append(Segment.load(directory, entry["name"], entry["deleted"]))
+
+        for segment in self.segments:
+            self._locate(segment)
+
+    def _locate(self, segment):
+        for number, (doc_id, paths, length, source) in segment.live():
+            self.locations[doc_id] = (segment, number)
+            self.doc_paths[doc_id] = set(paths)
+            for path in paths:
+                self.paths[path] = doc_id
+
+    def __len__(self):
+        with self._lock:
+            return len(self.locations) + sum(1 for doc_id in self.buffer if doc_id not in self.locations)
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            return doc_id in self.locations or doc_id in self.buffer
+
+    def source(self, doc_id):
+        ''' The stored source of doc_id, None when it is not indexed '''
+        with self._lock:
+            if doc_id in self.buffer:
+                return self.buffer[doc_id]
+            location = self.locations.get(doc_id)
+            return None if location is None else location[0].docs[location[1]][3]
+
+    def add(self, doc_id, source, path=None):
+        '''
+        Add or replace the document doc_id, path joins its paths.  A path
+        previously added under another id leaves that document, it was an
+        older version of the file.
+        '''
+        with self._lock:
+            paths = self.doc_paths.setdefault(doc_id, set())
+            if path:
+                self._unlink(path, keep=doc_id)
+                self.paths[path] = doc_id
+                paths.add(path)
+            self.buffer[doc_id] = source
+
+    def _unlink(self, path, keep=None):
+        ''' Take path off its document unless that is keep, deleting a document left without paths '''
+        doc_id = self.paths.get(path)
+        if doc_id is None or doc_id == keep:
+            return
+
+        del self.paths[path]
+        paths = self.doc_paths.get(doc_id, set())
+        paths.discard(path)
+        if paths:
+            # Written again with the paths it has left on the next commit
+            self.buffer.setdefault(doc_id, self.source(doc_id))
+        else:
+            self.delete(doc_id)
+
+    def delete(self, doc_id):
+        with self._lock:
+            buffered = doc_id in self.buffer
+            self.buffer.pop(doc_id, None)
+            location = self.locations.pop(doc_id, None)
+            if location is not None:
+                segment, number = location
+                segment.deleted.add(number)
+
+            for path in self.doc_paths.pop(doc_id, ()):
+                if self.paths.get(path) == doc_id:
+                    del self.paths[path]
+
+            return location is not None or buffered
+
+    def prune(self, root, keep):
+        ''' Drop the paths under root that are not in keep, and documents left without paths '''
+        root = os.path.join(root, "")
+        keep = set(keep)
+        with self._lock:
+            stale = [path for path in self.paths if path.startswith(root) and path not in keep]
+            for path in stale:
+                self._unlink(path)
+        return len(stale)
+
+    def commit(self):
+        ''' Write buffered documents as a segment and record deletions '''
+        with self._lock:
+            if self.buffer:
+                documents = []
+                for doc_id, source in self.buffer.items():
+                    replaced = self.locations.get(doc_id)
+                    if replaced is not None:
+                        replaced[0].deleted.add(replaced[1])
+                    paths = sorted(self.doc_paths.get(doc_id, ()))
+                    documents.append((doc_id, paths, source, analyze(document_text(source))))
+
+                segment = self._new_segment(documents)
+                self.segments.append(segment)
+                self._locate(segment)
+                self.buffer = {}
+
+            self._merge(force=False)
+            self._save_manifest()
+
+    def optimize(self):
+        ''' Merge every segment into one '''
+        with self._lock:
+            self.commit()
+            self._merge(force=True)
+            self._save_manifest()
+
+    def _new_segment(self, documents):
+        self.generation += 1
+        segment = Segment.build(f"segment_{self.generation}.json.gz", documents)
+        segment.save(self.directory)
+        return segment
+
+    def _merge(self, force):
+        empty = [segment for segment in self.segments if not segment.live_count()]
+        if empty:
+            self.segments = [segment for segment in self.segments if segment.live_count()]
+
+        if force:
+            selected = self.segments if len(self.segments) > 1 else []
+        elif len(self.segments) > self.merge_factor:
+            selected = sorted(self.segments, key=Segment.live_count)[:self.merge_factor]
+        else:
+            selected = []
+
+        if not selected:
+            return
+
+        # Postings are rebuilt from the stored sources
+        documents = []
+        for segment in selected:
+            for number, (doc_id, paths, length, source) in segment.live():
+                documents.append((doc_id, paths, source, analyze(document_text(source))))
+
+        merged = self._new_segment(documents)
+        self.segments = [segment for segment in self.segments if segment not in selected]
+        self.segments.append(merged)
+        self._locate(merged)
+
+    def _save_manifest(self):
+        manifest = os.path.join(self.directory, "manifest.json")
+        data = {
+                "generation": self.generation,
+                "segments": [{"name": segment.name, "deleted": sorted(segment.deleted)} for segment in self.segments],
+            }
+        with open(manifest + ".tmp", "w") as file:
+            json.dump(data, file)
+        os.replace(manifest + ".tmp", manifest)
+
+        # Segments a merge replaced are no longer referenced
+        names = {segment.name for segment in self.segments}
+        for name in os.listdir(self.directory):
+            if name.startswith("segment_") and name.endswith(".json.gz") and name not in names:
+                os.remove(os.path.join(self.directory, name))
+
+    def parse_query(self, query):
+        '''
+        (should, must, must_not) clause lists of a query.  A clause is a
+        tuple of (offset, term): one term for each word, all the terms of a
+        "quoted phrase" with their offsets from its first.  Clauses are
+        optional, +clause is required and -clause or NOT clause excluded;
+        AND and OR are accepted and ignored.
+        '''
+        should, must, must_not = [], [], []
+        negate = False
+        for sign, phrase, word in query_pattern.findall(query):
+            text = phrase if phrase else word
+            if not phrase and text in ("AND", "OR", "&&", "||"):
+                continue
+            if not phrase and text == "NOT":
+                negate = True
+                continue
+
+            terms = analyze(text)
+            if phrase and terms:
+                first = terms[0][0]
+                clauses = [tuple((position - first, term) for position, term in terms)]
+            else:
+                clauses = [((0, term),) for position, term in terms]
+
+            if negate or sign == "-":
+                must_not.extend(clauses)
+            elif sign == "+":
+                must.extend(clauses)
+            else:
+                should.extend(clauses)
+            negate = False
+
+        return should, must, must_not
+
+    @staticmethod
+    def _matches(segments, clause):
+        ''' [(segment, number, frequency)] of the live documents where clause is found '''
+        (first, term), rest = clause[0], clause[1:]
+        matches = []
+        for segment, deleted in segments:
+            numbers, positions = segment.postings.get(term, ((), ()))
+            if not rest:
+                matches.extend((segment, number, len(found))
+                               for number, found in zip(numbers, positions) if number not in deleted)
+                continue
+
+            # Positions of the other terms by document, shifted to where the phrase starts
+            others = []
+            for offset, other in rest:
+                other_numbers, other_positions = segment.postings.get(other, ((), ()))
+                others.append((offset - first, dict(zip(other_numbers, other_positions))))
+
+            for number, found in zip(numbers, positions):
+                if number in deleted:
+                    continue
+                starts = set(found)
+                for shift, by_number in others:
+                    starts.intersection_update(position - shift for position in by_number.get(number, ()))
+                    if not starts:
+                        break
+                if starts:
+                    matches.append((segment, number, len(starts)))
+        return matches
+
+    def _score(self, query):
+        ''' ([(score, (segment, number))] of the documents matching query, segments by id) '''
+        should, must, must_not = self.parse_query(query)
+        with self._lock:
+            segments = [(segment, set(segment.deleted)) for segment in self.segments]
+
+        total_docs = sum(len(segment.docs) - len(deleted) for segment, deleted in segments)
+        total_length = sum(segment.live_length(deleted) for segment, deleted in segments)
+        average = total_length / total_docs if total_docs else 0.0
+
+        scores = {}
+        required = {}
+        must = set(must)
+        for clause in set(should) | must:
+            matches = self._matches(segments, clause)
+            if not matches:
+                continue
+
+            idf = math.log(1 + (total_docs - len(matches) + 0.5) / (len(matches) + 0.5))
+            for segment, number, count in matches:
+                length = segment.docs[number][2]
+                norm = self.k1 * (1 - self.b + self.b * length / average) if average else self.k1
+                key = (id(segment), number)
+                scores[key] = scores.get(key, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+                if clause in must:
+                    required.setdefault(key, set()).add(clause)
+
+        excluded = set()
+        for clause in set(must_not):
+            excluded.update((id(segment), number) for segment, number, count in self._matches(segments, clause))
+
+        matched = [(score, key) for key, score in scores.items()
+                   if key not in excluded and (not must or required.get(key, set()) >= must)]
+        return matched, {id(segment): segment for segment, deleted in segments}
+
+    @staticmethod
+    def _hit(segment, number, score, fields=None):
+        ''' One hit shaped like Elasticsearch's, only the named fields when fields is given '''
+        doc_id, paths, length, source = segment.docs[number]
+        values = flatten(source)
+        if fields is not None:
+            values = {name: values[name] for name in fields if name in values}
+            return {"_id": doc_id, "_score": score, "fields": values}
+        return {"_id": doc_id, "_score": score, "_source": source, "fields": values}
+
+    def search(self, query, size=10, offset=0, fields=None):
+        '''
+        Documents matching query ranked by BM25, as a dictionary shaped like
+        an Elasticsearch response so display_documents reads either.
+        '''
+        matched, segments = self._score(query)
+        ranked = heapq.nlargest(offset + size, matched)
+        hits = [self._hit(segments[segment_id], number, score, fields)
+                for score, (segment_id, number) in ranked[offset:offset + size]]
+
+        return {
+                "hits": {
+                    "total": {"value": len(matched), "relation": "eq"},
+                    "max_score": ranked[0][0] if ranked else None,
+                    "hits": hits,
+                }
+            }
+
+    def iter_search(self, query, fields=None, page_size=500):
+        '''
+        Yield every hit for query, best first.  Documents are scored once
+        and hits are built a page at a time as they are consumed.
+        '''
+        matched, segments = self._score(query)
+
+        # The first page is often all that is read, the rest is only sorted when it is not
+        for score, (segment_id, number) in heapq.nlargest(page_size, matched):
+            yield self._hit(segments[segment_id], number, score, fields)
+
+        if len(matched) > page_size:
+            matched.sort(reverse=True)
+            for score, (segment_id, number) in matched[page_size:]:
+                yield self._hit(segments[segment_id], number, score, fields)
+
+    def stats(self):
+        with self._lock:
+            return {
+                    "documents": len(self.locations),
+                    "buffered": len(self.buffer),
+                    "segments": len(self.segments),
+                    "deleted": sum(len(segment.deleted) for segment in self.segments),
+                }
+
+local_indices = {}
+local_indices_lock = threading.Lock()
+
+def open_local_index(directory):
+    ''' The LocalIndex for directory, opened once per process '''
+    directory = os.path.abspath(os.path.expanduser(directory))
+    with local_indices_lock:
+        index = local_indices.get(directory)
+        if index is None:
+            index = local_indices[directory] = LocalIndex(directory)
+        return index
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+#
+# sym_memory_index.py
+
+import re
+
+from symbiote.sym_blob_store import is_blob
+
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+word_pattern = re.compile(r"\w+")
+
+def check_parent(value):
+    if value == "MemoryStorage":
+        value = "."
+
+    if value.startswith("MemoryStorage."):
+        value = value[len("MemoryStorage."):]
+
+    return value
+
+def walk(data, path="MemoryStorage", blobs=None):
+    '''
+    Yield every searchable leaf under data as (key, value, type, parent,
+    is_key): dictionary key names and string values, in traversal order.
+    Blob references are yielded as BlobViews when a BlobStore is given.
+    '''
+    if isinstance(data, dict):
+        for key, value in data.items():
+            current_path = f"{path}.{key}"
+            yield (check_parent(current_path), key, type(data).__name__, check_parent(path), True)
+
+            if blobs is not None and is_blob(value):
+                yield (check_parent(current_path), blobs.view(value), "str", check_parent(path), False)
+            elif isinstance(value, (dict, list, set, tuple)):
+                yield from walk(value, current_path, blobs)
+            elif isinstance(value, str):
+                yield (check_parent(current_path), value, type(value).__name__, check_parent(path), False)
+
+    elif isinstance(data, (list, tuple)):
+        for index, item in enumerate(data):
+            current_path = f"{path}[{index}]"
+            if blobs is not None and is_blob(item):
+                yield (check_parent(current_path), blobs.view(item), "str", check_parent(path), False)
+            elif isinstance(item, (dict, list, set, tuple)):
+                yield from walk(item, current_path, blobs)
+            elif isinstance(item, str):
+                yield (check_parent(current_path), item, type(item).__name__, check_parent(path), False)
+
+    elif isinstance(data, set):
+        for item in data:
+            if isinstance(item, str):
+                yield (check_parent(path), item, type(item).__name__, check_parent(path), False)
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def regex_literals(pattern):
+    '''
+    Literal word fragments a regex requires, as one list per top level
+    alternative, or None when some alternative requires nothing we can
+    look up.  Fragments are lowercase, so they also prefilter IGNORECASE.
+    '''
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+
+    items = list(parsed)
+    if len(items) == 1 and items[0][0] == sre_constants.BRANCH:
+        branches = items[0][1][1]
+    else:
+        branches = [items]
+
+    alternatives = []
+    for branch in branches:
+        fragments = []
+        run = []
+        for op, arg in list(branch) + [(None, None)]:
+            if op == sre_constants.LITERAL:
+                run.append(chr(arg))
+                continue
+
+            fragments.extend(word_pattern.findall("".join(run).lower()))
+            run = []
+
+        if not fragments:
+            return None
+
+        alternatives.append(fragments)
+
+    return alternatives
+
+class MemoryIndex:
+    """
+    Inverted index over the searchable leaves of a SymMemoryStore.
+
+    The index is built on the first search and after that leaves are
+    re-indexed per top level key when that key changes.  Each leaf's lowercase words are posted to a word index,
+    and a trigram index over the word vocabulary finds the words that
+    contain a query fragment.  A query only has to verify the leaves that
+    contain every one of its word fragments.
+    """
+    def __init__(self, blobs=None):
+        self.blobs = blobs
+        self.groups = {}
+        self.leaves = {}
+        self.postings = {}
+        self.vocabulary = {}
+        self.next_id = 0
+        self.ready = False
+
+    def rebuild(self, storage):
+        self.invalidate()
+        for key in storage:
+            self.refresh(storage, key)
+        self.ready = True
+
+    def invalidate(self):
+        ''' Drop the index, it is rebuilt by the next search '''
+        self.groups = {}
+        self.leaves = {}
+        self.postings = {}
+        self.vocabulary = {}
+        self.ready = False
+
+    def refresh(self, storage, key):
+        ''' Re-index the leaves under one top level key '''
+        for leaf_id in self.groups.get(key, []):
+            self._remove(leaf_id)
+
+        if key not in storage:
+            self.groups.pop(key, None)
+            return
+
+        leaf_ids = []
+        for leaf in walk({key: storage[key]}, blobs=self.blobs):
+            leaf_id = self.next_id
+            self.next_id += 1
+            self.leaves[leaf_id] = leaf
+            leaf_ids.append(leaf_id)
+            for word in set(word_pattern.findall(str(leaf[1]).lower())):
+                posting = self.postings.get(word)
+                if posting is None:
+                    posting = self.postings[word] = set()
+                    for trigram in trigrams(word):
+                        self.vocabulary.setdefault(trigram, set()).add(word)
+                posting.add(leaf_id)
+
+        # Assigning keeps an existing key's place, matching the store's order
+        self.groups[key] = leaf_ids
+
+    def _remove(self, leaf_id):
+        leaf = self.leaves.pop(leaf_id)
+        for word in set(word_pattern.findall(str(leaf[1]).lower())):
+            posting = self.postings.get(word)
+            if posting is None:
+                continue
+
+            posting.discard(leaf_id)
+            if not posting:
+                del self.postings[word]
+                for trigram in trigrams(word):
+                    words = self.vocabulary.get(trigram)
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del self.vocabulary[trigram]
+
+    def _words_containing(self, fragment):
+        if len(fragment) < 3:
+            return [word for word in self.postings if fragment in word]
+
+        candidates = None
+        for trigram in trigrams(fragment):
+            words = self.vocabulary.get(trigram)
+            if not words:
+                return []
+            candidates = set(words) if candidates is None else candidates & words
+
+        return [word for word in candidates if fragment in word]
+
+    def _leaves_containing(self, fragment):
+        found = set()
+        for word in self._words_containing(fragment):
+            found |= self.postings[word]
+        return found
+
+    def _leaves_for(self, fragments):
+        candidates = None
+        for fragment in sorted(set(fragments), key=len, reverse=True):
+            found = self._leaves_containing(fragment)
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                break
+        return candidates
+
+    def candidates(self, query):
+        '''
+        Leaves that may match query, in traversal order.  A plain string is
+        a case insensitive substring query, a compiled pattern a regex.
+        '''
+        if isinstance(query, re.Pattern):
+            alternatives = regex_literals(query)
+        else:
+            fragments = word_pattern.findall(query.lower())
+            alternatives = [fragments] if fragments else None
+
+        if alternatives is None:
+            selected = None
+        else:
+            selected = set()
+            for fragments in alternatives:
+                selected |= self._leaves_for(fragments)
+
+        for leaf_ids in self.groups.values():
+            for leaf_id in leaf_ids:
+                if selected is None or leaf_id in selected:
+                    yield self.leaves[leaf_id]
@@ -10,58 +10,301 @@ log = console.log
 import json
 import re
 import os
+import sqlite3
+import atexit
+import threading
+
+from symbiote.sym_memory_index import MemoryIndex
+from symbiote.sym_blob_store import BlobStore, BlobView, is_blob, materialize
+
+# Marks a WAL snapshot, which records the last log sequence number it covers.
+snapshot_version = 1
+
+class MemoryWal:
+    """
+    Write-ahead log persistence for SymMemoryStore.
+
+    Each change is appended as one json line to save_path + ".wal" instead of
+    rewriting the whole store.  load() replays the log over the last
+    snapshot at save_path.  A background thread compacts the log into a new
+    snapshot once it grows past compact_bytes: the live log is rotated to
+    ".wal.old" under the store lock, the snapshot is written outside it, then
+    the old log is removed.  Entries carry a sequence number and the snapshot
+    records the last one it covers, so a crash at any point replays cleanly.
+    """
+    def __init__(self, save_path, compact_interval=30, compact_bytes=4 * 1024 * 1024):
+        self.save_path = save_path
+        self.wal_path = f"{save_path}.wal"
+        self.old_path = f"{save_path}.wal.old"
+        self.compact_interval = compact_interval
+        self.compact_bytes = compact_bytes
+        self.seq = 0
+        self.store = None
+        self._file = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def load(self):
+        data = {}
+        self.seq = 0
+        if os.path.exists(self.save_path):
+            with open(self.save_path, 'r') as file:
+                snapshot = json.load(file)
+            if isinstance(snapshot, dict) and snapshot.get("symbiote_memory") == snapshot_version:
+                data = snapshot["data"]
+                self.seq = snapshot["seq"]
+            else:
+                data = snapshot
+
+        entries = []
+        for wal_path in (self.old_path, self.wal_path):
+            if not os.path.exists(wal_path):
+                continue
+
+            with open(wal_path, 'r') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of the log
+                        log(f"Skipping damaged memory log entry in {wal_path}")
+                        continue
+                    if entry["seq"] > self.seq:
+                        entries.append(entry)
+
+        if entries:
+            self.seq = entries[-1]["seq"]
+
+        return data, entries
+
+    def start(self, store):
+        self.store = store
+        self._file = open(self.wal_path, 'a')
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._compactor, daemon=True)
+            self._thread.start()
+
+    def append(self, entry):
+        self.seq += 1
+        entry["seq"] = self.seq
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def _compactor(self):
+        while not self._stop.wait(self.compact_interval):
+            try:
+                if os.path.getsize(self.wal_path) >= self.compact_bytes:
+                    self.compact()
+            except Exception as e:
+                log(f"Error compacting memory log: {e}")
+
+    def compact(self):
+        with self.store.lock:
+            if not self._file.tell() and not os.path.exists(self.old_path):
+                return True
+
+            snapshot = json.dumps({
+                    "symbiote_memory": snapshot_version,
+                    "seq": self.seq,
+                    "data": self.store.MemoryStorage,
+                }, indent=4)
+
+            self._file.close()
+            if os.path.exists(self.old_path):
+                # A previous compaction did not finish, keep its entries too
+                with open(self.wal_path, 'r') as wal, open(self.old_path, 'a') as old:
+                    old.write(wal.read())
+                os.remove(self.wal_path)
+            else:
+                os.replace(self.wal_path, self.old_path)
+            self._file = open(self.wal_path, 'a')
+
+        tmp_path = f"{self.save_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.save_path)
+        os.remove(self.old_path)
+        self.store.collect_blobs()
+
+        return True
+
+    def close(self):
+        self._stop.set()
+        if self._file is not None and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+class MemorySqlite:
+    """
+    SQLite persistence for SymMemoryStore.  Each top level key is one row,
+    so a change only rewrites the entry it touched.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.store = None
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS memory (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.commit()
+
+    def load(self):
+        rows = self.connection.execute("SELECT key, value FROM memory")
+        return {key: json.loads(value) for key, value in rows}, []
+
+    def start(self, store):
+        self.store = store
+
+    def append(self, entry):
+        if entry["op"] == "clear":
+            self.connection.execute("DELETE FROM memory")
+        else:
+            key = self.store._parse_path(entry["path"])[0]
+            if key in self.store.MemoryStorage:
+                self.connection.execute(
+                        "INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)",
+                        (key, json.dumps(self.store.MemoryStorage[key]))
+                    )
+            else:
+                self.connection.execute("DELETE FROM memory WHERE key = ?", (key,))
+
+        self.connection.commit()
+
+    def compact(self):
+        with self.store.lock:
+            self.connection.execute("DELETE FROM memory")
+            self.connection.executemany(
+                    "INSERT INTO memory (key, value) VALUES (?, ?)",
+                    ((key, json.dumps(value)) for key, value in self.store.MemoryStorage.items())
+                )
+            self.connection.commit()
+
+        self.store.collect_blobs()
+        return True
+
+    def close(self):
+        self.connection.commit()
 
 class SymMemoryStore:
-    def __init__(self, save_path=None):
+    def __init__(self, save_path=None, backend="wal", blob_threshold=65536, compress=True):
         self.MemoryStorage = {}
         self.save_path = save_path
-        if self.save_path and os.path.exists(self.save_path):
-            self.load()
+        self.lock = threading.RLock()
+        self.persistence = None
+        self.blobs = None
 
-    def create(self, path, value):
-        parent, key = self._get_nested_data(path, create_missing=True, create_new=True)
-        if key in parent:
-            log(f"Overwriting '{path}'.")
+        # Large strings live in a content addressed blob directory and the
+        # tree only holds references to them.
+        if self.save_path and blob_threshold:
+            self.blobs = BlobStore(f"{self.save_path}.blobs", threshold=blob_threshold, compress=compress)
 
-        parent[key] = value
-        self.save()
+        self.index = MemoryIndex(blobs=self.blobs)
 
-    def read(self, path=None):
+        if self.save_path:
+            if backend == "sqlite":
+                self.persistence = MemorySqlite(f"{os.path.splitext(self.save_path)[0]}.db")
+            else:
+                self.persistence = MemoryWal(self.save_path)
+            self.load()
+            self.persistence.start(self)
+            atexit.register(self.persistence.close)
+
+    def create(self, path, value):
+        with self.lock:
+            value = self._externalize(value)
+            self._apply({"op": "create", "path": path, "value": value})
+            self._record({"op": "create", "path": path, "value": value})
+
+    def read(self, path=None, materialized=False):
+        '''
+        Values stored as blobs come back as lazily read BlobViews, or as
+        plain strings when materialized is set.
+        '''
         if path is None or path == "":
             log(f"Empty path requested")
             return None 
 
         try:
             parent, key = self._get_nested_data(path)
-            return parent[key]
+            value = parent[key]
+            if self.blobs is not None:
+                value = self.blobs.resolve(value)
+            return materialize(value) if materialized else value
         except (KeyError, IndexError) as e:
             log(f"Error reading '{path}': {e}")
             return None
 
     def update(self, path, value):
-        try:
-            parent, key = self._get_nested_data(path)
-            if key not in parent:
-                log(f"Key '{path}' does not exist.")
-                return None
-            parent[key] = value
-            self.save()
-        except (KeyError, IndexError) as e:
-            log(f"Error updating '{path}': {e}")
+        with self.lock:
+            try:
+                parent, key = self._get_nested_data(path)
+                if key not in parent:
+                    log(f"Key '{path}' does not exist.")
+                    return None
+                value = self._externalize(value)
+                self._apply({"op": "update", "path": path, "value": value})
+                self._record({"op": "update", "path": path, "value": value})
+            except (KeyError, IndexError) as e:
+                log(f"Error updating '{path}': {e}")
 
     def delete(self, path):
-        try:
-            parent, key = self._get_nested_data(path)
+        with self.lock:
+            try:
+                self._apply({"op": "delete", "path": path})
+                self._record({"op": "delete", "path": path})
+                return True
+            except (KeyError, IndexError, ValueError) as e:
+                log(f"Error deleting '{path}': {e}")
+                return False
+
+    def _apply(self, entry, replay=False):
+        op = entry["op"]
+        if op == "clear":
+            self.MemoryStorage.clear()
+            if self.index.ready and not replay:
+                self.index.rebuild(self.MemoryStorage)
+            return
+
+        if op == "delete":
+            parent, key = self._get_nested_data(entry["path"])
             if isinstance(parent, list):
                 index = int(key[1:-1])
                 parent.pop(index)
             else:
                 del parent[key]
-            self.save()
-            return True
-        except (KeyError, IndexError, ValueError) as e:
-            log(f"Error deleting '{path}': {e}")
-            return False
+        else:
+            create = op == "create"
+            parent, key = self._get_nested_data(entry["path"], create_missing=create, create_new=create)
+            if create and key in parent and not replay:
+                log(f"Overwriting '{entry['path']}'.")
+            parent[key] = entry["value"]
+
+        if self.index.ready and not replay:
+            self.index.refresh(self.MemoryStorage, self._parse_path(entry["path"])[0])
+
+    def _externalize(self, value):
+        if self.blobs is None:
+            return value
+        return self.blobs.externalize(value)
+
+    def collect_blobs(self):
+        ''' Remove blobs nothing in the store refers to any more '''
+        if self.blobs is None:
+            return 0
+
+        with self.lock:
+            return self.blobs.collect(self.MemoryStorage)
+
+    def _record(self, entry):
+        if self.persistence is None:
+            return
+
+        try:
+            self.persistence.append(entry)
+        except Exception as e:
+            log(f"Error saving data: {e}")
 
     def _get_nested_data(self, path, create_missing=False, create_new=False):
         keys = self._parse_path(path)
@@ -91,85 +334,32 @@ class SymMemoryStore:
     def _parse_path(self, path):
         return re.findall(r"\w+|\[\d+\]", path)
 
-        results = []
-        query = re.compile(query)
-        is_regex = isinstance(query, re.Pattern)
-
-        # Start the recursive search at the top level of the store
-        self._recursive_search(self.MemoryStorage, query, results, path="MemoryStorage", parent=None, is_regex=is_regex)
-        return results
-
     def search(self, query, n=50, x=50):
         results = []
         is_regex = isinstance(query, re.Pattern)
 
-        # Start the recursive search at the top level of the store
-        self._recursive_search(self.MemoryStorage, query, results, path="MemoryStorage", parent=None, is_regex=is_regex, n=n, x=x)
-        return results
+        # The index narrows the leaves to those holding every word of the query
+        with self.lock:
+            if not self.index.ready:
+                self.index.rebuild(self.MemoryStorage)
+            candidates = list(self.index.candidates(query))
 
-    def _check_parent(self, value):
-        if value == "MemoryStorage":
-            value = "."
+        for key, value, value_type, parent, is_key in candidates:
+            if isinstance(value, BlobView):
+                value = value.text()
 
-        if value.startswith("MemoryStorage."):
-            value = re.sub(r"^MemoryStorage\.", '', value)
+            if not self._matches(query, value, is_regex):
+                continue
 
-        return value
+            results.append({
+                "key": key,
+                "value": value,
+                "type": value_type,
+                "parent": parent,
+                "snippets": [] if is_key else self._extract_snippets(value, query, is_regex, n, x)
+            })
 
-    def _recursive_search(self, data, query, results, path, parent, is_regex=False, n=0, x=0):
-        if isinstance(data, dict):
-            for key, value in data.items():
-                current_path = f"{path}.{key}"
-                
-                if self._matches(query, key, is_regex):
-                    results.append({
-                        "key": self._check_parent(current_path),
-                        "value": key,
-                        "type": type(data).__name__,
-                        "parent": self._check_parent(path),
-                        "snippets": []  # No snippets for dictionary keys, just the key name
-                    })
-
-                if isinstance(value, (dict, list, set, tuple)):
-                    self._recursive_search(value, query, results, current_path, path, is_regex, n, x)
-                elif isinstance(value, str) and self._matches(query, value, is_regex):
-                    snippets = self._extract_snippets(value, query, is_regex, n, x)
-                    results.append({
-                        "key": self._check_parent(current_path),
-                        "value": value,  # Full content of the matching value
-                        "type": type(value).__name__,
-                        "parent": self._check_parent(path),
-                        "snippets": snippets  # List of snippets with context
-                    })
-
-        elif isinstance(data, (list, tuple)):
-            for index, item in enumerate(data):
-                current_path = f"{path}[{index}]"
-                
-                if isinstance(item, (dict, list, set, tuple)):
-                    self._recursive_search(item, query, results, current_path, path, is_regex, n, x)
-                elif isinstance(item, str) and self._matches(query, item, is_regex):
-                    snippets = self._extract_snippets(item, query, is_regex, n, x)
-                    results.append({
-                        "key": self._check_parent(current_path),
-                        "value": item,  # Full content of the matching value
-                        "type": type(item).__name__,
-                        "parent": self._check_parent(path),
-                        "snippets": snippets  # List of snippets with context
-                    })
-
-        elif isinstance(data, set):
-            for item in data:
-                current_path = f"{path}"
-                if isinstance(item, str) and self._matches(query, item, is_regex):
-                    snippets = self._extract_snippets(item, query, is_regex, n, x)
-                    results.append({
-                        "key": self._check_parent(current_path),
-                        "value": item,  # Full content of the matching value
-                        "type": type(item).__name__,
-                        "parent": self._check_parent(path),
-                        "snippets": snippets  # List of snippets with context
-                    })
+        return results
 
     def _extract_snippets(self, text, query, is_regex, n, x):
         snippets = []
@@ -211,6 +401,9 @@ class SymMemoryStore:
             return None
 
     def _generate_structure_template(self, data):
+        if is_blob(data):
+            return "str"
+
         if isinstance(data, dict):
             # For dictionaries, create a template of keys and types
             template = {}
@@ -243,29 +436,38 @@ class SymMemoryStore:
             return type(data).__name__
 
     def clear(self):
-        self.MemoryStorage.clear()
-        self.save()
+        with self.lock:
+            self._apply({"op": "clear"})
+            self._record({"op": "clear"})
 
     def save(self):
-        if self.save_path:
+        ''' Fold the change log into a full snapshot '''
+        if self.persistence is not None:
             try:
-                with open(self.save_path, 'w') as file:
-                    json.dump(self.MemoryStorage, file, indent=4)
-                return True
+                return self.persistence.compact()
             except Exception as e:
                 log(f"Error saving data: {e}")
                 return False
 
     def load(self):
-        if self.save_path:
-            try:
-                with open(self.save_path, 'r') as file:
-                    self.MemoryStorage = json.load(file)
-                return True
-            except Exception as e:
-                log(f"Error loading data: {e}")
-                self.MemoryStorage = {}
-                return False
+        if self.persistence is not None:
+            with self.lock:
+                try:
+                    self.MemoryStorage, entries = self.persistence.load()
+                except Exception as e:
+                    log(f"Error loading data: {e}")
+                    self.MemoryStorage = {}
+                    return False
+
+                for entry in entries:
+                    try:
+                        self._apply(entry, replay=True)
+                    except (KeyError, IndexError, ValueError, TypeError) as e:
+                        log(f"Error replaying memory log entry {entry.get('seq')}: {e}")
+
+                self.index.invalidate()
+
+            return True
 
 if __name__ == "__main__":
     memory = SymMemoryStore(save_path="/tmp/test.json")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+#
+# sym_models.py
+
+import os
+import json
+import time
+import threading
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+# Models that are always offered even when no provider can be reached.
+default_models = [
+        "groq:llama-3.1-70b-versatile",
+        "groq:mixtral-8x7b-32768",
+    ]
+
+ollama_host = 'http://localhost:11434'
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(provider):
+    ''' Return a shared client for the given provider, constructing it on first use '''
+    with _clients_lock:
+        if provider in _clients:
+            return _clients[provider]
+
+        if provider == "ollama":
+            from ollama import Client
+            client = Client(host=ollama_host)
+        elif provider == "openai":
+            import openai
+            client = openai.OpenAI()
+        elif provider == "groq":
+            from groq import Groq
+            client = Groq()
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+
+        _clients[provider] = client
+        return client
+
+class ModelCatalog:
+    """
+    Lazily built, disk cached list of available models.
+
+    Nothing is fetched from the providers until the list is first requested.
+    A cached list on disk is served immediately; when it is older than the
+    ttl a background thread refreshes it from the providers.
+    """
+    def __init__(self, cache_file, ttl=86400):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.updated = 0
+        self._models = None
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+
+    def models(self, refresh=False):
+        if self._models is None:
+            self._load()
+
+        if self._models is None or refresh:
+            # Nothing cached yet, this is the one time we wait on the providers.
+            self.refresh()
+        elif self.is_stale():
+            self.refresh_async()
+
+        return list(self._models)
+
+    def is_stale(self):
+        return (time.time() - self.updated) > self.ttl
+
+    def refresh_async(self):
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return self._refresh_thread
+
+        self._refresh_thread = threading.Thread(target=self.refresh, daemon=True)
+        self._refresh_thread.start()
+
+        return self._refresh_thread
+
+    def refresh(self):
+        models = list(default_models)
+        models.extend(self._fetch_ollama())
+        models.extend(self._fetch_openai())
+
+        with self._lock:
+            self._models = models
+            self.updated = time.time()
+            self._save()
+
+        return models
+
+    def _fetch_ollama(self):
+        found = []
+        try:
+            model_obj = get_client("ollama").list()
+            for mod in model_obj['models']:
+                found.append("ollama:" + mod.model)
+        except Exception as e:
+            log(f"Failed to load ollama models: {e}")
+
+        return found
+
+    def _fetch_openai(self):
+        found = []
+        try:
+            response = get_client("openai").models.list()
+            for model in response:
+                found.append("openai:" + model.id)
+        except Exception as e:
+            log(f"Failed to load openai models: {e}")
+
+        return found
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "r") as file:
+                data = json.load(file)
+            self._models = data['models']
+            self.updated = data.get('updated', 0)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log(f"Error reading model cache: {e}")
+
+        return self._models
+
+    def _save(self):
+        tmp_file = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_file, "w") as file:
+                json.dump({"updated": self.updated, "models": self._models}, file, indent=4)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            log(f"Error writing model cache: {e}")
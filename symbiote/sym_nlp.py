@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+#
+# sym_nlp.py
+
+import threading
+
+from symbiote.sym_lazy import lazy_import
+
+spacy = lazy_import("spacy")
+sumy_tokenizers = lazy_import("sumy.nlp.tokenizers")
+sumy_lsa = lazy_import("sumy.summarizers.lsa")
+
+# Pipes analyze_text has no use for, only entities are read from the doc
+unused_pipes = ("parser", "tagger", "attribute_ruler", "lemmatizer", "morphologizer", "senter")
+
+class ModelRegistry:
+    """
+    Process wide cache of loaded NLP models.  Each model is loaded once, on
+    first use, by the loader registered for its name; concurrent first
+    uses wait for the same load.
+    """
+    def __init__(self):
+        self.loaders = {}
+        self.models = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def get(self, name):
+        model = self.models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            lock = self._loading.setdefault(name, threading.Lock())
+
+        with lock:
+            if name not in self.models:
+                self.models[name] = self.loaders[name]()
+
+        return self.models[name]
+
+    def loaded(self):
+        return list(self.models)
+
+    def unload(self, name=None):
+        ''' Drop one model, or all of them, the next use loads it again '''
+        with self._lock:
+            if name is None:
+                self.models.clear()
+            else:
+                self.models.pop(name, None)
+
+def load_spacy(name="en_core_web_sm"):
+    nlp = spacy.load(name)
+    nlp.select_pipes(disable=[pipe for pipe in unused_pipes if pipe in nlp.pipe_names])
+    return nlp
+
+def load_sentiment():
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+def load_summarizer():
+    from spacy.lang.en.stop_words import STOP_WORDS
+    summarizer = sumy_lsa.LsaSummarizer()
+    summarizer.stop_words = list(STOP_WORDS)
+    return summarizer
+
+registry = ModelRegistry()
+registry.register("spacy", load_spacy)
+registry.register("sentiment", load_sentiment)
+registry.register("summarizer", load_summarizer)
+registry.register("sumy_tokenizer", lambda: sumy_tokenizers.Tokenizer("english"))
+
+def get_model(name):
+    return registry.get(name)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+#
+# sym_pii_stream.py
+
+import os
+import re
+import sys
+import json
+import bisect
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+from symbiote.sym_extract import PATTERNS, get_pattern_set, sanitize, stitch_matches
+from symbiote.sym_workers import map_ordered
+
+# Runs of characters sanitize may change: two or more spaces, newlines or
+# other characters outside visible ASCII, or a single unprintable one
+CHANGEABLE = re.compile(r"[^\x21-\x7e]{2,}|[^\x20-\x7e\n]")
+NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+def open_source(source):
+    ''' (binary file, close) for a path, "-" for stdin or an open binary file '''
+    if source == "-":
+        return sys.stdin.buffer, False
+    if isinstance(source, (str, os.PathLike)):
+        return open(os.path.expanduser(source), "rb"), True
+    return source, False
+
+def iter_chunks(source, chunk_size=1 << 20, overlap=4096):
+    '''
+    Yield (offset, data, start, end) for consecutive chunks of a file or
+    stdin, read chunk_size bytes at a time.  offset is where data begins in
+    the stream and data[start:end] is the part of it the chunk stands for;
+    the chunks' parts cover the stream once.
+
+    Chunks end after a newline, so text matched within lines is matched
+    the same as in the whole stream.  A line longer than chunk_size is cut
+    anyway, and the chunks on either side of the cut share overlap bytes,
+    enough for matches up to that long.  Only one chunk is held at a time.
+    '''
+    if chunk_size <= 2 * overlap:
+        raise ValueError(f"chunk_size must be more than twice the overlap, {chunk_size} <= 2 * {overlap}")
+
+    handle, close = open_source(source)
+    buffer = bytearray()
+    offset = 0
+    start = 0
+    try:
+        while True:
+            block = handle.read(chunk_size - len(buffer))
+            buffer += block
+            if not block:
+                if len(buffer) > start:
+                    yield offset, bytes(buffer), start, len(buffer)
+                return
+            if len(buffer) < chunk_size:
+                continue
+
+            cut = buffer.rfind(b"\n", start) + 1
+            if cut > start:
+                yield offset, bytes(buffer[:cut]), start, cut
+                del buffer[:cut]
+                offset += cut
+                start = 0
+                continue
+
+            # No newline, the chunk ends overlap bytes early and the next
+            # begins overlap bytes before that, both at character boundaries
+            end = char_boundary(buffer, len(buffer) - overlap)
+            yield offset, bytes(buffer), start, end
+            keep = char_boundary(buffer, end - overlap)
+            del buffer[:keep]
+            offset += keep
+            start = end - keep
+    finally:
+        if close:
+            handle.close()
+
+def char_boundary(data, position):
+    ''' position, moved back to the start of the UTF-8 character it is in '''
+    while position > 0 and data[position] & 0xC0 == 0x80:
+        position -= 1
+    return position
+
+def decode_chunk(data):
+    ''' data as text, bytes that are not UTF-8 become lone surrogates '''
+    return data.decode("utf-8", "surrogateescape")
+
+class OffsetMap:
+    """
+    Maps positions in sanitize(text) back to byte offsets in the UTF-8
+    encoding of text.  sanitize only removes characters, from runs that
+    CHANGEABLE finds, so positions are shifted by the runs before them.
+    """
+    def __init__(self, text):
+        pieces = []
+        # (clean start, clean end, text start, run) of each changed run
+        self.runs = []
+        self.clean_starts = []
+        position = 0
+        clean_length = 0
+        for match in CHANGEABLE.finditer(text):
+            run = match.group()
+            cleaned = sanitize(run)
+            if cleaned == run:
+                continue
+            pieces.append(text[position:match.start()])
+            clean_start = clean_length + match.start() - position
+            pieces.append(cleaned)
+            clean_length = clean_start + len(cleaned)
+            position = match.end()
+            self.runs.append((clean_start, clean_length, match.start(), run))
+            self.clean_starts.append(clean_start)
+        pieces.append(text[position:])
+        self.text = "".join(pieces)
+
+        # Characters before which the encoding has more bytes than characters
+        self.wide = []
+        self.extra = []
+        if not text.isascii():
+            extra = 0
+            for match in NON_ASCII.finditer(text):
+                extra += len(match.group().encode("utf-8", "surrogateescape")) - 1
+                self.wide.append(match.start() + 1)
+                self.extra.append(extra)
+
+    def byte_offset(self, position):
+        ''' Byte offset in the encoded text of position in the sanitized text '''
+        run = bisect.bisect_right(self.clean_starts, position) - 1
+        if run >= 0:
+            clean_start, clean_end, start, text = self.runs[run]
+            if position >= clean_end:
+                position = start + len(text) + position - clean_end
+            else:
+                position = start + kept_characters(text)[position - clean_start]
+
+        wide = bisect.bisect_right(self.wide, position) - 1
+        return position + (self.extra[wide] if wide >= 0 else 0)
+
+def kept_characters(run):
+    ''' Indices of the characters of run that sanitize keeps, in order '''
+    kept = [index for index, char in enumerate(run) if char.isprintable() or char == "\n"]
+    for squeezed in ("\n", " "):
+        kept = [index for n, index in enumerate(kept)
+                if not (run[index] == squeezed and n and run[kept[n - 1]] == squeezed)]
+    return kept
+
+def scan_chunk(chunk, patterns=PATTERNS):
+    '''
+    (pattern index, label, value, start, end) for every match in the part
+    of the chunk it stands for, ordered by start; start and end are byte
+    offsets in the stream.  The text is sanitized as extract_and_stitch_matches
+    does before matching.
+    '''
+    offset, data, start, end = chunk
+    offsets = OffsetMap(decode_chunk(data))
+    results = []
+    for index, label, value, match_start, match_end in get_pattern_set(patterns).scan(offsets.text):
+        match_start = offsets.byte_offset(match_start)
+        if start <= match_start < end:
+            results.append((index, label, value, offset + match_start, offset + offsets.byte_offset(match_end)))
+    results.sort(key=lambda result: (result[3], result[0]))
+    return results
+
+def iter_scans(source, patterns=PATTERNS, workers=1, chunk_size=1 << 20, overlap=4096):
+    ''' The results of scan_chunk for each chunk of source, in order '''
+    pattern_set = get_pattern_set(patterns)
+    if pattern_set.errors:
+        raise ValueError(f"Invalid patterns: {pattern_set.errors}")
+
+    # Workers compile the pattern list they are sent once each
+    patterns = [compiled.pattern for compiled in pattern_set.patterns]
+    yield from map_ordered(scan_chunk, iter_chunks(source, chunk_size, overlap), workers, patterns)
+
+def iter_pii(source, patterns=PATTERNS, workers=1, chunk_size=1 << 20, overlap=4096):
+    '''
+    Yield (label, value, start, end) for every match in a file or stdin
+    ("-") as it is read, start and end being byte offsets.  Every
+    occurrence is yielded, in stream order, and memory use does not grow
+    with the size of the input.  See iter_chunks for chunk_size and
+    overlap, sym_workers.map_ordered for workers.
+    '''
+    for results in iter_scans(source, patterns, workers, chunk_size, overlap):
+        for index, label, value, start, end in results:
+            yield label, value, start, end
+
+def extract_pii_stream(source, patterns=PATTERNS, workers=1, chunk_size=1 << 20, overlap=4096):
+    '''
+    extract_and_stitch_matches over a file or stdin ("-") read in chunks.
+    The result is the same as for the whole text, the first occurrence
+    of each value being that of the earliest pattern, then the earliest
+    offset.  Memory grows with the number of distinct values only.
+    '''
+    # label -> {value: (pattern index, match)}
+    firsts = {}
+    for results in iter_scans(source, patterns, workers, chunk_size, overlap):
+        for index, label, value, start, end in results:
+            matches = firsts.setdefault(label, {})
+            first = matches.get(value)
+            if first is None or (index, start) < (first[0], first[1]["start"]):
+                matches[value] = (index, {"value": value, "start": start, "end": end})
+
+    matches_by_label = {label: {value: match for value, (index, match) in matches.items()}
+                        for label, matches in firsts.items()}
+    return stitch_matches(matches_by_label)
+
+def main():
+    '''
+    usage: sym_pii_stream.py [path|-] [workers]
+    Prints one JSON object per match, with byte offsets, as the input is read.
+    '''
+    source = sys.argv[1] if len(sys.argv) > 1 else "-"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    output = sys.stdout
+    try:
+        for label, value, start, end in iter_pii(source, workers=workers):
+            output.write(json.dumps({"label": label, "value": value, "start": start, "end": end}) + "\n")
+    except BrokenPipeError:
+        # The reader stopped early, e.g. head, drop what is still buffered
+        os.dup2(os.open(os.devnull, os.O_WRONLY), output.fileno())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+#
+# sym_providers.py
+
+import time
+import signal
+import asyncio
+import threading
+import contextlib
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+from symbiote.sym_models import ollama_host
+
+class ProviderError(Exception):
+    pass
+
+def split_model(model):
+    ''' Split a model setting like ollama:llama3.1:8b into (provider, model) '''
+    provider, _, name = model.partition(":")
+    return provider, name
+
+class StreamStats:
+    """ Timing for one streamed response: time to first token and tokens/sec. """
+    def __init__(self, provider, model, counter=None):
+        self.provider = provider
+        self.model = model
+        self.counter = counter
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+        self.attempts = 0
+        self.text = []
+
+    def chunk(self, text):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.chunks += 1
+        self.text.append(text)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def ttft(self):
+        if self.first_token is None:
+            return None
+        return self.first_token - self.started
+
+    @property
+    def tokens(self):
+        if self.counter is None:
+            return self.chunks
+        return self.counter.count("".join(self.text))
+
+    @property
+    def tokens_per_sec(self):
+        if self.first_token is None or self.finished is None:
+            return None
+
+        elapsed = self.finished - self.first_token
+        if elapsed <= 0:
+            return None
+
+        return self.tokens / elapsed
+
+    def summary(self):
+        ttft = f"{self.ttft * 1000:.0f}ms" if self.ttft is not None else "-"
+        rate = f"{self.tokens_per_sec:.1f}" if self.tokens_per_sec is not None else "-"
+        return f"{self.provider}:{self.model} ttft {ttft}, {self.tokens} tokens, {rate} tokens/sec"
+
+async def _single(text):
+    yield text
+
+class ProviderBackend:
+    """
+    Async streaming chat completion for one provider.
+
+    stream() is an async generator of text chunks shared by every backend.
+    Opening the request and waiting for each chunk are bounded by timeout,
+    and a request that fails before its first chunk is retried with
+    exponential backoff.  Once text has been yielded a failure is raised
+    rather than retried so callers never see duplicated output.  Cancelling
+    the consuming task closes the underlying stream.
+    """
+    name = None
+
+    def __init__(self, timeout=120, retries=2, backoff=0.5):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.create_client()
+        return self._client
+
+    def create_client(self):
+        raise NotImplementedError
+
+    async def open(self, model, messages, streaming, options):
+        ''' Start the request, returning an async iterator of text chunks '''
+        raise NotImplementedError
+
+    async def stream(self, model, messages, streaming=True, options=None, stats=None):
+        stats = stats or StreamStats(self.name, model)
+        options = options or {}
+
+        attempt = 0
+        while True:
+            attempt += 1
+            stats.attempts = attempt
+            chunks = None
+            try:
+                chunks = await asyncio.wait_for(self.open(model, messages, streaming, options), self.timeout)
+                iterator = chunks.__aiter__()
+                while True:
+                    try:
+                        text = await asyncio.wait_for(iterator.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+
+                    if text:
+                        stats.chunk(text)
+                        yield text
+
+                stats.finish()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if stats.chunks or attempt > self.retries:
+                    stats.finish()
+                    raise ProviderError(f"{self.name}:{model} {type(e).__name__}: {e}") from e
+
+                log(f"{self.name} request failed ({type(e).__name__} {e}), retry {attempt} of {self.retries}")
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            finally:
+                close = getattr(chunks, "aclose", None) or getattr(chunks, "close", None)
+                if close is not None:
+                    try:
+                        result = close()
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception:
+                        pass
+
+    async def complete(self, model, messages, options=None, stats=None):
+        chunks = []
+        async for text in self.stream(model, messages, streaming=False, options=options, stats=stats):
+            chunks.append(text)
+        return "".join(chunks)
+
+class OpenAIBackend(ProviderBackend):
+    name = "openai"
+
+    def create_client(self):
+        import openai
+        return openai.AsyncOpenAI()
+
+    async def open(self, model, messages, streaming, options):
+        response = await self.client.chat.completions.create(
+                model = model,
+                messages = messages,
+                stream = streaming,
+                )
+
+        if not streaming:
+            return _single(response.choices[0].message.content)
+
+        return self._deltas(response)
+
+    async def _deltas(self, response):
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await response.close()
+
+class GroqBackend(OpenAIBackend):
+    name = "groq"
+
+    def create_client(self):
+        from groq import AsyncGroq
+        return AsyncGroq()
+
+class OllamaBackend(ProviderBackend):
+    name = "ollama"
+
+    def create_client(self):
+        from ollama import AsyncClient
+        return AsyncClient(host=ollama_host)
+
+    async def open(self, model, messages, streaming, options):
+        response = await self.client.chat(
+                model = model,
+                messages = messages,
+                stream = streaming,
+                options = options,
+                )
+
+        if not streaming:
+            return _single(response['message']['content'])
+
+        return self._content(response)
+
+    async def _content(self, response):
+        try:
+            async for chunk in response:
+                yield chunk['message']['content']
+        finally:
+            await response.aclose()
+
+backends = {
+        "openai": OpenAIBackend,
+        "ollama": OllamaBackend,
+        "groq": GroqBackend,
+    }
+
+_backends = {}
+
+def get_backend(provider):
+    ''' Return the shared backend for a provider prefix '''
+    if provider not in backends:
+        raise ValueError(f"Unknown provider: {provider}")
+
+    if provider not in _backends:
+        _backends[provider] = backends[provider]()
+
+    return _backends[provider]
+
+class AsyncRunner:
+    """
+    One event loop on a daemon thread that every caller submits coroutines
+    to.  The console, the API server and batch jobs share it, so concurrent
+    requests are tasks on one loop rather than a thread each.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def submit(self, coro):
+        ''' Schedule coro on the loop, returning a concurrent.futures.Future '''
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        ''' Block until coro finishes, cancelling it on ctrl-c '''
+        future = self.submit(coro)
+        with interruptible():
+            try:
+                return future.result()
+            except KeyboardInterrupt:
+                future.cancel()
+                raise
+
+@contextlib.contextmanager
+def interruptible():
+    '''
+    Ctrl-c raises KeyboardInterrupt within the block whatever SIGINT handler
+    is installed, e.g. the console's, which exits.  Only the main thread
+    receives signals, elsewhere the block runs as is.
+    '''
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    previous = signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner():
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = AsyncRunner()
+        return _runner
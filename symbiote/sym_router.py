@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+#
+# sym_router.py
+
+import re
+
+# A command token is a whole word (or $) directly followed by a colon, e.g.
+# file: in "look at file:/tmp/x: please".  The pattern runs over the reversed
+# text so the regex engine can skip straight from colon to colon instead of
+# trying every word in a large paste.
+token_pattern = re.compile(r":(\$|\w+)")
+
+class CommandRouter:
+    """
+    Dispatch table for :: commands.
+
+    Commands are registered once with a precompiled pattern and a handler.
+    Each input is tokenized in a single pass to find which command names it
+    mentions, and only the patterns for those commands are tried, in
+    registration order.  Inputs without any command token cost one scan.
+    """
+    def __init__(self):
+        self.entries = []
+        self.commands = {}
+
+    def register(self, names, pattern, handler):
+        if isinstance(names, str):
+            names = (names,)
+
+        entry = {
+                "names": frozenset(names),
+                "pattern": re.compile(pattern),
+                "handler": handler,
+            }
+        self.entries.append(entry)
+        for name in names:
+            self.commands[name] = entry
+
+        return entry
+
+    def registered(self):
+        return [name if name == "$" else f"{name}::" for name in self.commands]
+
+    def tokenize(self, text):
+        ''' Return the set of registered command names mentioned in text '''
+        if ':' not in text:
+            return set()
+
+        found = set()
+        for token in set(token_pattern.findall(text[::-1])):
+            name = token[::-1]
+            if name in self.commands:
+                found.add(name)
+
+        return found
+
+    def match(self, text):
+        ''' Return (entry, match) for the first registered command that matches text '''
+        found = self.tokenize(text)
+        if not found:
+            return None, None
+
+        for entry in self.entries:
+            if entry["names"].isdisjoint(found):
+                continue
+
+            match = entry["pattern"].search(text)
+            if match:
+                return entry, match
+
+        return None, None
+
+    def dispatch(self, text):
+        ''' Run the matching handler, returning (handled, result) '''
+        entry, match = self.match(text)
+        if entry is None:
+            return False, None
+
+        return True, entry["handler"](text, match)
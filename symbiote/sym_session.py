@@ -42,14 +42,16 @@ console = Console(highlighter=sym_theme, theme=sym_theme.theme)
 print = console.print
 log = console.log
 
+from symbiote.sym_lazy import lazy_import
+
 log("Loading symbiote roles.")
 from symbiote.sym_roles import Roles
-log("Loading symbiote speech.")
-from symbiote.sym_speech import SymSpeech
+sym_speech = lazy_import("symbiote.sym_speech")
 log("Loading symbiote utils.")
 from symbiote.sym_utils import (
-        is_url, is_image, extract_metadata,
-        extract_text, clean_path
+        is_url, is_image,
+        extract_text, clean_path, inspect_file,
+        create_index, use_settings, iter_search, display_documents
     )
 log("Loading symbiote theme_manager.")
 from symbiote.theme_manager import ThemeManager
@@ -57,6 +59,7 @@ log("Loading symbiote module_inspector.")
 from symbiote.sym_module_inspector import ModuleInspector as Inspect
 log("Loading symbiote memory_store.")
 from symbiote.sym_memory_store import SymMemoryStore
+from symbiote.sym_blob_store import BlobView
 log(f"Loading symbiote sym_toolbar.")
 import symbiote.sym_toolbar as sym_toolbar
 log(f"Loading symbiote sym_code_extract.")
@@ -65,23 +68,28 @@ from symbiote.sym_code_extract import CodeIdentifier
 # Third-party imports
 log(f"Loading third party modules.")
 import requests
-import clipboard
-import qrcode
-import psutil
 from halo import Halo
-from PIL import Image, ImageDraw, ImageColor
-from bs4 import BeautifulSoup
-import pgeocode
-
-# Set up pgeocode (moved initialization to the script's main logic or class constructor)
-nomi = pgeocode.Nominatim('us')
 
-log("Loading inquirerpy.")
-# InquirerPy imports
-from InquirerPy import inquirer
-from InquirerPy.base.control import Choice
-from InquirerPy.validator import PathValidator
-from InquirerPy.prompts.filepath import FilePathCompleter
+# Command specific modules, imported the first time a command uses them
+clipboard = lazy_import("clipboard")
+qrcode = lazy_import("qrcode")
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageColor = lazy_import("PIL.ImageColor")
+bs4 = lazy_import("bs4")
+pgeocode = lazy_import("pgeocode")
+
+# InquirerPy is only needed once a selector or text prompt is opened
+inquirer = lazy_import("InquirerPy.inquirer")
+inquirer_control = lazy_import("InquirerPy.base.control")
+
+_nomi = None
+def get_nominatim():
+    """ Build the pgeocode postal code table on first use. """
+    global _nomi
+    if _nomi is None:
+        _nomi = pgeocode.Nominatim('us')
+    return _nomi
 
 log("Loading prompt_toolkit.")
 # Application and session management
@@ -94,6 +102,7 @@ from prompt_toolkit.shortcuts import (
         message_dialog
     )
 from prompt_toolkit.key_binding import KeyBindings
+from prompt_toolkit.patch_stdout import patch_stdout
 from prompt_toolkit.keys import Keys
 from prompt_toolkit.completion import Completion, WordCompleter
 from prompt_toolkit.styles import Style
@@ -116,38 +125,19 @@ from pygments.lexers.python import PythonLexer
 
 system = platform.system()
 
-models = [
-        "groq:llama-3.1-70b-versatile",
-        "groq:mixtral-8x7b-32768",
-        ] 
-
-log("Loading ollama.")
-from ollama import Client
-olclient = Client(host='http://localhost:11434')
-try:
-    model_obj = olclient.list()
-    for mod in model_obj['models']:
-        models.append("ollama:" + mod.model)
-except Exception as e:
-    log(f"Failed to load ollama models: {e}")
-
-log("Loading openai.")
-import openai
-oaiclient = openai.OpenAI()
-try:
-    response = oaiclient.models.list()
-    for model in response:
-        models.append("openai:" + model.id)
-except Exception as e:
-    log(e)
-    pass
-
-log("Loading groq.")
-from groq import Groq
-try:
-    grclient = Groq()
-except Exception as e:
-    log(e)
+log("Loading symbiote models.")
+from symbiote.sym_models import ModelCatalog
+from symbiote.sym_jobs import JobManager, ForegroundOnly, current_job
+from symbiote.sym_dir_ingest import DirectoryIngester
+from symbiote.sym_extract_cache import ExtractCache, set_extract_cache, get_extract_cache
+from symbiote.sym_providers import ProviderError, StreamStats, get_backend, get_runner, split_model
+from symbiote.sym_router import CommandRouter
+from symbiote.sym_history import ConversationHistory
+from symbiote.sym_convo_store import ConversationStore
+from symbiote.sym_tokenizer import get_counter, default_vocab_files
+
+# Message roles the providers accept, other records are not loaded into the history
+chat_roles = ("user", "assistant", "system")
 
 command_list = {
         "help::": "This help output.",
@@ -187,7 +177,8 @@ command_list = {
         "$": "Execute a local cli command and learn from the execution fo the command.",
         "image::": "Render an image from the provided text.",
         "note::": "Create a note that is tracked in a separate conversation",
-        "index::": "Index files into Elasticsearch.",
+        "index::": "Index files into Elasticsearch, or the local index when index_backend is local.",
+        "index_search::": "Search the index, results are shown as they arrive.",
         "define::": "Request definition on keyword or terms.",
         "theme::": "Change the theme for the symbiote cli.",
         "view::": "View a file",
@@ -196,6 +187,8 @@ command_list = {
         "wiki::": "Run a wikipedia search on your search term.",
         "headlines::|news::": "Get headlines from major news agencies.",
         "mail::": "Load e-mail messages from gmail.",
+        "jobs::": "List background jobs, jobs:cancel <id>: to stop one.",
+        "cache::": "Extraction cache hit rates, cache:clear: to empty it.",
     }
 
 audio_triggers = {
@@ -223,6 +216,67 @@ audio_triggers = {
         'scroll': [r'keyword scroll file', 'scroll::'],
     }
 
+# Command dispatch table: (names, pattern, handler method).  Order sets priority.
+command_table = [
+        ("test", r'^test::', "command_test"),
+        ("perifious", r'^perifious::', "command_perifious"),
+        ("shell", r'^shell::', "command_shell"),
+        ("help", r"^help::|^help:(.*):", "command_help"),
+        (("clear", "reset"), r"^clear::|^reset::", "command_clear"),
+        ("save", r"^save::", "command_save"),
+        ("exit", r'^exit::', "command_exit"),
+        ("introspect", r"introspect::", "command_introspect"),
+        ("clipboard", r'clipboard::|clipboard:(.*):', "command_clipboard"),
+        ("reload", r"reload::|reload:(.*):", "command_reload"),
+        (("roles", "role"), r'^roles?::|roles?:(.*):', "command_roles"),
+        ("settings", r'^settings::|settings:(.*):(.*):', "command_settings"),
+        ("model", r'^model::|model:(.*):', "command_model"),
+        ("convo", r'^convo::|convo:(.*):', "command_convo"),
+        ("cd", r'^cd::|cd:(.*):', "command_cd"),
+        ("keywords", r'^keywords::', "command_keywords"),
+        ("extract", r'^extract::|^extract:(.*):(.*):|^extract:(.*):', "command_extract"),
+        ("flush", r'^flush::', "command_flush"),
+        ("history", r'^history::|^history:(.*):', "command_history"),
+        ("code", r'code::|code:(.*):', "command_code"),
+        ("note", r'^note::|^note:([\s\S]*?):', "command_note"),
+        ("theme", r'theme::|theme:(.*):', "command_theme"),
+        ("view", r'view::|^view:(.*):|^view:(https?:\/\/\S+):', "command_view"),
+        ("analyze_image", r'^analyze_image::|^analyze_image:(.*):', "command_analyze_image"),
+        ("find", r'^find::|^find:(.*):', "command_find"),
+        ("scroll", r'scroll::|scroll:(.*):', "command_scroll"),
+        ("wiki", r'wiki:(.*):', "command_wiki"),
+        (("news", "headlines"), r'\bnews::|\bheadlines::', "command_news"),
+        ("google", r'google:(.*):', "command_google"),
+        ("define", r'define:(.*):', "command_define"),
+        ("mail", r'mail::', "command_mail"),
+        (("w3m", "browser"), r'w3m:(.*):|browser:(.*):', "command_w3m"),
+        ("image_extract", r'^image_extract:(.*):', "command_image_extract"),
+        ("qr", r"qr:(.*):", "command_qr"),
+        ("weather", r"weather::|weather:(.*):", "command_weather"),
+        ("inspect", r'inspect::|inspect:(.*):', "command_inspect"),
+        ("memget", r"memget::|memget:(.*):", "command_memget"),
+        ("memory", r"^memory::|^memory:(.*):", "command_memory"),
+        ("search", r"search::|search:(.*):", "command_search"),
+        ("toolbar", r"^toolbar:", "command_toolbar"),
+        ("jobs", r"jobs::|jobs:(.*):", "command_jobs"),
+        ("cache", r"cache::|cache:(.*):", "command_cache"),
+        ("index", r"index::|index:(.*):", "command_index"),
+        ("index_search", r"index_search::|index_search:(.*):", "command_index_search"),
+        ("file", r'file::|file:(.*):', "command_file"),
+        ("image", r'^image:([\s\S]*?):', "command_image"),
+        ("$", r'\$:(.*):', "command_exec"),
+        ("getip", r'getip::', "command_getip"),
+        ("get", r'get::|get:(https?://\S+):', "command_get"),
+        ("fake_news", r'\bfake_news::|\bfake_news:(.*):', "command_fake_news"),
+        ("yt_transcript", r'yt_transcript::|yt_transcript:(.*):', "command_yt_transcript"),
+        ("vscan", r'vscan::|vscan:(.*):', "command_vscan"),
+        ("deception", r'deception::|deception:(.*):', "command_deception"),
+        ("crawl", r'crawl::|crawl:(https?://\S+):', "command_crawl"),
+    ]
+
+# Command text with no prompt around it, e.g. "file::" or "bogus:x:"
+catchall_pattern = re.compile(r"^.*::?$")
+command_pattern = re.compile(r"(^|\b| )(?P<command_name>(\$|\w+)):(?P<content>.*?):($|\b| )")
 
 # Default settings for openai and symbiote module.
 homedir = os.getenv('HOME')
@@ -239,6 +293,8 @@ symbiote_settings = {
         "debug": False,
         "elasticsearch": "http://dockera.vm.sr:9200",
         "elasticsearch_index": "symbiote",
+        "index_backend": "elasticsearch",
+        "local_index_path": os.path.join(homedir, ".symbiote", "index"),
         "symbiote_path": os.path.join(homedir, ".symbiote"),
         "perifious": False,
         "role": "DEFAULT",
@@ -248,6 +304,20 @@ symbiote_settings = {
         "imap_password": '',
         "think": False,
         "markdown": True,
+        "model_cache_ttl": 86400,
+        "context_window": 32768,
+        "reply_tokens": 8192,
+        "convo_tail": 200,
+        "convo_fsync_interval": 1.0,
+        "memory_backend": "wal",
+        "memory_blob_threshold": 65536,
+        "max_jobs": 4,
+        "extract_cache_size": 1 << 30,
+        "background_commands": [
+            "crawl", "vscan", "deception", "fake_news", "yt_transcript",
+            "index", "extract", "image_extract", "analyze_image", "get",
+        ],
+        "tokenizer_files": dict(default_vocab_files),
         "config_file": f"{homedir}/.symbiote/config"
     }
 
@@ -260,15 +330,32 @@ class SymSession():
             settings = symbiote_settings
 
         self.settings = settings 
-        self.conversation_history = []
-        self.estimated_tokens = self.estimate_token_count(json.dumps(self.conversation_history))
+        use_settings(self.settings)
+        self.conversation_history = ConversationHistory(counter=self.token_counter())
+        self.estimated_tokens = self.conversation_history.total_tokens
+        self.stream_stats = None
+        self.toolbar = sym_toolbar.Toolbar(max_lines=8)
+        self.toolbar_wake = threading.Event()
+        self.jobs = JobManager(
+                max_workers=self.settings.get('max_jobs', symbiote_settings['max_jobs']),
+                on_result=self.store_job_result
+            )
         self.audio_triggers = audio_triggers
-        self.spinner = Halo(text='Processing ', spinner='dots')
+        self.audio_trigger_patterns = [
+                (re.compile(pattern), command) for pattern, command in audio_triggers.values()
+            ]
+        self.audio_trigger_any = re.compile(
+                "|".join(f"(?:{pattern})" for pattern, _ in audio_triggers.values())
+            )
+        self.spinner = ForegroundOnly(Halo(text='Processing ', spinner='dots'))
         self.shell_mode = False
-        self.command_register = []
 
         # initialize memory manager
-        self.memory = SymMemoryStore(save_path="/tmp/symbiote_mem.json")
+        self.memory = SymMemoryStore(
+                save_path="/tmp/symbiote_mem.json",
+                backend=self.settings.get('memory_backend', symbiote_settings['memory_backend']),
+                blob_threshold=self.settings.get('memory_blob_threshold', symbiote_settings['memory_blob_threshold'])
+            )
 
         if 'debug' in kwargs:
             self.settings['debug'] = kwargs['debug']
@@ -289,14 +376,27 @@ class SymSession():
         # Get hash for current settings
         self.default_hash = hash(json.dumps(self.settings, sort_keys=True)) 
 
+        # Model list is only fetched from the providers on first model:: use
+        self.model_catalog = ModelCatalog(
+                os.path.join(symbiote_dir, "models.json"),
+                ttl=self.settings.get('model_cache_ttl', symbiote_settings['model_cache_ttl'])
+            )
+
+        # Converter output (pdf, docx, excel, OCR) is cached across sessions
+        set_extract_cache(ExtractCache(
+                os.path.join(symbiote_dir, "extract_cache.db"),
+                max_bytes=self.settings.get('extract_cache_size', symbiote_settings['extract_cache_size'])
+            ))
+
         # Set the conversations directory
         self.conversations_dir = os.path.join(symbiote_dir, "conversations")
         if not os.path.exists(self.conversations_dir):
             os.mkdir(self.conversations_dir)
 
         # Set the default conversation
-        if self.settings['conversation'] == '/dev/null':
-            self.conversations_file = self.settings['conversation']
+        self.conversation_store = None
+        if self.settings['conversation'] in ('/dev/null', ''):
+            self.conversations_file = '/dev/null'
             self.convo_file = self.conversations_file
         else:
             self.conversations_file = os.path.join(self.conversations_dir, self.settings['conversation'])
@@ -309,9 +409,8 @@ class SymSession():
 
         self.history = FileHistory(history_file)
 
-        # Load the default conversation
-        #self.current_conversation = self.load_conversation(self.conversations_file)
-        self.current_conversation = []
+        # Load the tail of the default conversation
+        self.current_conversation = self.load_conversation(self.conversations_file)
 
         # Init the shell theme manager
         self.theme_manager = ThemeManager()
@@ -326,14 +425,17 @@ class SymSession():
 
         self.command_completer = WordCompleter(commands)
 
-        # Get location details
-        self.geo = nomi.query_postal_code(self.settings['location'])
+        # Location details are looked up on first use
+        self.geo = {}
+        self.geo_location = None
 
         if 'suppress' in kwargs:
             self.suppress = kwargs['suppress']
         else:
             self.suppress = False
 
+        self.register_commands()
+
     def display_settings(self):
         table = Table(show_header=False, box=None, expand=True, header_style="")
         table.add_column("Key", style="gold1", ratio=2, no_wrap=True, justify="right")
@@ -399,10 +501,10 @@ class SymSession():
         else:
             if not conversations:
                 return
-            conversations.insert(0, Choice("notes", name="Open notes conversation."))
-            conversations.insert(0, Choice("clear", name="Clear conversation."))
-            conversations.insert(0, Choice("export", name="Export conversation."))
-            convesations.insert(0, Choice("new", name="Create new conversation."))
+            conversations.insert(0, inquirer_control.Choice("notes", name="Open notes conversation."))
+            conversations.insert(0, inquirer_control.Choice("clear", name="Clear conversation."))
+            conversations.insert(0, inquirer_control.Choice("export", name="Export conversation."))
+            conversations.insert(0, inquirer_control.Choice("new", name="Create new conversation."))
 
             selected_file = self.list_selector("Select a conversation:", conversations)
 
@@ -419,13 +521,19 @@ class SymSession():
             clear_file = os.path.join(self.conversations_dir, clear_file)
 
             try:
-                with open(clear_file, 'w') as file:
-                    pass
-            except:
-                log(f"Unable to clear {clear_file}")
+                if self.conversation_store is not None and self.conversation_store.path == clear_file:
+                    self.conversation_store.clear()
+                else:
+                    store = ConversationStore(clear_file)
+                    try:
+                        store.clear()
+                    finally:
+                        store.close()
+            except Exception as e:
+                log(f"Unable to clear {clear_file}: {e}")
 
             if self.settings['conversation'] == os.path.basename(clear_file):
-                self.current_conversation = self.sym.load_conversation(clear_file)
+                self.current_conversation = self.load_conversation(clear_file)
 
             log(f"Conversation cleared: {clear_file}")
 
@@ -441,12 +549,12 @@ class SymSession():
         if selected_file == "null": 
             self.conversations_file = '/dev/null'
             self.settings['conversation'] = self.conversations_file
-            self.current_conversation = []
+            self.current_conversation = self.load_conversation(self.conversations_file)
             self.convo_file = self.conversations_file
         else:
             self.settings['conversation'] = selected_file
             self.conversations_file = os.path.join(self.conversations_dir, selected_file)
-            self.current_conversation = self.sym.load_conversation(self.conversations_file)
+            self.current_conversation = self.load_conversation(self.conversations_file)
             self.convo_file = os.path.basename(self.conversations_file)
 
         log(f"Loaded conversation: {selected_file}")
@@ -454,7 +562,7 @@ class SymSession():
         return
 
     def selectModel(self, *args):
-        model_list = models
+        model_list = self.model_catalog.models()
         print(f"Current Model: {self.settings['model']}")
         try:
             model_name = args[0]
@@ -471,6 +579,17 @@ class SymSession():
 
         return None
 
+    def query_geo(self, location):
+        """ Return pgeocode details for location, cached until the location changes. """
+        if not location:
+            return {}
+
+        if location != self.geo_location:
+            self.geo = get_nominatim().query_postal_code(location)
+            self.geo_location = location
+
+        return self.geo
+
     def console(self, *args, **kwargs):
         #history = InMemoryHistory() 
         if 'prompt_only' in kwargs:
@@ -505,27 +624,25 @@ class SymSession():
             return self.toolbar_message
 
         def update_toolbar():
+            # Only a changed field or viewer text re-renders and redraws
             while True:
-                time.sleep(2)
-                tb_settings = { 
-                    "Time": datetime.now().strftime("%H:%M:%S"),
-                    "Model": self.settings['model'],
-                    "Role": self.settings['role'],
-                    "Shell": self.shell_mode
-                }
-                tb_functions = {
-                    "CPU": lambda: f"{psutil.cpu_percent()}%",
-                    "Memory": lambda: f"{psutil.virtual_memory().percent}%",
-                }
+                self.toolbar_wake.wait(1)
+                self.toolbar_wake.clear()
                 try:
-                    self.toolbar_message = sym_toolbar.render_dashboard(
-                        settings=tb_settings,
-                        functions=tb_functions,
-                        max_lines=8,
-                        tail_lines=self.live_render_buffer,
+                    self.toolbar.set(
+                        Time=datetime.now().strftime("%H:%M"),
+                        Model=self.settings['model'],
+                        Role=self.settings['role'],
+                        Shell=self.shell_mode,
                     )
-                    app = get_app()
-                    app.invalidate()
+                    self.toolbar.set_tail(self.live_render_buffer)
+                    self.toolbar.sample()
+
+                    frame, changed = self.toolbar.render()
+                    if changed:
+                        self.toolbar_message = frame
+                        app = get_app()
+                        app.invalidate()
                 except Exception as e:
                     log(f"Failure to pull toolbar message: {e}")
 
@@ -571,12 +688,12 @@ class SymSession():
             # Chack for a change in settings and write them
             check_settings = hash(json.dumps(self.settings, sort_keys=True)) 
 
-            self.estimated_tokens = self.estimate_token_count(json.dumps(self.conversation_history))
+            self.estimated_tokens = self.conversation_history.total_tokens
 
             if self.settings['listen']:
                 if not hasattr(self, 'symspeech'):
-                    speech = SymSpeech(settings=self.settings)
-                    speechQueue = SymSpeech.start_keyword_listen()
+                    speech = sym_speech.SymSpeech(settings=self.settings)
+                    speechQueue = sym_speech.SymSpeech.start_keyword_listen()
 
                 user_input = self.speech.keyword_listen()
 
@@ -618,28 +735,24 @@ class SymSession():
                 return response
 
             try:
-                user_input = self.ps.prompt(
-                    message=get_prompt(),
-                    multiline=True,
-                    default=user_input,
-                    cursor=CursorShape.BLOCK,
-                    rprompt=f"{current_date} {current_time}",
-                    vi_mode=self.settings['vi_mode'],
-                    completer=self.command_completer,
-                    complete_while_typing=False,
-                    refresh_interval=0.5,
-                )
+                # Output of background jobs is printed above the prompt
+                with patch_stdout(raw=True):
+                    user_input = self.ps.prompt(
+                        message=get_prompt(),
+                        multiline=True,
+                        default=user_input,
+                        cursor=CursorShape.BLOCK,
+                        rprompt=f"{current_date} {current_time}",
+                        vi_mode=self.settings['vi_mode'],
+                        completer=self.command_completer,
+                        complete_while_typing=False,
+                    )
 
-                if re.search(r'^exit::', user_input):
+                if user_input.startswith('exit::'):
                     self.save_settings()
+                    self.jobs.shutdown()
                     sys.exit(0)
 
-                user_input_processing = threading.Thread(
-                        target=process_user_input,
-                        args=(user_input,),
-                        daemon=True
-                    )
-                user_input_processing.start()
             except KeyboardInterrupt:
                 break
             
@@ -647,11 +760,18 @@ class SymSession():
                 self.save_settings()
                 self.default_hash = check_settings
 
-            # Prompt waits here for processing to complete
-            app = get_app()
-            app.invalidate()
-            while user_input_processing.is_alive():
-                time.sleep(0.1)
+            # Long running commands become background jobs and the prompt
+            # returns right away, anything else finishes before the next prompt.
+            command = self.background_command(user_input)
+            if command is not None:
+                job = self.jobs.submit(command, self.process_commands, user_input)
+                log(f"Job {job.id} started: {command}:: (jobs:: to follow it)")
+                continue
+
+            try:
+                process_user_input(user_input)
+            except KeyboardInterrupt:
+                log(f"Interrupted.")
 
 
     def writeHistory(self, role, text):
@@ -660,7 +780,10 @@ class SymSession():
                 "role": role,
                 "content": text 
                 }
-        self.conversation_history.append(hist_entry)
+        # Jobs write from their own threads, the entry and its log record go together
+        with self.conversation_history.lock:
+            self.conversation_history.append(hist_entry)
+            self.save_conversation(role, text)
 
 
     def send_message(self, user_input):
@@ -675,7 +798,7 @@ class SymSession():
         current_role = self.settings['role']
         available_roles = Roles.get_roles()
 
-        self.geo = nomi.query_postal_code(self.settings['location'])
+        self.geo = self.query_geo(self.settings['location'])
         now = datetime.now()
         current_time = now.strftime("%H:%M:%S")
         current_date = now.strftime("%m/%d/%Y")
@@ -695,21 +818,21 @@ class SymSession():
         #self.writeHistory('system', system_prompt)
         self.writeHistory('user', user_input)
 
-        '''
-        self.estimated_tokens = self.estimate_token_count(json.dumps(self.conversation_history))
-        num_ctx = self.estimated_tokens + 8192
-        if self.estimated_tokens > self.settings['max_tokens']:
-            self.conversation_history = self.truncate_history(self.conversation_history, self.settings['max_tokens'])
-            self.estimated_tokens = self.estimate_token_count(json.dumps(self.conversation_history))
-            num_ctx = self.estimated_tokens + 8192
-        '''
-        num_ctx = self.settings['max_tokens']
-
-        """ Rule of thumb character count for efficent queries """
-        message = self.conversation_history
-        tlen = self.estimate_token_count(json.dumps(message))
-        if int(tlen) >= 100000:
-            log(f"High token estimate {tlen}: concider flush::")
+        # Size the context from real token counts, keeping room for the reply.
+        context_window = self.settings.get('context_window', symbiote_settings['context_window'])
+        reply_tokens = self.settings.get('reply_tokens', symbiote_settings['reply_tokens'])
+        self.conversation_history.use_counter(self.token_counter())
+        if self.conversation_history.total_tokens + reply_tokens > context_window:
+            self.truncate_history(self.conversation_history, context_window - reply_tokens)
+        self.estimated_tokens = self.conversation_history.total_tokens
+        num_ctx = min(self.estimated_tokens + reply_tokens, context_window)
+
+        # A copy, jobs may append to the history while the reply streams
+        with self.conversation_history.lock:
+            message = list(self.conversation_history.messages)
+        tlen = self.estimated_tokens
+        if int(tlen) >= 25000:
+            log(f"High token count {tlen}: concider flush::")
 
         if self.shell_mode is True:
             message = []
@@ -718,7 +841,6 @@ class SymSession():
             message.append({"role": "system", "content": available_roles[current_role]})
             message.append({"role": "user", "content": user_input})
 
-        response = str() 
         streaming = self.settings['stream']
         markdown = self.settings['markdown']
         if self.shell_mode is True:
@@ -729,131 +851,34 @@ class SymSession():
             log(f"The user input is empty.  Possibly your input was too large.")
             return None
 
-        if self.settings['model'].startswith("openai"):
-            model_name = self.settings['model'].split(":")
-            model = model_name[1]
-            
-            # Remove system messages from the history if using o1 models
-            # o1 models do not allow role type of system
-            # also streaming must be turned off
-            if model.startswith("o1-"):
-                streaming = False
-                for message in self.conversation_history:
-                    if message['role'] == 'system':
-                        self.conversation_history.remove(message)
-
-            # OpenAI Chat Completion
-            try:
-                stream = oaiclient.chat.completions.create(
-                        model = model,
-                        messages = message,
-                        stream = streaming,
-                        )
-            except Exception as e:
-                log(e)
-                return None
-
-            if self.suppress is True:
-                response = stream.choices[0].message.content
-            else:
-                if streaming:
-                    for chunk in stream:
-                        if chunk.choices[0].delta.content is not None:
-                            response += chunk.choices[0].delta.content
-                            if markdown is True:
-                                print(chunk.choices[0].delta.content, end="")
-                            else:
-                                print(chunk.choices[0].delta.content, end='')
-                else:
-                    response = stream.choices[0].message.content
-                    if markdown is True:
-                        print(Markdown(response))
-                    else:
-                        print(response)
-
-        elif self.settings['model'].startswith("ollama"):
-            # Ollama Chat Completion
-            available_functions = {
-                    "test": "function_to_call",
-                    }
-
-            model_name = self.settings['model'].split(":")
-            model = model_name[1] + ":" + model_name[2]
-
-            try:
-                stream = olclient.chat(
-                        model = model,
-                        messages = message,
-                        stream = streaming,
-                        #format = "json",
-                        options = { "num_ctx": num_ctx },
-                        tools=[],
-                        )
-
-            except Exception as e:
-                log(e)
-                return None
-
-            if self.suppress is True:
-                response = stream['message']['content']
-            else:
-                if streaming:
-                    for chunk in stream:
-                        response += chunk['message']['content']
-                        if markdown is True:
-                            print(chunk['message']['content'], end="")
-                        else:
-                            print(chunk['message']['content'], end='', highlight=False, style="grey89")
-                else:
-                    response = stream['message']['content']
-                    if markdown is True:
-                        print(Markdown(response))
-                    else:
-                        print(response)
+        provider, model = split_model(self.settings['model'])
+        options = {}
+        if provider == "ollama":
+            options["num_ctx"] = num_ctx
 
-            """
-            if stream.message.tool_calls:
-            # There may be multiple tool calls in the response
-                for tool in stream.message.tool_calls:
-                    # Ensure the function is available, and then call it
-                    if function_to_call := available_functions.get(tool.function.name):
-                        print('Calling function:', tool.function.name)
-                        print('Arguments:', tool.function.arguments)
-                        print('Function output:', function_to_call(**tool.function.arguments))
-                    else:
-                      print('Function', tool.function.name, 'not found')
-            """
-        elif self.settings['model'].startswith("groq"):
-            model_name = self.settings['model'].split(":")
-            model = model_name[1]
+        # Remove system messages from the history if using o1 models
+        # o1 models do not allow role type of system
+        # also streaming must be turned off
+        if provider == "openai" and model.startswith("o1-"):
+            streaming = False
+            self.conversation_history.remove_role('system')
+            message = [entry for entry in message if entry['role'] != 'system']
 
-            try:
-                stream = grclient.chat.completions.create(
-                        model = model,
-                        messages = message,
-                        stream = stream,
-                        )
-            except Exception as e:
-                log(e)
-                return None
+        stats = StreamStats(provider, model, counter=self.token_counter())
+        self.stream_stats = stats
+        try:
+            response = get_runner().run(
+                    self.stream_response(provider, model, message, streaming, markdown, options, stats)
+                    )
+        except KeyboardInterrupt:
+            response = "".join(stats.text)
+            log(f"Response cancelled.")
+        except (ProviderError, ValueError) as e:
+            log(e)
+            return None
 
-            if self.suppress is True:
-                response = stream.choices[0].message.content
-            else:
-                if streaming:
-                    for chunk in stream:
-                        if chunk.choices[0].delta.content is not None:
-                            response += chunk.choices[0].delta.content
-                            if markdown is True:
-                                print(chunk.choices[0].delta.content, end="")
-                            else:
-                                print(chunk.choices[0].delta.content, end='')
-                else:
-                    response = stream.choices[0].message.content
-                    if markdown is True:
-                        print(Markdown(response))
-                    else:
-                        print(response)
+        if self.settings['debug']:
+            log(stats.summary())
 
         self.writeHistory('assistant', response)
 
@@ -866,1328 +891,1254 @@ class SymSession():
 
         return response
 
-    def truncate_history(self, history, size):
-        tokens = self.estimate_token_count(json.dumps(history))
-        while tokens > size:
-            history.pop(0)
-            tokens = self.estimate_token_count(json.dumps(history))
-
-        return history
-
-    def process_commands(self, user_input):
-        def _registerCommand(command=None):
-            if command is not None: 
-                self.command_register.append(command)
-
-        def _isCommand(command=None):
-            is_command = None
-            command_pattern = r"(^|\b| )(?P<command_name>(\$|\w+)):(?P<content>.*?):($|\b| )"
-            for match in re.finditer(command_pattern, input_text):
-                command_name = match.group("command_name")
-
-                check = f"{command_name}::"
-                if check in self.command_register:
-                    is_command = True
-                else:
-                    is_command = None
-                    log(f"Error command invalid: {check}")
-                    return None
+    async def stream_response(self, provider, model, message, streaming, markdown, options, stats):
+        backend = get_backend(provider)
+        async for text in backend.stream(model, message, streaming=streaming,
+                                         options=options, stats=stats):
+            if self.suppress is True or streaming is False:
+                continue
 
-        def _checkCommand(input_text=None):
-            if input_text is None:
-                return None
+            if markdown is True:
+                print(text, end="")
+            else:
+                print(text, end='', highlight=False, style="grey89")
 
-            input_text = input_text.strip() 
-            command_pattern = r"(^|\b| )(?P<command_name>(\$|\w+)):(?P<content>.*?):($|\b| )"
+        response = "".join(stats.text)
+        if self.suppress is not True and streaming is False:
+            if markdown is True:
+                print(Markdown(response))
+            else:
+                print(response)
 
-            # Lists to store the results
-            commands = []
-            surrounding_texts = []
-            last_end = 0
+        return response
 
-            # Find all command matches
-            for match in re.finditer(command_pattern, input_text):
-                # Extract command name and content
-                command_name = match.group("command_name")
+    def truncate_history(self, history, size):
+        history.trim(size)
+        return history
 
-                # Checking if this is a valid command.
-                '''
-                check = f"{command_name}::"
-                if check not in self.command_register:
-                    log(f"Error invalid command: {check}")
-                    return None
-                '''
+    def register_commands(self):
+        """ Build the command dispatch table once.  Order sets priority. """
+        self.router = CommandRouter()
+        for names, pattern, handler in command_table:
+            self.router.register(names, pattern, getattr(self, handler))
 
-                if match.group("content"):
-                    content = match.group("content")
-                else:
-                    content = None
+        self.command_register = self.router.registered()
 
-                # Append command info
-                commands.append({
-                    "command_name": command_name,
-                    "content": content,
-                    "start": match.start(),
-                    "end": match.end()
-                })
+    def background_command(self, user_input):
+        ''' Name of the command to run as a background job, None to run input in the foreground '''
+        if self.shell_mode is True:
+            return None
 
-                # Capture surrounding text before each command
-                start, end = match.span()
-                if start > last_end:
-                    surrounding_texts.append(input_text[last_end:start].strip())
+        entry, match = self.router.match(user_input)
+        if entry is None:
+            return None
 
-                last_end = end
+        background = self.settings.get('background_commands', symbiote_settings['background_commands'])
+        names = entry["names"].intersection(background)
+        # Commands without an argument prompt for one, keep those in the foreground
+        if not names or not any(match.groups()):
+            return None
 
-            # Append any remaining text after the last command
-            if last_end < len(input_text):
-                surrounding_texts.append(input_text[last_end:].strip())
+        # Commands with text around them splice their output into it for the model
+        if self._check_command(user_input):
+            return None
 
-            # If there is no surrounding text, return None
-            if not any(surrounding_texts):
-                return None
-            else:
-                return True
+        return sorted(names)[0]
 
-            # Process each command and replace it in the input_text
-            offset = 0  # Track character offset for replacement
-            for command in commands:
-                command_name = command["command_name"]
-                content = command["content"]
+    def store_job_result(self, job):
+        if job.result:
+            self.memory.create(job.memory_key, job.result)
+            log(f"Job {job.id} {job.name}:: done, result in memory key {job.memory_key} (memget:{job.memory_key}:)")
+        else:
+            log(f"Job {job.id} {job.name}:: done")
 
-                # Attempt to call the function dynamically
-                try:
-                    func = command_functions.get(f"command_{command_name}")
-                    if callable(func):
-                        log(f"Calling function: {command_name} with content: {content}")
-                        replacement_content = func(content)
-                        replacement = f"\n```\n{replacement_content}\n```\n"
+    def check_audio_triggers(self, user_input):
+        if not self.audio_trigger_any.search(user_input):
+            return user_input
 
-                        start = command["start"] + offset
-                        end = command["end"] + offset
-                        input_text = input_text[:start] + replacement + input_text[end:]
+        for pattern, command in self.audio_trigger_patterns:
+            if pattern.search(user_input):
+                return command
 
-                        offset += len(replacement) - (end - start)
-                    else:
-                        log(f"No function found for command: {command_name}")
-                except Exception as e:
-                    log(f"Error calling function {command_name}: {e}")
+        return user_input
 
-            return intput_text
+    def process_commands(self, user_input):
+        # Audio keyword triggers
+        user_input = self.check_audio_triggers(user_input)
 
+        handled, result = self.router.dispatch(user_input)
+        if handled:
+            return result
 
-        # Audio keyword triggers
-        for keyword in self.audio_triggers:
-            if re.search(self.audio_triggers[keyword][0], user_input):
-                user_input = self.audio_triggers[keyword][1]
-                break
+        # Catchall for stray command entries. 
+        if catchall_pattern.search(user_input):
+            log(f"Unknown command: {user_input}")
+            return None
 
-        _registerCommand("test::")
-        if user_input.startswith('test::'):
-            test_text = """
-            Send funds to support@example.org
-            Visit https://example.com for more info.
-            Check the config at /etc/config/settings.ini or C:\\Windows\\System32\\drivers\\etc\\hosts.
-            Here is some JSON: {"key": "value"} or an array: [1, 2, 3].
-            IPv4: 192.168.1.1, IPv6: fe80::1ff:fe23:4567:890a, MAC: 00:1A:2B:3C:4D:5E.
-            Timestamp: 2023-11-18T12:34:56Z, Hex: 0x1A2B3C, Env: $HOME or %APPDATA%.
-            UUID: 550e8400-e29b-41d4-a716-446655440000
-            """
+        return user_input
 
-            print(Panel(test_text, title="test"))
-            time.sleep(5)
-            print()
-            print("[red]hello world[/red]")
-            print(test_text)
-            time.sleep(5)
-            with console.capture() as capture:
-                console.print(test_text)
-
-            ansii_text = capture.get()
-            for i in range(50):
-                test_text += "Test the length\n"
-            self.display_pager(test_text)
-            self.layout_pager(test_text)
+    def _check_command(self, input_text=None):
+        """ Return True if input_text holds more than just commands. """
+        if input_text is None:
             return None
 
-        _registerCommand("perifious::")
-        if re.search(r'^perifious::', user_input):
-            speech = Speech(debug=self.settings['debug'])
-            speech.say('Your wish is my command!')
-            if self.settings['perifious']:
-                user_input = 'settings:perifious:0:'
-            else:
-                user_input = 'settings:perifious:1:'
+        input_text = input_text.strip() 
 
+        # Capture the text surrounding each command
+        surrounding_texts = []
+        last_end = 0
+        for match in command_pattern.finditer(input_text):
+            start, end = match.span()
+            if start > last_end:
+                surrounding_texts.append(input_text[last_end:start].strip())
 
-        _registerCommand("shell::")
-        if re.search(r'^shell::', user_input):
-            if self.shell_mode is False:
-                self.shell_mode = True
-                self.ps.style = self.theme_manager.get_theme("liveshell")
-            else:
-                self.shell_mode = False
-                self.ps.style = self.theme_manager.get_theme(self.settings["theme"])
-            return None
+            last_end = end
 
+        # Append any remaining text after the last command
+        if last_end < len(input_text):
+            surrounding_texts.append(input_text[last_end:].strip())
 
-        _registerCommand("help::")
-        help_pattern = r"^help::|^help:(.*):"
-        match = re.search(help_pattern, user_input)
-        if match:
-            short = True
-            if match.group(1):
-                short = False 
-            self.display_help(short)
+        # If there is no surrounding text, return None
+        if not any(surrounding_texts):
             return None
 
+        return True
+
+    def command_test(self, user_input, match):
+        test_text = """
+        Send funds to support@example.org
+        Visit https://example.com for more info.
+        Check the config at /etc/config/settings.ini or C:\\Windows\\System32\\drivers\\etc\\hosts.
+        Here is some JSON: {"key": "value"} or an array: [1, 2, 3].
+        IPv4: 192.168.1.1, IPv6: fe80::1ff:fe23:4567:890a, MAC: 00:1A:2B:3C:4D:5E.
+        Timestamp: 2023-11-18T12:34:56Z, Hex: 0x1A2B3C, Env: $HOME or %APPDATA%.
+        UUID: 550e8400-e29b-41d4-a716-446655440000
+        """
 
-        _registerCommand("clear::")
-        _registerCommand("reset::")
-        if re.search(r"^clear::|^reset::", user_input):
-            os.system('reset')
-            return None
+        print(Panel(test_text, title="test"))
+        time.sleep(5)
+        print()
+        print("[red]hello world[/red]")
+        print(test_text)
+        time.sleep(5)
+        with console.capture() as capture:
+            console.print(test_text)
+
+        ansii_text = capture.get()
+        for i in range(50):
+            test_text += "Test the length\n"
+        self.display_pager(test_text)
+        self.layout_pager(test_text)
+        return None
 
+    def command_perifious(self, user_input, match):
+        speech = Speech(debug=self.settings['debug'])
+        speech.say('Your wish is my command!')
+        if self.settings['perifious']:
+            user_input = 'settings:perifious:0:'
+        else:
+            user_input = 'settings:perifious:1:'
 
-        _registerCommand("save::")
-        if re.search(r"^save::", user_input):
-            self.save_settings()
-            return None
+        return self.process_commands(user_input)
 
+    def command_shell(self, user_input, match):
+        if self.shell_mode is False:
+            self.shell_mode = True
+            self.ps.style = self.theme_manager.get_theme("liveshell")
+        else:
+            self.shell_mode = False
+            self.ps.style = self.theme_manager.get_theme(self.settings["theme"])
+        return None
 
-        _registerCommand("exit::")
-        if re.search(r'^exit::', user_input):
-            self.save_settings()
-            sys.exit(0)
+    def command_help(self, user_input, match):
+        short = True
+        if match.group(1):
+            short = False 
+        self.display_help(short)
+        return None
 
+    def command_clear(self, user_input, match):
+        os.system('reset')
+        return None
 
-        # Trigger introspect::
-        _registerCommand("introspect::")
-        introspect_pattern = r"introspect::"
-        match = re.search(introspect_pattern, user_input)
-        if match:
-            try:
-                pass
-            except Exception as e:
-                print("An error occurred:", str(e))
+    def command_save(self, user_input, match):
+        self.save_settings()
+        return None
 
-            return None
+    def command_exit(self, user_input, match):
+        self.save_settings()
+        sys.exit(0)
 
-        # Trigger to read clipboard contents
-        _registerCommand("clipboard::")
-        clipboard_pattern = r'clipboard::|clipboard:(.*):'
-        match = re.search(clipboard_pattern, user_input)
-        if match:
-            import symbiote.sym_crawler as webcrawler
-            contents = clipboard.pshort()
-            if match.group(1):
-                sub_command = match.group(1).strip()
-                if sub_command == 'get':
-                    if re.search(r'^https?://\S+', contents):
-                        log(f"Fetching content from: {contents}")
-                        crawler = webcrawler.WebCrawler(browser='chrome')
-                        pages = crawler.pull_website_content(
-                                url, search_term=None,
-                                crawl=False, depth=None
-                            )
-                        crawler.close()
-                        website_content = str()
-                        if pages:
-                            for md5, page in pages.items():
-                                website_content += page['content']
-                        else:
-                            log(f"Unable to fetch data for {url}")
+    # Trigger introspect::
+    def command_introspect(self, user_input, match):
+        try:
+            pass
+        except Exception as e:
+            print("An error occurred:", str(e))
 
-                        user_input = user_input[:match.start()] + website_content + user_input[match.end():]
-            return user_input
+        return None
 
+    # Trigger to read clipboard contents
+    def command_clipboard(self, user_input, match):
+        import symbiote.sym_crawler as webcrawler
+        contents = clipboard.pshort()
+        if match.group(1):
+            sub_command = match.group(1).strip()
+            if sub_command == 'get':
+                if re.search(r'^https?://\S+', contents):
+                    log(f"Fetching content from: {contents}")
+                    crawler = webcrawler.WebCrawler(browser='chrome')
+                    pages = crawler.pull_website_content(
+                            url, search_term=None,
+                            crawl=False, depth=None
+                        )
+                    crawler.close()
+                    website_content = str()
+                    if pages:
+                        for md5, page in pages.items():
+                            website_content += page['content']
+                    else:
+                        log(f"Unable to fetch data for {url}")
+
+                    user_input = user_input[:match.start()] + website_content + user_input[match.end():]
+        return user_input
 
-        # Trigger to reload modules
-        _registerCommand("reload::")
-        reload_pattern = r"reload::|reload:(.*):"
-        match = re.search(reload_pattern, user_input)
-        if match:
-            if match.group(1):
-                module = match.group(1)
-                if module in list(sys.modules.keys()):
-                    name = syss.modules.get(module)
+    # Trigger to reload modules
+    def command_reload(self, user_input, match):
+        if match.group(1):
+            module = match.group(1)
+            if module in list(sys.modules.keys()):
+                name = syss.modules.get(module)
+                log(f"Reloading {module}")
+                importlib.reload(module)
+            else:
+                log(f"No such module: {module}")
+        else:
+            for module_name in list(sys.modules.keys()):
+                if module_name.startswith("symbiote."):
+                    del module_name
+                    module = sys.modules.get(module_name)
                     log(f"Reloading {module}")
                     importlib.reload(module)
-                else:
-                    log(f"No such module: {module}")
-            else:
-                for module_name in list(sys.modules.keys()):
-                    if module_name.startswith("symbiote."):
-                        del module_name
-                        module = sys.modules.get(module_name)
-                        log(f"Reloading {module}")
-                        importlib.reload(module)
-            return None
+        return None
+
+    # Trigger to choose role
+    def command_roles(self, user_input, match):
+        available_roles = Roles.get_roles()
+        if match.group(1):
+            selected_role = match.group(1).strip()
+            selected_role = selected_role.upper()
+        else:
+            if not available_roles:
+                return None
+            role_list = []
+            for role_name in available_roles:
+                role_list.append(role_name)
+            print(f"Current Role: {self.settings['role']}")
+            selected_role = self.list_selector("Select a role:", sorted(role_list))
+            if selected_role is None:
+                return None
+        if selected_role in available_roles:
+            self.settings['role'] = selected_role 
+            self.save_settings()
+        else:
+            log(f"No such role: {selected_role}")
+        return None
 
+    # Trigger to display settings
+    def command_settings(self, user_input, match):
+        # Extract setting key and value
+        setting = match.group(1).lower() if match.group(1) else None
+        set_value = match.group(2) if match.group(2) else None
+
+        if setting:
+            if setting in self.settings:
+                # Get the current type of the setting
+                current_type = type(self.settings[setting])
+
+                # Handle boolean settings
+                if isinstance(self.settings[setting], bool):
+                    set_value = str(set_value).lower() not in ("false", "0", "off")
+
+                # Special handling for the "location" setting
+                if setting == "location":
+                    try:
+                        # Attempt to query postal code first
+                        prior = set_value.lower()
+                        self.geo = get_nominatim().query_postal_code(set_value)
+                        set_value = str(self.geo['postal_code']).lower()
+
+                        # If no change, try querying location details
+                        if set_value == prior:
+                            tmp = get_nominatim().query_location(set_value, top_k=1)
+                            set_value = tmp['postal_code'].iloc[0]
+                            self.geo = get_nominatim().query_postal_code(set_value)
+                    except Exception as e:
+                        log(f"Error processing location: {e}")
+                        return None
 
-        # Trigger to choose role
-        _registerCommand("roles::")
-        _registerCommand("role::")
-        role_pattern = r'^roles?::|roles?:(.*):'
-        match = re.search(role_pattern, user_input)
-        if match:
-            available_roles = Roles.get_roles()
-            if match.group(1):
-                selected_role = match.group(1).strip()
-                selected_role = selected_role.upper()
-            else:
-                if not available_roles:
-                    return None
-                role_list = []
-                for role_name in available_roles:
-                    role_list.append(role_name)
-                print(f"Current Role: {self.settings['role']}")
-                selected_role = self.list_selector("Select a role:", sorted(role_list))
-                if selected_role is None:
-                    return None
-            if selected_role in available_roles:
-                self.settings['role'] = selected_role 
+                # Update the setting and save
+                self.settings[setting] = current_type(set_value)
                 self.save_settings()
-            else:
-                log(f"No such role: {selected_role}")
-            return None
+                return None
 
+        # Display settings if no valid setting key was found
+        self.display_settings()
+        return None
 
-        # Trigger to display settings
-        _registerCommand("settings::")
-        setting_pattern = r'^settings::|settings:(.*):(.*):'
-        match = re.search(setting_pattern, user_input)
-
-        if match:
-            # Extract setting key and value
-            setting = match.group(1).lower() if match.group(1) else None
-            set_value = match.group(2) if match.group(2) else None
-
-            if setting:
-                if setting in self.settings:
-                    # Get the current type of the setting
-                    current_type = type(self.settings[setting])
-
-                    # Handle boolean settings
-                    if isinstance(self.settings[setting], bool):
-                        set_value = str(set_value).lower() not in ("false", "0", "off")
-
-                    # Special handling for the "location" setting
-                    if setting == "location":
-                        try:
-                            # Attempt to query postal code first
-                            prior = set_value.lower()
-                            self.geo = nomi.query_postal_code(set_value)
-                            set_value = str(self.geo['postal_code']).lower()
-
-                            # If no change, try querying location details
-                            if set_value == prior:
-                                tmp = nomi.query_location(set_value, top_k=1)
-                                set_value = tmp['postal_code'].iloc[0]
-                                self.geo = nomi.query_postal_code(set_value)
-                        except Exception as e:
-                            log(f"Error processing location: {e}")
-                            return None
-
-                    # Update the setting and save
-                    self.settings[setting] = current_type(set_value)
-                    self.save_settings()
-                    return None
+    # Trigger for changing gpt model
+    def command_model(self, user_input, match):
+        if match.group(1):
+            model_name = match.group(1).strip()
+            self.selectModel(model_name)
+        else:
+            self.selectModel()
+        return None 
+
+    # Trigger for changing the conversation file
+    def command_convo(self, user_input, match):
+        if match.group(1):
+            convo_name = match.group(1).strip()
+            self.display_convo(convo_name) 
+        else:
+            self.display_convo()
+        return None 
 
-            # Display settings if no valid setting key was found
-            self.display_settings()
-            return None
+    # Trigger for changing working directory in chat
+    def command_cd(self, user_input, match):
+        if match.group(1):
+            requested_directory = match.group(1).strip()
+        else:
+            requested_directory = '~'
 
+        if requested_directory == '-':
+            requested_directory = self.previous_directory
 
-        # Trigger for changing gpt model 
-        _registerCommand("model::")
-        model_pattern = r'^model::|model:(.*):'
-        match = re.search(model_pattern, user_input)
-        if match:
-            if match.group(1):
-                model_name = match.group(1).strip()
-                self.selectModel(model_name)
-            else:
-                self.selectModel()
-            return None 
+        requested_directory = os.path.abspath(os.path.expanduser(requested_directory))
+        if os.path.exists(requested_directory):
+            self.previous_directory = self.working_directory
+            self.working_directory = requested_directory 
+            os.chdir(self.working_directory)
+        else:
+            log(f"Directory does not exit: {requested_directory}")
+            return None
 
+        return None 
 
-        # Trigger for changing the conversation file
-        _registerCommand("convo::")
-        convo_pattern = r'^convo::|convo:(.*):'
-        match = re.search(convo_pattern, user_input)
-        if match:
-            if match.group(1):
-                convo_name = match.group(1).strip()
-                self.display_convo(convo_name) 
-            else:
-                self.display_convo()
-            return None 
+    # Trigger to list verbal keywords prompts.
+    def command_keywords(self, user_input, match):
+        for keyword in self.audio_triggers:
+            if keyword == 'perifious':
+                continue
+            print(f'trigger: {self.audio_triggers[keyword][0]}')
 
+        return None 
 
-        # Trigger for changing working directory in chat
-        _registerCommand("cd::")
-        cd_pattern = r'^cd::|cd:(.*):'
-        match = re.search(cd_pattern, user_input)
-        if match:
-            if match.group(1):
-                requested_directory = match.group(1).strip()
+    # Trigger for extract:: processing.
+    def command_extract(self, user_input, match):
+        file_path = None
+        content = None
+        if match.group(1):
+            file_path = match.group(1)
+            screenshot_pattern = r'^screenshot$'
+            if re.search(screenshot_pattern, file_path):
+                file_path = capture_screen()
+                index = True
+
+        if match.group(2):
+            reindex = match.group(2)
+            if reindex.lower() == ("1" or "true"):
+                reindex = True
             else:
-                requested_directory = '~'
+                reindex = False
 
-            if requested_directory == '-':
-                requested_directory = self.previous_directory
+        if file_path is None:
+            file_path = self.file_selector()
 
-            requested_directory = os.path.abspath(os.path.expanduser(requested_directory))
-            if os.path.exists(requested_directory):
-                self.previous_directory = self.working_directory
-                self.working_directory = requested_directory 
-                os.chdir(self.working_directory)
-            else:
-                log(f"Directory does not exit: {requested_directory}")
-                return None
+        file_path = os.path.expanduser(file_path)
 
-            return None 
+        if os.path.isfile(file_path):
+            metadata, content = inspect_file(file_path)
 
+            if content:
+                metadata["contents"] = content
 
-        # Trigger to list verbal keywords prompts.
-        _registerCommand("keywords::")
-        keywords_pattern = r'^keywords::'
-        match = re.search(keywords_pattern, user_input)
-        if match:
-            for keyword in self.audio_triggers:
-                if keyword == 'perifious':
-                    continue
-                print(f'trigger: {self.audio_triggers[keyword][0]}')
+            self.memory.create("extract_command", metadata)
+        else:
+            log(f"Invalid file: {file_path}")
+
+        log(f"File details stored: key: extract_command")
+        return None 
+
+    # Trigger to flush current running conversation from memory.
+    def command_flush(self, user_input, match):
+        self.flush_history()
+        return None 
+
+    # Trigger for history::. Show the history of the messages.
+    def command_history(self, user_input, match):
+        if match.group(1):
+            history_length = int(match.group(1))
+            print(history_length)
+            time.sleep(4)
+        else:
+            history_length = False 
 
-            return None 
+        history = str()
+        for line in self.conversation_history:
+            history += f"role: {line['role']}\n{line['content']}\n"
+            print(f"role: {line['role']}")
+            print(Markdown(line['content']))
+            print()
 
-        # Trigger for extract:: processing.
-        _registerCommand("extract::")
-        summary_pattern = r'^extract::|^extract:(.*):(.*):|^extract:(.*):'
-        match = re.search(summary_pattern, user_input)
-        if match:
-            if match.group(1):
-                file_path = match.group(1)
-                screenshot_pattern = r'^screenshot$'
-                if re.search(screenshot_pattern, file_path):
-                    file_path = capture_screen()
-                    index = True
-
-            if match.group(2):
-                reindex = match.group(2)
-                if reindex.lower() == ("1" or "true"):
-                    reindex = True
-                else:
-                    reindex = False
+        return None
 
-            if file_path is None:
-                file_path = self.file_selector()
+    # Trigger for code:: extraction from provided text
+    def command_code(self, user_input, match):
+        log(f"Disabled...")
+        return None
+        codeRun = False
+        if match.group(1):
+            text = match.group(1)
+            codeidentify = CodeIdentifier.analyze(text)
+            print(codeidentify)
+            return
+        else:
+            # process the last conversation message for code to extract
+            last_message = self.conversation_history[-1]
+            print(last_message['content'])
+            codeidentify = codeextract.CodeBlockIdentifier(last_message['content'])
 
-            file_path = os.path.expanduser(file_path)
+        files = codeidentify.process_text()
+        for file in files:
+            print(file)
 
-            if os.path.isfile(file_path):
-                metadata = extract_metadata(file_path)
-                if metadata:
-                    content = extract_text(file_path)
+        if codeRun:
+            pass
 
-                if content:
-                    metadata["contents"] = content
+        return files
 
-                self.memory.create("extract_command", metadata)
-            else:
-                log(f"Invalid file: {file_path}")
+    # Trigger for note:: taking.
+    def command_note(self, user_input, match):
+        if match.group(1):
+            user_input = match.group(1)
 
-            log(f"File details stored: key: extract_command")
-            return None 
+        self.save_note(user_input)
 
+        return None
 
-        # Trigger to flush current running conversation from memory.
-        _registerCommand("flush::")
-        flush_pattern = r'^flush::'
-        match = re.search(flush_pattern, user_input)
-        if match:
-            self.flush_history()
-            return None 
+    # Trigger menu for cli theme change
+    def command_theme(self, user_input, match):
+        if match.group(1):
+            theme_name = match.group(1)
+            prompt_style = self.theme_manager.get_theme(theme_name)
+        else:
+            theme_name, prompt_style = self.theme_manager.select_theme() 
 
-        # Trigger for history::. Show the history of the messages.
-        _registerCommand("history::")
-        history_pattern = r'^history::|^history:(.*):'
-        match = re.search(history_pattern, user_input)
-        if match:
-            if match.group(1):
-                history_length = int(match.group(1))
-                print(history_length)
-                time.sleep(4)
-            else:
-                history_length = False 
-           
-            history = str()
-            for line in self.conversation_history:
-                history += f"role: {line['role']}\n{line['content']}\n"
-                print(f"role: {line['role']}")
-                print(Markdown(line['content']))
-                print()
+        self.ps.style = prompt_style
+        self.settings['theme'] = theme_name
+        self.save_settings()
 
-            return None
+        return None 
 
+    # trigger terminal image rendering view::
+    def command_view(self, user_input, match):
+        file_path = None
+        if match.group(1):
+            file_path = match.group(1)
+        else:
+            file_path = self.file_selector('File name:')
+            #file_path = self.file_browser()
 
-        # Trigger for code:: extraction from provided text
-        _registerCommand("code::")
-        code_pattern = r'code::|code:(.*):'
-        match = re.search(code_pattern, user_input)
-        if match:
-            log(f"Disabled...")
+        file_path = clean_path(file_path)
+        if is_image(file_path):
+            content = imageToAscii(file_path)
+            p(content)
             return None
-            codeRun = False
-            if match.group(1):
-                text = match.group(1)
-                codeidentify = CodeIdentifier.analyze(text)
-                print(codeidentify)
-                return
+        elif is_url(file_path):
+            import symbiote.sym_crawler as webcrawler
+            crawler = webcrawler.WebCrawler(browser='chrome')
+            pages = crawler.pull_website_content(
+                    file_path, search_term=None,
+                    crawl=False, depth=None
+                )
+            crawler.close()
+            if pages:
+                content = ""   
+                css = ""
+                script = ""
+                link_list = []
+                for md5, item in pages.items():
+                    content += item['content']
+                    link_list = link_list + item['links']
+                    css += "\n".join(item['css'])
+                    script += "\n".join(item['scripts'])
+                links = "\n".join(link_list)
             else:
-                # process the last conversation message for code to extract
-                last_message = self.conversation_history[-1]
-                print(last_message['content'])
-                codeidentify = codeextract.CodeBlockIdentifier(last_message['content'])
-
-            files = codeidentify.process_text()
-            for file in files:
-                print(file)
+                log(f"No content gathered for {url}")
+                return None
+        else:
+            content = extract_text(file_path)
+            print(content)
 
-            if codeRun:
-                pass
+        return None
 
-            return files
+    # Trigger image analysis and reporting analyse_image::
+    def command_analyze_image(self, user_input, match):
+        if match.group(1):
+            image_path = match.group(1)
+        else:
+            #image_path = self.file_selector('Image path:')
+            image_path = self.file_browser()
+            image_path = os.path.expanduser(image_path)
+            image_path = os.path.abspath(image_path)
 
+        self.spinner.start()
+        import symbiote.ImageAnalysis as ia
+        extractor = ia.ImageAnalyzer(detection=True, extract_text=True, backend='mtcnn') 
+        results = extractor.analyze_images(image_path, mode='none')
+        self.spinner.succeed('Completed')
+        human_readable = extractor.render_human_readable(results)
+        print(human_readable)
 
-        # Trigger for note:: taking.
-        _registerCommand("note::")
-        note_pattern = r'^note::|^note:([\s\S]*?):'
-        match = re.search(note_pattern, user_input)
-        if match:
-            if match.group(1):
-                user_input = match.group(1)
+        content = f"Analyze the following details collected about the image or images and summarize the details.\n{human_readable}\n"
 
-            self.save_conversation(user_input, self.settings['notes'])
+        return content
 
+    # Trigger to find files by search find::
+    def command_find(self, user_input, match):
+        if match.group(1):
+            pattern = match.group(1)
+            result = self.find_files(pattern)
             return None
 
+        result = self.find_files()   
 
-        # Trigger menu for cli theme change
-        _registerCommand("theme::")
-        theme_pattern = r'theme::|theme:(.*):'
-        match = re.search(theme_pattern, user_input)
-        if match:
-            if match.group(1):
-                theme_name = match.group(1)
-                prompt_style = self.theme_manager.get_theme(theme_name)
-            else:
-                theme_name, prompt_style = self.theme_manager.select_theme() 
-
-            self.ps.style = prompt_style
-            self.settings['theme'] = theme_name
-            self.save_settings()
-
-            return None 
-
+        return None
 
-        # trigger terminal image rendering view:: 
-        _registerCommand("view::")
-        view_pattern = r'view::|^view:(.*):|^view:(https?:\/\/\S+):'
-        match = re.search(view_pattern, user_input)
+    # Trigger to init scrolling
+    def command_scroll(self, user_input, match):
         file_path = None
+        if match.group(1):
+            file_path = match.group(1)
 
-        if match:
-            if match.group(1):
-                file_path = match.group(1)
-            else:
-                file_path = self.file_selector('File name:')
-                #file_path = self.file_browser()
-
-            file_path = clean_path(file_path)
-            if is_image(file_path):
-                content = imageToAscii(file_path)
-                p(content)
-                return None
-            elif is_url(file_path):
-                import symbiote.sym_crawler as webcrawler
-                crawler = webcrawler.WebCrawler(browser='chrome')
-                pages = crawler.pull_website_content(
-                        file_path, search_term=None,
-                        crawl=False, depth=None
-                    )
-                crawler.close()
-                if pages:
-                    content = ""   
-                    css = ""
-                    script = ""
-                    link_list = []
-                    for md5, item in pages.items():
-                        content += item['content']
-                        link_list = link_list + item['links']
-                        css += "\n".join(item['css'])
-                        script += "\n".join(item['scripts'])
-                    links = "\n".join(link_list)
-                else:
-                    log(f"No content gathered for {url}")
-                    return None
-            else:
-                content = extract_text(file_path)
-                print(content)
+        #file_path = self.file_selector("File name:")
+        file_path = self.file_browser()
+        print(file_path)
 
+        if file_path is None:
             return None
 
+        file_path = os.path.expanduser(file_path)
+        absolute_path = os.path.abspath(file_path)
 
-        # Trigger image analysis and reporting analyse_image::
-        _registerCommand("analyze_image::")
-        analyze_image_pattern = r'^analyze_image::|^analyze_image:(.*):'
-        match = re.search(analyze_image_pattern, user_input)
+        scroll_content(absolute_path)
 
-        if match:
-            if match.group(1):
-                image_path = match.group(1)
-            else:
-                #image_path = self.file_selector('Image path:')
-                image_path = self.file_browser()
-                image_path = os.path.expanduser(image_path)
-                image_path = os.path.abspath(image_path)
-
-            self.spinner.start()
-            import symbiote.ImageAnalysis as ia
-            extractor = ia.ImageAnalyzer(detection=True, extract_text=True, backend='mtcnn') 
-            results = extractor.analyze_images(image_path, mode='none')
-            self.spinner.succeed('Completed')
-            human_readable = extractor.render_human_readable(results)
-            print(human_readable)
-
-            content = f"Analyze the following details collected about the image or images and summarize the details.\n{human_readable}\n"
-
-            return content
-
-
-        # Trigger to find files by search find::
-        _registerCommand("find::")
-        find_pattern = r'^find::|^find:(.*):'
-        match = re.search(find_pattern, user_input)
-        if match:
-            if match.group(1):
-                pattern = match.group(1)
-                result = self.find_files(pattern)
-                return None
+        return None
 
-            result = self.find_files()   
+    # Trigger for wikipedia search wiki::
+    def command_wiki(self, user_input, match):
+        if match.group(1):
+            import symbiote.Wikipedia as wikipedia
+            wiki = wikipedia.WikipediaSearch()
+            search_term = match.group(1)
+            results = wiki.search(search_term, 5)
+            results_str = str()
+            for result in results:
+                results_str += result['text']
+
+            print(Panel(Text(results_str[:8000]), title=f"Wikipedia: {search_term}"))
+            content = f"wikipedia search\n"
+            content += '\n```\n{}\n```\n'.format(results_str)
+            user_input = user_input[:match.start()] + content + user_input[match.end():]
 
+            return user_input
+        else:
+            log("No search term provided.")
             return None
 
+    # Trigger for headline analysis
+    def command_news(self, user_input, match):
+        import symbiote.headlines as hl
+        gh = hl.getHeadlines()
+        result = gh.scrape()
+        print(Panel(Text(result), title=f"News Headlines"))
+        content = f"Consolidate and summarize the following.\n"
+        content += '\n```\n{}\n```\n'.format(result)
+        user_input = user_input[:match.start()] + content + user_input[match.end():]
 
-        # Trigger to init scrolling
-        _registerCommand("scroll::")
-        scroll_pattern = r'scroll::|scroll:(.*):'
-        match = re.search(scroll_pattern, user_input)
-        if match:
-            file_path = None
-            if match.group(1):
-                file_path = match.group(1)
+        return user_input
 
-            #file_path = self.file_selector("File name:")
-            file_path = self.file_browser()
-            print(file_path)
+    # Trigger for google search or dorking
+    def command_google(self, user_input, match):
+        from symbiote.sym_google import GoogleSearch
+        if match.group(1):
+            search_term = match.group(1)
+        else:
+            search_term = get_display_text("Search term>")
 
-            if file_path is None:
-                return None
+        if not search_term:
+            log("No search term provided.")
+            return None
+        else:
+            search = GoogleSearch()
+            search_results = search.google_search(search_term)
+            search.display_google_search_results(search_results)
+            self.memory.create(
+                    "google_command",
+                    search_results
+                )
+
+
+            log(f"Results saved to memory key:google_")
+            return None
 
-            file_path = os.path.expanduser(file_path)
-            absolute_path = os.path.abspath(file_path)
+    # Trigger for define::
+    def command_define(self, user_input, match):
+        if match.group(1):
+            term = match.group(1)
+            user_input = f"Provide detailed definition for the word {term}" 
 
-            scroll_content(absolute_path)
+            return user_input
 
+    # Trigger for imap mail checker mail::
+    def command_mail(self, user_input, match):
+        import symbiote.GetEmail as mail
+        mail_checker = mail.MailChecker(
+                username=self.settings['imap_username'],
+                password=self.settings['imap_password'],
+                mail_type='imap',
+                days=2,
+                unread=False,
+                #model=self.settings['model'],
+                model=None,
+                )
+        email = mail_checker.check_mail()
+
+        content = [] 
+        for key, val in enumerate(email):
+            content.append(f"Message: {key}")
+            content.append(f"\tDate: {val['date']}")
+            content.append(f"\tFrom: {val['from']}")
+            content.append(f"\tTo: {val['to']}")
+            content.append(f"\tSubject: {val['subject'][:30]}")
+            #content.append(f"\tBody Size: {len(val['body'])} chars")
+            content.append("")
+            #content.append(f"\tBody:\n\t\t{val['body'][:]}\n")
+
+        content = "\n".join(content)
+
+        if email is None:
+            log(f"No emails to analyze.")
             return None
 
+        review = json.dumps(email)
+        prompt = f"Create a report from the following in a nice format."
+        review = f"{prompt}\n```json\n{review}\n```\n"
+        print(Panel(Text(content), title=f"Emails: {self.settings['imap_username']}"))
+        print()
+        user_input = user_input[:match.start()] + review + user_input[match.end():]
 
-        # Trigger for wikipedia search wiki::
-        _registerCommand("wiki::")
-        wiki_pattern = r'wiki:(.*):'
-        match = re.search(wiki_pattern, user_input)
-        if match:
-            if match.group(1):
-                import symbiote.Wikipedia as wikipedia
-                wiki = wikipedia.WikipediaSearch()
-                search_term = match.group(1)
-                results = wiki.search(search_term, 5)
-                results_str = str()
-                for result in results:
-                    results_str += result['text']
-
-                print(Panel(Text(results_str[:8000]), title=f"Wikipedia: {search_term}"))
-                content = f"wikipedia search\n"
-                content += '\n```\n{}\n```\n'.format(results_str)
-                user_input = user_input[:match.start()] + content + user_input[match.end():]
+        return user_input
 
-                return user_input
-            else:
-                log("No search term provided.")
-                return None
-
-
-        # Trigger for headline analysis
-        _registerCommand("news::")
-        _registerCommand("headlines::")
-        news_pattern = r'\bnews::|\bheadlines::'
-        match = re.search(news_pattern, user_input)
-        if match:
-            import symbiote.headlines as hl
-            gh = hl.getHeadlines()
-            result = gh.scrape()
-            print(Panel(Text(result), title=f"News Headlines"))
-            content = f"Consolidate and summarize the following.\n"
-            content += '\n```\n{}\n```\n'.format(result)
-            user_input = user_input[:match.start()] + content + user_input[match.end():]
-
-            return user_input
+    # Trigger for w3m web browser functionality browser::
+    def command_w3m(self, user_input, match):
+        if match.group(1):
+            url = match.group(1)
+            self.open_w3m(url)
+        else:
+            self.open_w3m()
 
+        return None
 
-        # Trigger for google search or dorking
-        _registerCommand("google::")
-        google_pattern = r'google:(.*):'
-        match = re.search(google_pattern, user_input)
-        if match:
-            from symbiote.sym_google import GoogleSearch
-            if match.group(1):
-                search_term = match.group(1)
-            else:
-                search_term = get_display_text("Search term>")
+    # Trigger to extract images from a url image_extract::
+    def command_image_extract(self, user_input, match):
+        if match.group(1):
+            url = match.group(1)
+            self.url_image_extract(url)
+        else:
+            log('No url specified.')
 
-            if not search_term:
-                log("No search term provided.")
-                return None
-            else:
-                search = GoogleSearch()
-                search_results = search.google_search(search_term)
-                search.display_google_search_results(search_results)
-                self.memory.create(
-                        "google_command",
-                        search_results
-                    )
+        return None
 
+    # Trigger for qr code generation qr::
+    def command_qr(self, user_input, match):
+        if match.group(1):
+            content = match.group(1)
+            self.generate_qr_terminal(content)
+        else:
+            log("No content provided for the qr.")
 
-                log(f"Results saved to memory key:google_")
-                return None
+        return None
 
-        # Trigger for define::
-        _registerCommand("define::")
-        define_pattern = r'define:(.*):'
-        match = re.search(define_pattern, user_input)
-        if match:
-            if match.group(1):
-                term = match.group(1)
-                user_input = f"Provide detailed definition for the word {term}" 
+    # Trigger for weather::
+    def command_weather(self, user_input, match):
+        if match.group(1):
+            location = match.group(1)
+        else:
+            location = self.settings['location']
 
-                return user_input
+        if location is None:
+            log("No location set in settings::")
+            return None
 
+        result = self.get_weather(location)
 
-        # Trigger for imap mail checker mail::
-        _registerCommand("mail::")
-        mail_pattern = r'mail::'
-        match = re.search(mail_pattern, user_input)
-        if match:
-            import symbiote.GetEmail as mail
-            mail_checker = mail.MailChecker(
-                    username=self.settings['imap_username'],
-                    password=self.settings['imap_password'],
-                    mail_type='imap',
-                    days=2,
-                    unread=False,
-                    #model=self.settings['model'],
-                    model=None,
-                    )
-            email = mail_checker.check_mail()
-
-            content = [] 
-            for key, val in enumerate(email):
-                content.append(f"Message: {key}")
-                content.append(f"\tDate: {val['date']}")
-                content.append(f"\tFrom: {val['from']}")
-                content.append(f"\tTo: {val['to']}")
-                content.append(f"\tSubject: {val['subject'][:30]}")
-                #content.append(f"\tBody Size: {len(val['body'])} chars")
-                content.append("")
-                #content.append(f"\tBody:\n\t\t{val['body'][:]}\n")
-
-            content = "\n".join(content)
-
-            if email is None:
-                log(f"No emails to analyze.")
-                return None
+        if result is None:
+            log(f"Unable to get weather for {location}")
+            return None
 
-            review = json.dumps(email)
-            prompt = f"Create a report from the following in a nice format."
-            review = f"{prompt}\n```json\n{review}\n```\n"
-            print(Panel(Text(content), title=f"Emails: {self.settings['imap_username']}"))
-            print()
-            user_input = user_input[:match.start()] + review + user_input[match.end():]
+        weather = json.dumps(result['current_condition'], indent=4) 
+        self.memory.create("weather_command", weather)
 
-            return user_input
+        print(Panel(Text(weather), title=f"Weather: {location}"))
+        if self._check_command(user_input) is None:
+            log(f"Results written to history")
+            self.writeHistory("user", weather)
+            return None
 
+        content = f"Analyze the following weather details and provide a well formatted weather report for {location}.\n```json\n{weather}```"
+        user_input = user_input[:match.start()] + content + user_input[match.end():]
 
-        # Trigger for w3m web browser functionality browser::
-        _registerCommand("w3m::")
-        _registerCommand("browser::")
-        browser_pattern = r'w3m:(.*):|browser:(.*):'
-        match = re.search(browser_pattern, user_input)
-        if match:
-            if match.group(1):
-                url = match.group(1)
-                self.open_w3m(url)
-            else:
-                self.open_w3m()
+        return user_input
 
-            return None
+    # Trigger for inspect:: command to inspect running python objects.
+    def command_inspect(self, user_input, match):
+        if match.group(1):
+            obj = match.group(1)
+        else:
+            all_objs = list({**globals(), **locals()}.keys())
+            obj = self.list_selector("Objects:", all_objs)
 
+        if obj:
+            inspector = Inspect(obj)
+            report = inspector.generate_report(output='render')
+            content = json.dumps(report, indent=4)
+            self.memory.create("inspect_command", content)
 
-        # Trigger to extract images from a url image_extract::
-        _registerCommand("image_extract::")
-        image_extract_pattern = r'^image_extract:(.*):'
-        match = re.search(image_extract_pattern, user_input)
-        if match:
-            if match.group(1):
-                url = match.group(1)
-                self.url_image_extract(url)
-            else:
-                log('No url specified.')
+            if self._check_command(user_input) is None:
+                log(f"Results written to history")
+                self.writeHistory("user", content)
+                return None
 
-            return None
+            del inspector 
+        else:
+            log(f"No object selected.")
 
+        return None
 
-        # Trigger for qr code generation qr::
-        _registerCommand("qr::")
-        qr_pattern = r"qr:(.*):"
-        match = re.search(qr_pattern, user_input)
-        if match:
-            if match.group(1):
-                content = match.group(1)
-                self.generate_qr_terminal(content)
-            else:
-                log("No content provided for the qr.")
+    # Trigger for memget:: management
+    def command_memget(self, user_input, match):
+        json_dat = None
+        if match.group(1):
+            getobj = match.group(1)
+        else:
+            getobj = self.text_prompt("Object>") 
 
+        if getobj is None or getobj == "":
+            log(f"Empty object requeted.")
             return None
 
-        
-        # Trigger for weather::
-        _registerCommand("weather::")
-        weather_pattern = r"weather::|weather:(.*):"
-        match = re.search(weather_pattern, user_input)
-        if match:
-            if match.group(1):
-                location = match.group(1)
-            else:
-                location = self.settings['location']
+        results = self.memory.read(getobj, materialized=True)
 
-            if location is None:
-                log("No location set in settings::")
-                return None
-
-            result = self.get_weather(location)
-
-            if result is None:
-                log(f"Unable to get weather for {location}")
-                return None
+        if isinstance(results, str):
+            json_data = results
+        else:
+            json_data = json.dumps(results, indent=4)
 
-            weather = json.dumps(result['current_condition'], indent=4) 
-            self.memory.create("weather_command", weather)
+        if json_data:
+            print(Panel(Text(json_data[:5000]), title=f"Content: {getobj}"))
 
-            print(Panel(Text(weather), title=f"Weather: {location}"))
-            if _checkCommand(user_input) is None:
+            if self._check_command(user_input) is None:
                 log(f"Results written to history")
-                self.writeHistory("user", weather)
+                self.writeHistory("user", json_data)
                 return None
 
-            content = f"Analyze the following weather details and provide a well formatted weather report for {location}.\n```json\n{weather}```"
+            content = f"\n```\n{json_data}\n```"
             user_input = user_input[:match.start()] + content + user_input[match.end():]
 
             return user_input
 
-        
-        # Trigger for inspect:: command to inspect running python objects.
-        _registerCommand("inspect::")
-        inspect_pattern = r'inspect::|inspect:(.*):'
-        match = re.search(inspect_pattern, user_input)
-        if match:
-            if match.group(1):
-                obj = match.group(1)
-            else:
-                all_objs = list({**globals(), **locals()}.keys())
-                obj = self.list_selector("Objects:", all_objs)
+        return None
 
-            if obj:
-                inspector = Inspect(obj)
-                report = inspector.generate_report(output='render')
-                content = json.dumps(report, indent=4)
-                self.memory.create("inspect_command", content)
+    # Trigger for memory:: management
+    def command_memory(self, user_input, match):
+        if match.group(1):
+            info = match.group(1)
 
-                if _checkCommand(user_input) is None:
-                    log(f"Results written to history")
-                    self.writeHistory("user", content)
-                    return None
-
-                del inspector 
-            else:
-                log(f"No object selected.")
+        inspect(self.memory)
+        return None
 
-            return None
+    # Trigger for search:: on memory
+    def command_search(self, user_input, match):
+        if match.group(1):
+            search_term = match.group(1)
+        else:
+            search_term = self.text_prompt("Search term|regex>") 
 
+        text_result = self.get_search_results(search_term)
 
-        # Trigger for memget:: management
-        _registerCommand("memget::")
-        memget_pattern = r"memget::|memget:(.*):"
-        match = re.search(memget_pattern, user_input)
-        if match:
-            json_dat = None
-            if match.group(1):
-                getobj = match.group(1)
+        if text_result:
+            self.memory.create("search_command", text_result)
+            if self._check_command(user_input) is None:
+                log(f"Results written to history")
+                self.writeHistory("user", text_result)
+                return None
             else:
-                getobj = self.text_prompt("Object>") 
+                content = f"```json\n{text_result}\n```"
+                user_input = user_input[:match.start()] + content + user_input[match.end():]
+                return user_input
 
-            if getobj is None or getobj == "":
-                log(f"Empty object requeted.")
-                return None
+        return None
 
-            results = self.memory.read(getobj)
+    # Trigger for index:path: document indexing
+    def command_index(self, user_input, match):
+        if match.group(1):
+            path = match.group(1)
+        else:
+            path = self.file_selector('Path to index:')
 
-            if isinstance(results, str):
-                json_data = results
-            else:
-                json_data = json.dumps(results, indent=4)
+        path = clean_path(path) if path else None
+        if path is None:
+            log(f"No such file or directory.")
+            return None
 
-            if json_data:
-                print(Panel(Text(json_data[:5000]), title=f"Content: {getobj}"))
+        job = current_job()
+        def progress(stats):
+            if job is not None:
+                job.update(stats.summary())
 
-                if _checkCommand(user_input) is None:
-                    log(f"Results written to history")
-                    self.writeHistory("user", json_data)
-                    return None
+        create_index(path, progress=progress, cancelled=job.cancelled if job is not None else None)
+        return None
 
-                content = f"\n```\n{json_data}\n```"
-                user_input = user_input[:match.start()] + content + user_input[match.end():]
+    # Trigger for index_search:query: on the document index
+    def command_index_search(self, user_input, match):
+        if match.group(1):
+            query = match.group(1)
+        else:
+            query = self.text_prompt("Index query>")
 
-                return user_input
+        if not query:
+            return None
+
+        display_documents(iter_search(query))
+        return None
 
+    # Trigger for jobs:: listing and jobs:cancel <id>:
+    def command_jobs(self, user_input, match):
+        if match.group(1):
+            args = match.group(1).split()
+            if len(args) == 2 and args[0] == "cancel" and args[1].isdigit():
+                job = self.jobs.cancel(int(args[1]))
+                if job is None:
+                    log(f"No such job: {args[1]}")
+                else:
+                    log(f"Job {job.id} {job.status}")
+            else:
+                log(f"Usage: jobs:: or jobs:cancel <id>:")
             return None
 
+        table = Table(title="Jobs", expand=False)
+        table.add_column("ID", justify="right", style="gold1")
+        table.add_column("Command")
+        table.add_column("Status")
+        table.add_column("Progress")
+        table.add_column("Elapsed", justify="right")
+        table.add_column("Memory key")
+        for job in self.jobs.jobs.values():
+            table.add_row(str(job.id), f"{job.name}::", job.status, str(job.progress),
+                          f"{job.elapsed():.1f}s", job.memory_key if job.result else "")
 
-        # Trigger for memory:: management
-        _registerCommand("memory::")
-        memory_pattern = r"^memory::|^memory:(.*):"
-        match = re.search(memory_pattern, user_input)
-        if match:
-            if match.group(1):
-                info = match.group(1)
+        print(table)
+        return None
 
-            inspect(self.memory)
+    # Trigger for cache:: statistics and cache:clear:
+    def command_cache(self, user_input, match):
+        cache = get_extract_cache()
+        if cache is None:
+            log(f"Extraction cache is not enabled.")
             return None
 
-        
-        # Trigger for search:: on memory 
-        _registerCommand("search::")
-        search_pattern = r"search::|search:(.*):"
-        match = re.search(search_pattern, user_input)
-        if match:
-            if match.group(1):
-                search_term = match.group(1)
+        if match.group(1):
+            if match.group(1).strip() == "clear":
+                cache.clear()
+                log(f"Extraction cache cleared.")
             else:
-                search_term = self.text_prompt("Search term|regex>") 
+                log(f"Usage: cache:: or cache:clear:")
+            return None
 
-            text_result = self.get_search_results(search_term)
+        stats = cache.stats()
+        table = Table(title=f"Extraction cache: {stats['entries']} entries, {stats['size'] / 1048576:.1f} of {stats['max_bytes'] / 1048576:.0f} MB", expand=False)
+        table.add_column("Converter")
+        table.add_column("Hits", justify="right")
+        table.add_column("Misses", justify="right")
+        table.add_column("Hit rate", justify="right")
+        for converter, counts in stats["converters"].items():
+            table.add_row(converter, str(counts["hits"]), str(counts["misses"]), f"{counts['hit_rate']:.0%}")
 
-            if text_result:
-                self.memory.create("search_command", text_result)
-                if _checkCommand(user_input) is None:
-                    log(f"Results written to history")
-                    self.writeHistory("user", text_result)
-                    return None
-                else:
-                    content = f"```json\n{text_result}\n```"
-                    user_input = user_input[:match.start()] + content + user_input[match.end():]
-                    return user_input
+        print(table)
+        return None
 
-            return None
+    # Trigger for toolbar::
+    def command_toolbar(self, user_input, match):
+        content = user_input.split(":")
+        if len(content) > 1:
+            self.live_render_buffer = content[1]
+            self.toolbar_wake.set()
 
-        
-        # Trigger for toolbar::
-        _registerCommand("toolbar::")
-        if user_input.startswith("toolbar:"):
-            content = user_data.split(":")
-            if len(content) > 1:
-                self.live_render_buffer = content[1]
+        return None
 
-            return None
+    # Trigger for file:: processing.
+    def command_file(self, user_input, match):
+        file_path = None
+        content = None
+        metadata = None
+        if match.group(1):
+            file_path = match.group(1)
+        else:
+            #file_path = self.file_browser()
+            file_path = self.file_selector('File name:')
 
-        
-        # Trigger for file:: processing.
-        _registerCommand("file::")
-        file_pattern = r'file::|file:(.*):'
-        match = re.search(file_pattern, user_input)
-        if match: 
-            file_path = None
-            content = None
-            metadata = None
-            if match.group(1):
-                file_path = match.group(1)
-            else:
-                #file_path = self.file_browser()
-                file_path = self.file_selector('File name:')
+        if file_path is None:
+            log(f"No such file or directory: {file_path}")
+            return None 
 
-            if file_path is None:
-                log(f"No such file or directory: {file_path}")
-                return None 
-            
-            file_path = os.path.abspath(os.path.expanduser(file_path))
-
-            if os.path.isfile(file_path):
-                content = extract_text(file_path)
-                metadata = extract_metadata(file_path)
-                ci = CodeIdentifier()
-                code_check = ci.analyze(content)
-                metadata["is_code_file"] = code_check["is_code_file"]
-                metadata["has_code"] = code_check["has_code"]
-
-                if metadata:
-                    self.memory.create("file_command_metadata", metadata)
-                    metadata["readable_strings"] = str(len(metadata["readable_strings"]))
-                    self.display_object(metadata)
-                    log(f"memory key created: file_command_metadataa")
-
-                if content:
-                    self.memory.create("file_command_content", content)
-                    log(f"memory key created: file_command_content")
-
-                if _checkCommand(user_input) is None:
-                    #print(Panel(displayed, title=f"File: {file_path}"))
-                    return None
+        file_path = os.path.abspath(os.path.expanduser(file_path))
 
-                file_content = f'\n```file name: {file_path}\n{content}\n```\n'
-                user_input = user_input[:match.start()] + file_content + user_input[match.end():]
-                return user_input
+        if os.path.isfile(file_path):
+            metadata, content = inspect_file(file_path, max_tokens=self.prompt_budget(), counter=self.token_counter())
+            code_check = CodeIdentifier().analyze_string(content or "")
+            metadata["is_code_file"] = code_check["is_code_file"]
+            metadata["has_code"] = code_check["has_code"]
+
+            if metadata:
+                self.memory.create("file_command_metadata", metadata)
+                self.display_object(metadata)
+                log(f"memory key created: file_command_metadataa")
+
+            if content:
+                self.memory.create("file_command_content", content)
+                log(f"memory key created: file_command_content")
 
-            elif os.path.isdir(file_path):
-                log(f"Directory crawling is temporarily disabled due to memory consumption.")
+            if self._check_command(user_input) is None:
+                #print(Panel(displayed, title=f"File: {file_path}"))
                 return None
-                '''
-                content = extractDirText(file_path)
-                if content is None:
-                    log(f"No content found in directory: {file_path}")
-                    return None
-                print(Panel(display, title=f"Content: {file_path}"))
-                user_input = user_input[:match.start()] + dir_content + user_input[match.end():]
-                '''
-            return None
 
-        
-        # Trigger image:: execution for AI image generation
-        _registerCommand("image::")
-        image_pattern = r'^image:([\s\S]*?):'
-        match = re.search(image_pattern, user_input)
-        if match:
-            if match.group(1):
-                query = match.group(1)
-                self.flux_image_generator(query)
-            else:
-                log(f"No image description provided.")
+            file_content = f'\n```file name: {file_path}\n{content}\n```\n'
+            user_input = user_input[:match.start()] + file_content + user_input[match.end():]
+            return user_input
 
-            return None
+        elif os.path.isdir(file_path):
+            # Files stream in until the prompt's share of the context window is used
+            ingester = DirectoryIngester(
+                    file_path,
+                    counter=self.token_counter(),
+                    max_tokens=self.prompt_budget(),
+                    max_workers=self.settings.get('max_jobs', symbiote_settings['max_jobs'])
+                )
 
-        
-        # Trigger system execution of a command
-        _registerCommand("$")
-        exec_pattern = r'\$:(.*):'
-        match = re.search(exec_pattern, user_input)
-        if match:
-            if match.group(1):
-                command = match.group(1)
-                result = self.exec_command(command)
-
-                if result:
-                    self.memory.create("exec_command", result)
-
-                    if _checkCommand(user_input) is None:
-                        log(f"Results written to history")
-                        self.writeHistory('user', result)
-                        print(Panel(Text(result), title=f"Command: {command}"))
+            job = current_job()
+            dir_content = str()
+            for chunk in ingester:
+                dir_content += chunk
+                if job is not None:
+                    if job.cancelled():
                         return None
+                    job.update(f"{ingester.included} files, {ingester.tokens} tokens")
 
-                    print(Panel(Text(result), title=f"Command: {command}"))
-                    content = f"\n```{command}\n{result}\n```\n"
-                    user_input = user_input[:match.start()] + content + user_input[match.end():]
-                    return user_input
-            else:
-                log(f"No commands specified.")
+            log(f"{ingester.included} files, {ingester.tokens} tokens loaded from {file_path}, {ingester.skipped} without text, {ingester.omitted_count} over the token budget")
+            if not dir_content:
+                log(f"No content found in directory: {file_path}")
                 return None
 
-        
-        # Trigger for getip::
-        _registerCommand("getip::")
-        getip_pattern = r'getip::'
-        match = re.search(getip_pattern, user_input)
-        if match:
-            ipinfo = self.get_network_data()
-            report = self.iface_report(ipinfo)
-            self.memory.create("getip_command", report)
-
-            print(Panel(Text(report), title=f"Network Info:"))
+            self.memory.create("file_command_content", dir_content)
+            log(f"memory key created: file_command_content")
 
-            content = str()
-            content = f"\n```network_info\n{ipinfo}\n```"
-            
-            if _checkCommand(user_input) is None:
-                log(f"Results written to history")
-                self.writeHistory('user', content)
+            if self._check_command(user_input) is None:
                 return None
 
-            user_input = user_input[:match.start()] + content + user_input[match.end():]
-
+            user_input = user_input[:match.start()] + dir_content + user_input[match.end():]
             return user_input
 
-        
-        # Trigger for get:URL processing. Load website content into user_input for model consumption.
-        _registerCommand("get::")
-        get_pattern = r'get::|get:(https?://\S+):'
-        match = re.search(get_pattern, user_input)
-        if match:
-            crawl = False
-            website_content = str() 
-            if match.group(1):
-                url = match.group(1)
-            else:
-                url = self.text_prompt("URL to load:")
-            if url is None:
-                log(f"No URL given: {url}")
-                return None 
+        return None
 
-            log(f"Fetching {url}.")
-            import symbiote.sym_crawler as webcrawler
-            crawler = webcrawler.WebCrawler(browser='chrome')
-            pages = crawler.pull_website_content(url, search_term=None, crawl=crawl, depth=None)
-            crawler.close()
+    # Trigger image:: execution for AI image generation
+    def command_image(self, user_input, match):
+        if match.group(1):
+            query = match.group(1)
+            self.flux_image_generator(query)
+        else:
+            log(f"No image description provided.")
 
-            if pages:
-                content = str()
-                css = str()
-                script = str()
-                links = str()
-                link_list = []
-                for md5, item in pages.items():
-                    content += item['content']
-                    link_list = link_list + item['links']
-                    css += "\n".join(item['css'])
-                    script += "\n".join(item['scripts'])
+        return None
 
-                links += "\n".join(link_list)
-            else:
-                log(f"No content gathered for {url}")
-                return None
+    # Trigger system execution of a command
+    def command_exec(self, user_input, match):
+        if match.group(1):
+            command = match.group(1)
+            result = self.exec_command(command)
 
-            self.memory.create("get_command",
-                               {"content": content,
-                                "links": link_list,
-                                "css": css,
-                                "scripts": script
-                                })
-            content = self.clean_text(content)
-            css = self.clean_text(css)
-            script = self.clean_text(script)
-            #self.web_data_stats(self.memory.read("get_command"))
-            self.display_object(self.memory.read("get_command"))
-            """
-            print(Panel(Text(f"Content: {url}")))
-            print(Text(content[:1000]))
-            print(Panel(Text(f"footer info)")))
-            """
-            '''
-            if css:
-                print(Panel(Text(css[:1000]), title=f"CSS: {url}"))
-            if script:
-                print(Panel(Text(script[:1000]), title=f"Scripts: {url}"))
-            if len(links) > 0:
-                print(Panel(Text(links), title=f"Links: {url}"))
-            '''
-            if _checkCommand(user_input) is None:
-                log(f"Results written to history")
-                self.writeHistory("user", f"URL: {url}\n" + content)
-                return None
-            else:
-                content += f"```URL: {url}\n{content}\n```"
+            if result:
+                self.memory.create("exec_command", result)
+
+                if self._check_command(user_input) is None:
+                    log(f"Results written to history")
+                    self.writeHistory('user', result)
+                    print(Panel(Text(result), title=f"Command: {command}"))
+                    return None
+
+                print(Panel(Text(result), title=f"Command: {command}"))
+                content = f"\n```{command}\n{result}\n```\n"
                 user_input = user_input[:match.start()] + content + user_input[match.end():]
                 return user_input
+        else:
+            log(f"No commands specified.")
+            return None
 
-            return None 
+    # Trigger for getip::
+    def command_getip(self, user_input, match):
+        ipinfo = self.get_network_data()
+        report = self.iface_report(ipinfo)
+        self.memory.create("getip_command", report)
 
-        
-        # Trigger for fake news analysis fake_news::
-        _registerCommand("fake_news::")
-        fake_news_pattern = r'\bfake_news::|\bfake_news:(.*):'
-        match = re.search(fake_news_pattern, user_input)
-        if match:
-            data = None
-            if match.group(1):
-                data = match.group(1)
-            else:
-                data = self.text_prompt("URL or text to analyze:")
+        print(Panel(Text(report), title=f"Network Info:"))
 
-            if data is None:
-                log(f"No data provided.")
-                return None
+        content = str()
+        content = f"\n```network_info\n{ipinfo}\n```"
 
-            self.spinner.start()
-            import symbiote.FakeNewsAnalysis as fake_news
-            detector = fake_news.FakeNewsDetector()
-            if is_url(data):
-                text = detector.download_text_from_url(data)
-            else:
-                text = data
+        if self._check_command(user_input) is None:
+            log(f"Results written to history")
+            self.writeHistory('user', content)
+            return None
 
-            result = detector.analyze_text(text)
-            self.spinner.succeed('Completed')
+        user_input = user_input[:match.start()] + content + user_input[match.end():]
 
-            if result:
-                output = json.dumps(result, indent=4)
-                print(Panel(Text(output), title=f"FakeNew Analysis: {data}"))
-                user_input = f"The following results are from a fake news analyzer.  Analyze the following json document and provide a summary and report of the findings.\n{result}"
-            else:
-                log(f"No results for {data}")
-                return None
-            
+        return user_input
+
+    # Trigger for get:URL processing. Load website content into user_input for model consumption.
+    def command_get(self, user_input, match):
+        crawl = False
+        website_content = str() 
+        if match.group(1):
+            url = match.group(1)
+        else:
+            url = self.text_prompt("URL to load:")
+        if url is None:
+            log(f"No URL given: {url}")
+            return None 
+
+        log(f"Fetching {url}.")
+        import symbiote.sym_crawler as webcrawler
+        crawler = webcrawler.WebCrawler(browser='chrome')
+        pages = crawler.pull_website_content(url, search_term=None, crawl=crawl, depth=None)
+        crawler.close()
+
+        if pages:
+            content = str()
+            css = str()
+            script = str()
+            links = str()
+            link_list = []
+            for md5, item in pages.items():
+                content += item['content']
+                link_list = link_list + item['links']
+                css += "\n".join(item['css'])
+                script += "\n".join(item['scripts'])
+
+            links += "\n".join(link_list)
+        else:
+            log(f"No content gathered for {url}")
+            return None
+
+        self.memory.create("get_command",
+                           {"content": content,
+                            "links": link_list,
+                            "css": css,
+                            "scripts": script
+                            })
+        content = self.clean_text(content)
+        css = self.clean_text(css)
+        script = self.clean_text(script)
+        #self.web_data_stats(self.memory.read("get_command"))
+        self.display_object(self.memory.read("get_command"))
+        """
+        print(Panel(Text(f"Content: {url}")))
+        print(Text(content[:1000]))
+        print(Panel(Text(f"footer info)")))
+        """
+        '''
+        if css:
+            print(Panel(Text(css[:1000]), title=f"CSS: {url}"))
+        if script:
+            print(Panel(Text(script[:1000]), title=f"Scripts: {url}"))
+        if len(links) > 0:
+            print(Panel(Text(links), title=f"Links: {url}"))
+        '''
+        if self._check_command(user_input) is None:
+            log(f"Results written to history")
+            self.writeHistory("user", f"URL: {url}\n" + content)
+            return None
+        else:
+            content += f"```URL: {url}\n{content}\n```"
+            user_input = user_input[:match.start()] + content + user_input[match.end():]
             return user_input
 
-        
-        # Trigger for downloading youtube transcripts yt_transcript::
-        _registerCommand("yt_transcript::")
-        yt_transcript_pattern = r'yt_transcript::|yt_transcript:(.*):'
-        match = re.search(yt_transcript_pattern, user_input)
-        if match:
-            if match.group(1):
-                yt_url = match.group(1)
-            else:
-                yt_url = self.text_prompt("Youtube URL:")
+        return None 
 
-            if yt_url == None:
-                log(f"No transciprts url set.")
-                return None
+    # Trigger for fake news analysis fake_news::
+    def command_fake_news(self, user_input, match):
+        data = None
+        if match.group(1):
+            data = match.group(1)
+        else:
+            data = self.text_prompt("URL or text to analyze:")
 
-            log(f"Fetching youtube transcript from: {yt_url}")
+        if data is None:
+            log(f"No data provided.")
+            return None
 
-            import symbiote.YoutubeUtility as ytutil
-            yt = ytutil.YouTubeUtility(yt_url)
-            transcript = yt.get_transcript()
-            if transcript:
-                print(Panel(Text(transcript), title=f"Transcripts: {yt_url}"))
-                user_input = user_input[:match.start()] + transcript + user_input[match.end():]
-            else:
-                log(f"No transcripts found.")
+        self.spinner.start()
+        import symbiote.FakeNewsAnalysis as fake_news
+        detector = fake_news.FakeNewsDetector()
+        if is_url(data):
+            text = detector.download_text_from_url(data)
+        else:
+            text = data
+
+        result = detector.analyze_text(text)
+        self.spinner.succeed('Completed')
+
+        if result:
+            output = json.dumps(result, indent=4)
+            print(Panel(Text(output), title=f"FakeNew Analysis: {data}"))
+            user_input = f"The following results are from a fake news analyzer.  Analyze the following json document and provide a summary and report of the findings.\n{result}"
+        else:
+            log(f"No results for {data}")
+            return None
+
+        return user_input
+
+    # Trigger for downloading youtube transcripts yt_transcript::
+    def command_yt_transcript(self, user_input, match):
+        if match.group(1):
+            yt_url = match.group(1)
+        else:
+            yt_url = self.text_prompt("Youtube URL:")
+
+        if yt_url == None:
+            log(f"No transciprts url set.")
+            return None
+
+        log(f"Fetching youtube transcript from: {yt_url}")
+
+        import symbiote.YoutubeUtility as ytutil
+        yt = ytutil.YouTubeUtility(yt_url)
+        transcript = yt.get_transcript()
+        if transcript:
+            print(Panel(Text(transcript), title=f"Transcripts: {yt_url}"))
+            user_input = user_input[:match.start()] + transcript + user_input[match.end():]
+        else:
+            log(f"No transcripts found.")
+            return None
+
+        return user_input
+
+    # Trigger web vulnerability scan vscan::
+    def command_vscan(self, user_input, match):
+        if match.group(1):
+            url = match.group(1)
+        else:
+            url = self.text_prompt("URL to scan:")
+
+        if is_url(url):
+            job = current_job()
+            if job is not None:
+                job.update(f"scanning {url}")
+            import symbiote.WebVulnerabilityScan as web_vuln
+            scanner = web_vuln.SecurityScanner(headless=True, browser='chrome')
+            scanner.scan(url)
+            report = scanner.generate_report()
+            self.memory.create("vscan_command", report)
+            print(Panel(Text(report), title=f"Report: {url}"))
+
+            if self._check_command(user_input) is None:
+                log(f"Results written to history")
+                self.writeHistory("user", report)
                 return None
 
+            user_input = user_input[:match.start()] + report + user_input[match.end():]
             return user_input
 
-        
-        # Trigger web vulnerability scan vscan::
-        _registerCommand("vscan::")
-        vscan_pattern = r'vscan::|vscan:(.*):'
-        match = re.search(vscan_pattern, user_input)
-        if match:
-            if match.group(1):
-                url = match.group(1)
-            else:
-                url = self.text_prompt("URL to scan:")
-
-            if is_url(url):
-                import symbiote.WebVulnerabilityScan as web_vuln
-                scanner = web_vuln.SecurityScanner(headless=True, browser='chrome')
-                scanner.scan(url)
-                report = scanner.generate_report()
-                self.memory.create("vscan_command", report)
-                print(Panel(Text(report), title=f"Report: {url}"))
-                
-                if _checkCommand(user_input) is None:
-                    log(f"Results written to history")
-                    self.writeHistory("user", report)
-                    return None
+    # Trigger for textual deception analysis deception::
+    def command_deception(self, user_input, match):
+        analysis_src = None
+        if match.group(1):
+            analysis_src = match.group(1)
+        else:
+            analysis_src = self.text_prompt("Text or URL:")
 
-                user_input = user_input[:match.start()] + report + user_input[match.end():]
-                return user_input
+        if analysis_src == None:
+            log("No content to analyze.")
+            return None
 
-        
-        # Trigger for textual deception analysis deception::
-        _registerCommand("deception::")
-        deception_pattern = r'deception::|deception:(.*):'
-        match = re.search(deception_pattern, user_input)
-        analysis_src = None
-        if match:
-            if match.group(1):
-                analysis_src = match.group(1)
-            else:
-                analysis_src = self.text_prompt("Text or URL:")
+        self.spinner.start()
+        import symbiote.DeceptionDetection as deception
+        detector = deception.DeceptionDetector()
+        results = detector.analyze_text(analysis_src)
+        self.spinner.succeed('Completed')
 
-            if analysis_src == None:
-                log("No content to analyze.")
-                return None
-            
-            self.spinner.start()
-            import symbiote.DeceptionDetection as deception
-            detector = deception.DeceptionDetector()
-            results = detector.analyze_text(analysis_src)
-            self.spinner.succeed('Completed')
-
-            if results:
-                self.memory.create("deception_command", results)
-                content = json.dumps(results, indent=4)
-                print(Panel(Text(content), title=f"Deception Analysis Summary"))
-
-                if _checkCommand(user_input) is None:
-                    log(f"Results written to history")
-                    self.writeHistory("user", content) 
-                    return None
+        if results:
+            self.memory.create("deception_command", results)
+            content = json.dumps(results, indent=4)
+            report = content
+            print(Panel(Text(content), title=f"Deception Analysis Summary"))
 
-                user_input = user_input[:match.start()] + report + user_input[match.end():]
-                return user_input
-            else:
-                log("No results returned.")
+            if self._check_command(user_input) is None:
+                log(f"Results written to history")
+                self.writeHistory("user", content) 
                 return None
 
-        
-        # Trigger for crawl:URL processing. Load website content into user_input for model consumption.
-        _registerCommand("crawl::")
-        crawl_pattern = r'crawl::|crawl:(https?://\S+):'
-        match = re.search(crawl_pattern, user_input)
-        if match:
-            crawl = True
-            website_content = str() 
-            if match.group(1):
-                url = match.group(1)
-            else:
-                url = self.text_prompt("URL to load:")
-            
-            if url == None:
-                log(f"No URL specified.")
-                return None 
+            user_input = user_input[:match.start()] + report + user_input[match.end():]
+            return user_input
+        else:
+            log("No results returned.")
+            return None
 
-            crawler = webcrawler.WebCrawler(browser='chrome')
-            self.spinner.start()
-            pages = crawler.pull_website_content(url, search_term=None, crawl=crawl, depth=None)
-            crawler.close()
-            self.spinner.succeed('Completed')
-            for md5, page in pages.items():
-                content += page['content']
-            print(Panel(Text(content), title=f"Content: {url}"))
-            user_input = user_input[:match.start()] + content + user_input[match.end():]
-            print()
-            return user_input 
+    # Trigger for crawl:URL processing. Load website content into user_input for model consumption.
+    def command_crawl(self, user_input, match):
+        crawl = True
+        website_content = str() 
+        if match.group(1):
+            url = match.group(1)
+        else:
+            url = self.text_prompt("URL to load:")
 
-        
-        # Catchall for stray command entries. 
-        catchall_pattern = r"^.*::?$"
-        if re.search(catchall_pattern, user_input):
-            log(f"Unknown command: {user_input}")
-            return None
+        if url == None:
+            log(f"No URL specified.")
+            return None 
 
-        return user_input
+        job = current_job()
+        if job is not None:
+            job.update(f"crawling {url}")
+
+        import symbiote.sym_crawler as webcrawler
+        crawler = webcrawler.WebCrawler(browser='chrome')
+        if job is not None:
+            crawler.should_stop = job.cancelled
+        self.spinner.start()
+        pages = crawler.pull_website_content(url, search_term=None, crawl=crawl, depth=None)
+        crawler.close()
+        self.spinner.succeed('Completed')
+        if job is not None:
+            if job.cancelled():
+                return None
+            job.update(f"{len(pages)} pages")
+        for md5, page in pages.items():
+            website_content += page['content']
+        print(Panel(Text(website_content), title=f"Content: {url}"))
+        user_input = user_input[:match.start()] + website_content + user_input[match.end():]
+        print()
+        return user_input 
 
 
     def save_settings(self):
@@ -2277,36 +2228,77 @@ class SymSession():
         except re.error:
             log("Invalid regex pattern!")
 
-    def load_conversation(self):
-        return
-        self.conversations_file = conversations_file
-        data = []
+    def load_conversation(self, conversations_file):
+        ''' Open a conversation log and load its most recent turns into the history '''
+        with self.conversation_history.lock:
+            return self._load_conversation(conversations_file)
 
-        if os.path.exists(self.conversations_file):
-            try:
-                with open(conversations_file, 'r') as file:
-                    for line in file:
-                        data.append(json.loads(line))
+    def _load_conversation(self, conversations_file):
+        if self.conversation_store is not None:
+            self.conversation_store.close()
+            self.conversation_store = None
 
-            except Exception as e:
-                log("Error: opening %s: %s" % (conversations_file, e))
-                sys.exit(10)
+        self.conversation_history.clear()
+        if conversations_file == '/dev/null':
+            return []
+
+        try:
+            self.conversation_store = ConversationStore(
+                    conversations_file,
+                    flush_interval=self.settings.get('convo_fsync_interval', symbiote_settings['convo_fsync_interval'])
+                )
+        except Exception as e:
+            log("Error: opening %s: %s" % (conversations_file, e))
+            return []
+
+        # Only the newest turns that fit the context budget are read
+        context_window = self.settings.get('context_window', symbiote_settings['context_window'])
+        reply_tokens = self.settings.get('reply_tokens', symbiote_settings['reply_tokens'])
+        data = self.conversation_store.tail(
+                count=self.settings.get('convo_tail', symbiote_settings['convo_tail']),
+                max_tokens=context_window - reply_tokens,
+                counter=self.token_counter(),
+            )
+
+        # Records with another role, e.g. notes written by older versions
+        # with the note as the role, would be rejected by the provider
+        data = [entry for entry in data if entry.get('role') in chat_roles]
+        for entry in data:
+            self.conversation_history.append({"role": entry['role'], "content": entry['content']})
 
         return data
 
     def save_conversation(self, role, text):
         ''' Save conversation output to loaded conversation file '''
+        if self.conversation_store is None:
+            return
+
         json_conv = {
                 "epoch": time.time(),
                 "role": role,
                 "content": text 
                 }
 
-        jsonl_string = json.dumps(json_conv)
+        self.conversation_store.append(json_conv)
 
-        with open(self.conversations_file, 'a+') as file:
-            #json.dump(data, file, indent=2)
-            file.write(jsonl_string + "\n")
+    def save_note(self, text):
+        ''' Append a note to the notes file, a conversation log that can be loaded like the others '''
+        notes_file = self.settings['notes']
+        json_note = {
+                "epoch": time.time(),
+                "role": "user",
+                "content": text
+                }
+
+        if self.conversation_store is not None and self.conversation_store.path == notes_file:
+            self.conversation_store.append(json_note)
+            return
+
+        store = ConversationStore(notes_file)
+        try:
+            store.append(json_note)
+        finally:
+            store.close()
 
     def estimate_token_count(self, text):
         """
@@ -2320,10 +2312,20 @@ class SymSession():
         256,000 tokens	 1,024,000 characters	Very large datasets, multi-book volumes, or thorough archive analysis.
         512,000 tokens	 2,048,000 characters	Collections of books or structured data, such as encyclopedias.
         1,000,000 tokens 4,000,000 characters	Massive corpora, extensive archives, or enterprise-scale datasets.
-        On average a token = 4 characters
+        On average a token = 4 characters, the tokenizer for the current
+        model gives the real count when its vocab file is available.
         """
-        token_count = len(text)
-        return round(token_count)
+        return self.token_counter().count(text)
+
+    def prompt_budget(self):
+        ''' Tokens left for new prompt content after the history and the reply '''
+        context_window = self.settings.get('context_window', symbiote_settings['context_window'])
+        reply_tokens = self.settings.get('reply_tokens', symbiote_settings['reply_tokens'])
+        return max(context_window - reply_tokens - self.conversation_history.total_tokens, 0)
+
+    def token_counter(self):
+        tokenizer_files = self.settings.get('tokenizer_files', symbiote_settings['tokenizer_files'])
+        return get_counter(self.settings['model'], tokenizer_files)
 
     def clean_text(self, text):
         # Remove leading and trailing whitespace
@@ -2643,7 +2645,7 @@ class SymSession():
             raise Exception(f"Failed to fetch the webpage: {response.status_code}")
 
         # Parse the HTML content using BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = bs4.BeautifulSoup(response.content, 'html.parser')
 
         # Find all image tags
         img_tags = soup.find_all('img')
@@ -2810,7 +2812,7 @@ class SymSession():
         return app.run()
 
     def flush_history(self):
-        self.conversation_history = []
+        self.conversation_history.clear()
         self.current_conversation = []
         return
 
@@ -3308,6 +3310,8 @@ class SymSession():
                 #return render_list(value)
             elif isinstance(value, str):
                 return value[:1000] + "..." if len(value) > 1000 else value
+            elif isinstance(value, BlobView):
+                return value.preview(1000)
             elif value is None:
                 return "None"
             else:
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+#
+# sym_tokenizer.py
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from rich.console import Console
+console = Console()
+print = console.print
+log = console.log
+
+# Offline vocab files used to count tokens for each provider prefix.  A
+# .tiktoken file is a BPE rank file, .model a SentencePiece model and .json a
+# huggingface tokenizer.json.  When a file or its library is missing the
+# character heuristic is used instead.
+default_vocab_dir = os.path.join(os.getenv('HOME'), ".symbiote", "tokenizers")
+default_vocab_files = {
+        "openai": "o200k_base.tiktoken",
+        "ollama": "tokenizer.json",
+        "groq": "tokenizer.json",
+    }
+
+# Pre-tokenization split of each BPE file, by file name without extension.
+# Counts are only right with the split the ranks were trained on.
+r50k_split_pattern = r"""'(?:[sdmt]|ll|ve|re)| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+cl100k_split_pattern = r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+o200k_split_pattern = "|".join([
+        r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+        r"""[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?""",
+        r"""\p{N}{1,3}""",
+        r""" ?[^\s\p{L}\p{N}]+[\r\n/]*""",
+        r"""\s*[\r\n]+""",
+        r"""\s+(?!\S)""",
+        r"""\s+""",
+    ])
+bpe_split_patterns = {
+        "r50k_base": r50k_split_pattern,
+        "p50k_base": r50k_split_pattern,
+        "p50k_edit": r50k_split_pattern,
+        "cl100k_base": cl100k_split_pattern,
+        "o200k_base": o200k_split_pattern,
+        "o200k_harmony": o200k_split_pattern,
+    }
+
+def bpe_split_pattern(vocab_file):
+    ''' The split pattern for a .tiktoken file, cl100k's for names not known '''
+    name = os.path.splitext(os.path.basename(vocab_file))[0]
+    return bpe_split_patterns.get(name, cl100k_split_pattern)
+
+class CharTokenizer:
+    """ Character heuristic, roughly four characters to a token for English. """
+    name = "chars/4"
+
+    def __init__(self, chars_per_token=4):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text):
+        return -(-len(text) // self.chars_per_token)
+
+class TiktokenTokenizer:
+    def __init__(self, vocab_file):
+        import tiktoken
+        from tiktoken.load import load_tiktoken_bpe
+
+        self.name = os.path.basename(vocab_file)
+        self.encoding = tiktoken.Encoding(
+                name=self.name,
+                pat_str=bpe_split_pattern(vocab_file),
+                mergeable_ranks=load_tiktoken_bpe(vocab_file),
+                special_tokens={},
+            )
+
+    def count(self, text):
+        return len(self.encoding.encode_ordinary(text))
+
+class SentencePieceTokenizer:
+    def __init__(self, vocab_file):
+        import sentencepiece
+
+        self.name = os.path.basename(vocab_file)
+        self.processor = sentencepiece.SentencePieceProcessor(model_file=vocab_file)
+
+    def count(self, text):
+        return len(self.processor.encode(text))
+
+class HuggingFaceTokenizer:
+    def __init__(self, vocab_file):
+        from tokenizers import Tokenizer
+
+        self.name = os.path.basename(vocab_file)
+        self.tokenizer = Tokenizer.from_file(vocab_file)
+
+    def count(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+tokenizer_types = {
+        ".tiktoken": TiktokenTokenizer,
+        ".model": SentencePieceTokenizer,
+        ".json": HuggingFaceTokenizer,
+    }
+
+def load_tokenizer(vocab_file):
+    ''' Build a tokenizer for the vocab file, falling back to CharTokenizer '''
+    if vocab_file is None:
+        return CharTokenizer()
+
+    vocab_file = os.path.expanduser(vocab_file)
+    extension = os.path.splitext(vocab_file)[1]
+    if extension not in tokenizer_types:
+        log(f"Unknown tokenizer file type: {vocab_file}")
+        return CharTokenizer()
+
+    if not os.path.isfile(vocab_file):
+        return CharTokenizer()
+
+    try:
+        return tokenizer_types[extension](vocab_file)
+    except Exception as e:
+        log(f"Unable to load tokenizer {vocab_file}: {e}")
+
+    return CharTokenizer()
+
+class TokenCounter:
+    """
+    Counts chat message tokens with a tokenizer, memoizing each message's
+    count by a hash of its role and content so history that has already been
+    seen is never tokenized again.
+
+    Every message costs per_message tokens of chat framing on top of its
+    role and content, and every request per_reply tokens to prime the reply.
+    """
+    def __init__(self, tokenizer, per_message=3, per_reply=3, cache_size=8192):
+        self.tokenizer = tokenizer
+        self.per_message = per_message
+        self.per_reply = per_reply
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Guards the cache, counters are shared by the session's threads
+        self._lock = threading.Lock()
+
+    def count(self, text):
+        return self.tokenizer.count(text)
+
+    def count_message(self, message):
+        content = message.get('content') or ''
+        if not isinstance(content, str):
+            content = str(content)
+
+        key = hashlib.blake2b(f"{message.get('role', '')}\0{content}".encode('utf-8', 'surrogatepass'),
+                              digest_size=16).digest()
+        with self._lock:
+            count = self.cache.get(key)
+            if count is not None:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return count
+            self.misses += 1
+
+        # Tokenized outside the lock, other threads keep reading the cache
+        count = self.per_message + self.count(message.get('role', '')) + self.count(content)
+        with self._lock:
+            self.cache[key] = count
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return count
+
+    def count_messages(self, messages):
+        return sum(self.count_message(message) for message in messages) + self.per_reply
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+def get_counter(model, vocab_files=None, vocab_dir=default_vocab_dir):
+    ''' Return the shared TokenCounter for the provider prefix of model, e.g. openai:gpt-4o '''
+    provider = model.split(":")[0] if model else ""
+    vocab_files = vocab_files or default_vocab_files
+
+    vocab_file = vocab_files.get(provider)
+    if vocab_file is not None:
+        vocab_file = os.path.join(vocab_dir, os.path.expanduser(vocab_file))
+
+    with _counters_lock:
+        if vocab_file not in _counters:
+            _counters[vocab_file] = TokenCounter(load_tokenizer(vocab_file))
+
+        return _counters[vocab_file]
@@ -10,6 +10,9 @@
 #
 # sym_toolbar.py
 
+import time
+import threading
+
 from rich.console import Console, Group
 from rich.panel import Panel
 from rich.rule import Rule
@@ -128,6 +131,110 @@ def render_dashboard(settings=None, functions=None, max_lines=12, tail_lines=Non
     ascii_render = "\n".join(lines)
     return ascii_render 
 
+class Toolbar:
+    """
+    Change driven version of render_dashboard for the prompt toolbar.
+
+    Fields and the viewer text are set on the model, which only marks the
+    region they belong to as dirty when a value actually changes.  render()
+    re-renders just the dirty regions, splices them into the cached frame
+    and reports whether the frame changed, so an idle session does no
+    layout work at all.  CPU and memory are sampled at most once every
+    sample_interval seconds, but they change with nearly every sample so
+    they do not mark the dashboard dirty; the latest sample is shown when
+    another field changes, at least once a minute with the clock.
+    """
+    char_head = "ￚￂￃￚￄￅￆￚￚￇￊￚￋￌￍￎￚￚￏￒￚￓￔￕￚￚￖￗￛￚￚￗￚￖￕￚￓￒￚￏￚￎￍￚￌￋￚￚￊￇￚￆￅￚￄￃￂￚ"
+
+    def __init__(self, max_lines=8, sample_interval=5.0):
+        self.max_lines = max_lines
+        self.sample_interval = sample_interval
+        self.console = Console()
+        self.fields = {}
+        self.tail = ""
+        self.dirty = {"header", "dashboard", "viewer"}
+        self.regions = {"header": [], "dashboard": [], "viewer": []}
+        self.frame = ""
+        self.width = None
+        self.last_sample = 0
+        self._lock = threading.Lock()
+
+    def set(self, **fields):
+        with self._lock:
+            for key, value in fields.items():
+                if self.fields.get(key) != value:
+                    self.fields[key] = value
+                    self.dirty.add("dashboard")
+
+    def set_tail(self, text):
+        with self._lock:
+            if text is not self.tail and text != self.tail:
+                self.tail = text
+                self.dirty.add("viewer")
+
+    def sample(self):
+        now = time.monotonic()
+        if now - self.last_sample < self.sample_interval:
+            return
+
+        self.last_sample = now
+        with self._lock:
+            self.fields["CPU"] = f"{psutil.cpu_percent()}%"
+            self.fields["Memory"] = f"{psutil.virtual_memory().percent}%"
+
+    def _capture(self, renderable, width):
+        console = Console(width=width)
+        with console.capture() as capture:
+            console.print(renderable)
+        return capture.get().splitlines()
+
+    def _render_dashboard(self, width):
+        table = Table.grid(expand=False, padding=(0, 1))
+        table.add_column(justify="right", width=7)
+        table.add_column(justify="left")
+        for key, value in self.fields.items():
+            table.add_row(f"{key}:", str(value))
+
+        panel = Panel(table, title="Dashboard", title_align="left", height=self.max_lines, expand=True)
+        return self._capture(panel, width)
+
+    def _render_viewer(self, width):
+        lines = self.tail.splitlines()[-(self.max_lines - 2):] if self.tail else []
+        while len(lines) < self.max_lines:
+            lines.append("")
+
+        panel = Panel(Text("\n".join(lines)), title="Content Viewer", title_align="left",
+                      height=self.max_lines, expand=True)
+        return self._capture(panel, width)
+
+    def render(self):
+        ''' Return (frame, changed), re-rendering only the dirty regions '''
+        width = self.console.width
+        with self._lock:
+            if width != self.width:
+                self.width = width
+                self.dirty.update(("header", "dashboard", "viewer"))
+
+            if not self.dirty:
+                return self.frame, False
+
+            # Same 1:2 split render_dashboard lays out
+            left = width // 3
+            if "header" in self.dirty:
+                self.regions["header"] = self._capture(Rule(characters=self.char_head, style=None), width)
+            if "dashboard" in self.dirty:
+                self.regions["dashboard"] = self._render_dashboard(left)
+            if "viewer" in self.dirty:
+                self.regions["viewer"] = self._render_viewer(width - left)
+            self.dirty.clear()
+
+            rows = [a + b for a, b in zip(self.regions["dashboard"], self.regions["viewer"])]
+            frame = "\n".join(self.regions["header"] + rows)
+            changed = frame != self.frame
+            self.frame = frame
+
+        return frame, changed
+
 def main():
     # Example settings and function definitions
     example_settings = {"Model": "GPT-4", "Role": "Assistant", "Shell": "active"}
@@ -3,41 +3,48 @@
 # sym_utils.py
 
 import json
-import math
 import re
 import os
 import time
 import subprocess
 import magic
 import hashlib
-import pytesseract
 import requests 
 import webbrowser
-import html2text
-import pandas as pd
-import speech_recognition as sr
-import pdfplumber
-from collections import Counter
-
-from docx import Document
-from datetime import datetime
-from mss import mss
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 from io import BytesIO, StringIO
-from climage import color_to_flags, color_types, convert
-from PIL import Image
-from ascii_magic import AsciiArt, Back
-from pydub import AudioSegment
-from thefuzz import fuzz
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
 from dateutil.parser import parse
-from elasticsearch import Elasticsearch, exceptions
 from pathlib import Path
+from symbiote.sym_lazy import lazy_import
+from symbiote.sym_file_scan import scan_file, stat_metadata, is_text_mime
+from symbiote.sym_extract_cache import get_extract_cache
+from symbiote.sym_workers import map_ordered, in_worker
+from symbiote.sym_audio import transcribe_segments
+from symbiote.sym_nlp import get_model
+from symbiote.sym_local_index import open_local_index
+
+# Converters and analyzers are only imported when a file type needs them
+pytesseract = lazy_import("pytesseract")
+html2text = lazy_import("html2text")
+pd = lazy_import("pandas")
+sr = lazy_import("speech_recognition")
+pdfplumber = lazy_import("pdfplumber")
+docx = lazy_import("docx")
+mss = lazy_import("mss")
+climage = lazy_import("climage")
+Image = lazy_import("PIL.Image")
+fuzz = lazy_import("thefuzz.fuzz")
+sumy_plaintext = lazy_import("sumy.parsers.plaintext")
+elasticsearch = lazy_import("elasticsearch")
+es_helpers = lazy_import("elasticsearch.helpers")
+exceptions = lazy_import("elasticsearch.exceptions")
 from rich.syntax import Syntax
 from rich.panel import Panel
+from rich.table import Table
 from rich.console import Console
 from rich.markdown import Markdown
 console = Console()
@@ -61,7 +68,7 @@ def get_screenshot():
     # Screenshot storage path
     path = r'/tmp/sym_screenshot.png'
 
-    with mss() as sct:
+    with mss.mss() as sct:
         monitor = {"top": 0, "left": 0, "width": 0, "height": 0}
         
         for mon in sct.monitors:
@@ -167,159 +174,189 @@ def analyze_file(path, reindex=False):
     elif os.path.isfile(path):
         file_list.append(path)
 
-    fcount = 0
-    for file in file_list:
-        fcount += 1
-        doc_id = get_sha256(file)
-        content = json.dumps(summarize_file(file),indent=4, sort_keys=True)
+    content = None
+    for file, summary in summarize_files(file_list):
+        content = json.dumps(summary, indent=4, sort_keys=True)
     return content
 
+label_map = {'PERSON': 'PERSONS',
+             'NORP': 'NATIONALITIES',
+             'FAC': 'LANDMARKS',
+             'ORG': 'ORGANIZATIONS',
+             'GPE': 'LOCALITIES',
+             'LOC': 'LOCATIONS',
+             'PRODUCT': 'PRODUCTS',
+             'EVENT': 'EVENTS',
+             'WORK_OF_ART': 'ARTWORKS',
+             'LAW': 'LEGAL',
+             'LANGUAGE': 'LANGUAGES',
+             'DATE': 'DATES',
+             'TIME': 'TIMES',
+             '#PERCENT': 'PERCENTAGES',
+             'MONEY': 'CURRENCIES',
+             'QUANTITY': 'QUANTITIES',
+             '#ORDINAL': 'ORDINALS',
+             '#CARDINAL': 'CARDINALS',
+             }
+
 def analyze_text(text, meta=""):
-    import spacy
-    from spacy.lang.en.stop_words import STOP_WORDS
-    from nltk.sentiment import SentimentIntensityAnalyzer
-    nlp = spacy.load('en_core_web_sm')
-    sia = SentimentIntensityAnalyzer()
-    tokenizer = Tokenizer("english")
+    return next(analyze_texts([(text, meta)]))
 
-    try:
-        text = text.decode('utf-8')
-    except:
-        pass
-
-    doc = nlp(text)
-
-    label_map = {'PERSON': 'PERSONS',
-                 'NORP': 'NATIONALITIES',
-                 'FAC': 'LANDMARKS',
-                 'ORG': 'ORGANIZATIONS',
-                 'GPE': 'LOCALITIES',
-                 'LOC': 'LOCATIONS',
-                 'PRODUCT': 'PRODUCTS',
-                 'EVENT': 'EVENTS',
-                 'WORK_OF_ART': 'ARTWORKS',
-                 'LAW': 'LEGAL',
-                 'LANGUAGE': 'LANGUAGES',
-                 'DATE': 'DATES',
-                 'TIME': 'TIMES',
-                 '#PERCENT': 'PERCENTAGES',
-                 'MONEY': 'CURRENCIES',
-                 'QUANTITY': 'QUANTITIES',
-                 '#ORDINAL': 'ORDINALS',
-                 '#CARDINAL': 'CARDINALS',
-                 }
-
-    # Document container
-    content = {}
-
-    # Iterate over the entities
-    ent_count = {}
-    for ent in doc.ents:
-        # Only include common labels
-        if ent.label_ in label_map: 
-            # Increment the count of the entity text for the given label
-            if label_map[ent.label_] not in content:
-                content[label_map[ent.label_]] = []
-            elif ent.text not in content[label_map[ent.label_]] and ent.text is not (None or ""):
+def analyze_texts(items, batch_size=32, n_process=1):
+    """
+    Analyze many (text, meta) pairs, yielding one content dictionary per
+    pair in order.  The models come from the sym_nlp registry, so they are
+    loaded once per process, and entities are found by one spaCy pipe
+    over all of the texts in batches of batch_size across n_process
+    processes.
+    """
+    nlp = get_model("spacy")
+    sia = get_model("sentiment")
+    summarizer = get_model("summarizer")
+    tokenizer = get_model("sumy_tokenizer")
+
+    def texts():
+        for text, meta in items:
+            if isinstance(text, bytes):
+                text = text.decode('utf-8', errors='ignore')
+            text = text or ""
+            yield text[:nlp.max_length], (text, meta)
+
+    for doc, (text, meta) in nlp.pipe(texts(), as_tuples=True, batch_size=batch_size, n_process=n_process):
+        # Document container
+        content = {}
+
+        # Iterate over the entities
+        for ent in doc.ents:
+            # Only include common labels
+            if ent.label_ in label_map and ent.text:
+                entities = content.setdefault(label_map[ent.label_], [])
                 clean_text = remove_special_chars(ent.text)
-                content[label_map[ent.label_]].append(clean_text)
-
-    sentiment = sia.polarity_scores(text)
-
-    parser = PlaintextParser.from_string(text, tokenizer)
-    stop_words = list(STOP_WORDS)
-    summarizer = LsaSummarizer()
-    summarizer.stop_words = stop_words
-    summary = summarizer(parser.document, 10)
-    main_idea = " ".join(str(sentence) for sentence in summary)
-
-    content['EPOCH'] = time.time()
-    #content['ADDRESSES'] = extract_address(text)
-    #content.update(meta)
-    content['METADATA'] = meta
-    content['SENTIMENT'] = sentiment
-    #content['CONTENTS'] = text
-    content['SUMMARY'] = main_idea
-
-    content['EMAILS'] = extract_email(text)
-    content['WEBSITES'] = extract_url(text)
-    content['PHONE_NUMBERS'] = extract_phone(text)
-    content['CREDIT_CARDS'] = extract_credit_card(text)
-    content['SOCIAL_SECURITY_NUMBERS'] = extract_social_securty(text)
-
-    return content 
-
-def summarize_text(text):
+                if clean_text not in entities:
+                    entities.append(clean_text)
+
+        sentiment = sia.polarity_scores(text)
+
+        parser = sumy_plaintext.PlaintextParser.from_string(text, tokenizer)
+        summary = summarizer(parser.document, 10)
+        main_idea = " ".join(str(sentence) for sentence in summary)
+
+        content['EPOCH'] = time.time()
+        #content['ADDRESSES'] = extract_address(text)
+        #content.update(meta)
+        content['METADATA'] = meta
+        content['SENTIMENT'] = sentiment
+        #content['CONTENTS'] = text
+        content['SUMMARY'] = main_idea
+
+        content['EMAILS'] = extract_email(text)
+        content['WEBSITES'] = extract_url(text)
+        content['PHONE_NUMBERS'] = extract_phone(text)
+        content['CREDIT_CARDS'] = extract_credit_card(text)
+        content['SOCIAL_SECURITY_NUMBERS'] = extract_social_securty(text)
+
+        yield content
+
+def summarize_text(text, meta=""):
     result = analyze_text(text, meta)
     return result
 
-def summarize_file(file_path):
+def summarize_file(file_path, meta=""):
     text = extract_text(file_path)
 
     result = analyze_text(text, meta)
 
     return result
 
-def extract_dir_text(dir_path):
-    file_path = cleanFilePath(file_path)
+def summarize_files(file_paths, batch_size=32, n_process=1, workers=4):
+    '''
+    Yield (file_path, content) for many files in order, each content's
+    METADATA holding its SourceFile.  Text is extracted by a thread pool
+    while earlier files go through the NLP pipe.
+    '''
+    file_paths = list(file_paths)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="symbiote-summarize") as pool:
+        def texts():
+            # Extraction runs at most two batches ahead of the pipe
+            pending = deque()
+            for file_path in file_paths:
+                pending.append((file_path, pool.submit(extract_text, file_path)))
+                if len(pending) >= batch_size * 2:
+                    file_path, future = pending.popleft()
+                    yield future.result(), {"SourceFile": file_path}
+            while pending:
+                file_path, future = pending.popleft()
+                yield future.result(), {"SourceFile": file_path}
+
+        results = analyze_texts(texts(), batch_size=batch_size, n_process=n_process)
+        try:
+            yield from zip(file_paths, results)
+        finally:
+            # Closed early, extractions not yet started are dropped
+            pool.shutdown(wait=False, cancel_futures=True)
 
-    if not os.path.isdir(dir_path):
+def extract_dir_text(dir_path, max_tokens=None):
+    ''' Text of every file under dir_path, .gitignore and hidden file aware, see sym_dir_ingest '''
+    from symbiote.sym_dir_ingest import DirectoryIngester
+
+    dir_path = clean_path(dir_path)
+    if dir_path is None or not os.path.isdir(dir_path):
         return None
 
-    '''
-    if os.path.isfile(".gitignore"):
-        with open(os.path.join(dir_path, '.gitignore'), 'r') as f:
-            gitignore = f.read()
+    return "".join(DirectoryIngester(dir_path, max_tokens=max_tokens))
 
-        spec = pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, gitignore.splitlines())
-    '''
+# Bump a converter's version when its output changes, cached output of
+# older versions is then ignored.
+converter_versions = {
+        "excel_to_csv": 1,
+        "pdf_to_markdown": 2,
+        "word_to_markdown": 1,
+        "handle_image_file": 1,
+        "file_scan": 1,
+    }
 
-    header = str()
-    content = str()
-    for root, dirs, files in os.walk(dir_path):
-        # Remove hidden directories from dirs so os.walk doesn't process them
-        dirs[:] = [d for d in dirs if not d.startswith('.')]
-
-        for file in files:
-            # Skip hidden files
-            if file.startswith('.'):
-                continue
-
-            file_path = os.path.join(root, file)
-            absolute_path = clean_path(file_path)
-            #if spec.match_file(file_path):
-            #    continue
-            file_contents = extract_text(absolute_path)
-            content += f"File name: {absolute_path}\n"
-            content += '\n```\n{}\n```\n'.format(file_contents)
+def convert_cached(file_path, converter, sha256=None):
+    ''' Run a converter through the extraction cache when the session configured one '''
+    cache = get_extract_cache()
+    if cache is None:
+        return converter(file_path)
 
-    return content
+    name = converter.__name__
+    return cache.convert(file_path, name, converter_versions[name], converter, sha256=sha256)
 
-def extract_text(file_path):
+def extract_text(file_path, mime_type=None, text=None, sha256=None):
+    '''
+    Convert a file to text.  mime_type, the decoded text of text files and
+    the file's sha256 may come from a FileScan of the same file.
+    '''
     file_path = clean_path(file_path)
-    mime_type = magic.from_file(file_path, mime=True)
+    if mime_type is None:
+        mime_type = magic.from_file(file_path, mime=True)
     try:
         content = "" 
-        if mime_type.startswith('text/') or mime_type in ['application/json', 'application/xml', 'application/x-yaml', 'text/markdown']:
-            with open(file_path, 'r') as f:
-                content = f.read()
+        if is_text_mime(mime_type):
+            if text is not None:
+                content = text
+            else:
+                with open(file_path, 'r') as f:
+                    content = f.read()
 
         elif mime_type in ['application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
-            content = excel_to_csv(file_path)
+            content = convert_cached(file_path, excel_to_csv, sha256)
 
         elif mime_type == 'application/pdf':
-            content = pdf_to_markdown(file_path)
+            content = convert_cached(file_path, pdf_to_markdown, sha256)
 
         elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-            content = word_to_markdown(file_path)
+            content = convert_cached(file_path, word_to_markdown, sha256)
 
         elif mime_type.startswith('image/'):
-            content = handle_image_file(file_path)
+            content = convert_cached(file_path, handle_image_file, sha256)
 
         elif mime_type.startswith('audio/'):
-            content = trascrbe_audio_file(file_path)
+            content = transcribe_audio_file(file_path)
 
-        if len(content) > 0:
+        if content:
             content = content.encode('utf-8').decode('utf-8', errors='ignore')
             return content
         else:
@@ -330,8 +367,21 @@ def extract_text(file_path):
         log(f"Error reading {file_path}: {e}")
         return None
 
+# Search settings, the session hands in its own through use_settings
+settings = {
+        "elasticsearch": "http://localhost:9200",
+        "elasticsearch_index": "symbiote",
+        "index_backend": "elasticsearch",
+        "local_index_path": os.path.join(os.path.expanduser("~"), ".symbiote", "index"),
+        "debug": False,
+    }
+
+def use_settings(session_settings):
+    global settings
+    settings = session_settings
+
 def es_connect():
-    es = Elasticsearch(settings['elasticsearch'])
+    es = elasticsearch.Elasticsearch(settings['elasticsearch'])
 
     if not es.ping():
         log(f'Unable to reach {settings["elasticsearch"]}')
@@ -339,9 +389,31 @@ def es_connect():
 
     return es
 
-def create_es_index(path, reindex=False):
-    es = es_connect()
-    
+class IndexProgress:
+    ''' Counts and throughput of a create_es_index run '''
+    def __init__(self, total=0):
+        self.total = total
+        self.indexed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started = time.time()
+
+    def update(self, ok):
+        if ok:
+            self.indexed += 1
+        else:
+            self.failed += 1
+
+    def rate(self):
+        elapsed = time.time() - self.started
+        return (self.indexed + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.indexed + self.failed}/{self.total} documents, {self.indexed} indexed, "
+                f"{self.failed} failed, {self.skipped} already indexed, {self.rate():.1f} docs/s")
+
+def index_files(path, workers=4):
+    ''' {file: sha256} of a file or every file under a directory '''
     file_list = []
     if os.path.isdir(path):
         for root, _, files in os.walk(path):
@@ -352,138 +424,244 @@ def create_es_index(path, reindex=False):
     elif os.path.isfile(path):
         file_list.append(path)
 
-    index = settings['elasticsearch_index']
+    # Unchanged files skip hashing when the extraction cache knows them
+    cache = get_extract_cache()
+    file_hash = cache.file_hash if cache is not None else get_sha256
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="symbiote-hash") as pool:
+        return dict(zip(file_list, pool.map(file_hash, file_list)))
 
-    if not es.indices.exists(index=index):
-        es.indices.create(index=index)
+def index_backend():
+    return settings.get('index_backend', 'elasticsearch')
 
-    fcount = 0
-    for file in file_list:
-        fcount += 1
-        if settings['debug']:
-            log(f'Processing file {file}. count:{fcount}')
+def local_index():
+    ''' The LocalIndex named by the elasticsearch_index setting under local_index_path '''
+    root = settings.get('local_index_path', os.path.join(os.path.expanduser("~"), ".symbiote", "index"))
+    return open_local_index(os.path.join(root, settings['elasticsearch_index']))
 
-        doc_id = get_sha256(file)
+def create_index(path, **kwargs):
+    '''
+    Index path with the backend the index_backend setting selects.
+    cancelled, when given, is checked after every document and stops the
+    run once it returns true, what was indexed so far is kept.
+    '''
+    if index_backend() == 'local':
+        return create_local_index(path, **kwargs)
+    return create_es_index(path, **kwargs)
 
-        if not reindex:
-            if es.exists(index=index, id=doc_id):
-                if settings['debug']:
-                    log(f"Document {doc_id} found. skipping...")
-                continue
+def create_es_index(path, reindex=False, chunk_size=100, max_chunk_bytes=16 << 20, workers=4, n_process=1, progress=None, cancelled=None):
+    """
+    Index a file or directory tree.  Files already in the index (by
+    sha256) are found with one _mget per 1000 ids and skipped unless
+    reindex is set.  The rest are summarized by parallel extraction
+    workers feeding the NLP pipe and sent with streaming_bulk in chunks of
+    chunk_size documents; the index is refreshed once at the end.
+    progress, when given, is called with an IndexProgress after every
+    document.  No more documents are sent once cancelled returns true.
+    """
+    es = es_connect()
+    if es is None:
+        return False
 
-        content = summarize_file(file)
+    index = settings['elasticsearch_index']
 
-        try:
-            es.index(index=index, id=doc_id, document=json.dumps(content))
-        except exceptions.NotFoundError as e:
-            if settings['debug']:
-                log(f"Document not found: {e}")
-        except exceptions.RequestError as e:
-            if settings['debug']:
-                log(f"Problem with the request: {e}")
-        except exceptions.ConnectionError as e:
-            if settings['debug']:
-                log(f"Problem with the connection: {e}")
-        except exceptions.ConflictError as e:
-            if settings['debug']:
-                log(f"Conflict occurred. Probably the document with this id already exists.")
-        except exceptions.TransportError as e:
-            if settings['debug']:
-                log(f"General transport error: {e}")
-        except Exception as e:
+    if not es.indices.exists(index=index):
+        es.indices.create(index=index)
+
+    doc_ids = index_files(path, workers=workers)
+    stats = IndexProgress(total=len(doc_ids))
+    if not reindex:
+        existing = set()
+        ids = list(set(doc_ids.values()))
+        for start in range(0, len(ids), 1000):
+            response = es.mget(index=index, ids=ids[start:start + 1000], source=False)
+            existing.update(doc["_id"] for doc in response["docs"] if doc.get("found"))
+
+        if settings['debug']:
+            log(f"{len(existing)} documents found. skipping...")
+        doc_ids = {file: doc_id for file, doc_id in doc_ids.items() if doc_id not in existing}
+        stats.skipped = stats.total - len(doc_ids)
+        stats.total = len(doc_ids)
+
+    def actions():
+        for file, content in summarize_files(doc_ids, workers=workers, n_process=n_process):
+            if cancelled is not None and cancelled():
+                return
             if settings['debug']:
-                log(f"Error: {e}")
+                log(f'Processing file {file}.')
+            yield {"_index": index, "_id": doc_ids[file], "_source": content}
 
+    try:
+        for ok, item in es_helpers.streaming_bulk(
+                es, actions(), chunk_size=chunk_size, max_chunk_bytes=max_chunk_bytes,
+                raise_on_error=False, raise_on_exception=False, max_retries=3):
+            stats.update(ok)
+            if not ok and settings['debug']:
+                log(f"Error indexing: {item}")
+            if progress is not None:
+                progress(stats)
         es.indices.refresh(index=index)
+    except exceptions.ConnectionError as e:
+        log(f"Problem with the connection: {e}")
+        return False
+    except exceptions.TransportError as e:
+        log(f"General transport error: {e}")
+        return False
+    finally:
+        log(f"Indexed {path}: {stats.summary()}")
 
-    return True
+    return stats.failed == 0
 
-def search_index(query):
-    es = es_connect()
+def create_local_index(path, reindex=False, workers=4, n_process=1, progress=None, commit_every=500, cancelled=None, **kwargs):
+    """
+    Index a file or directory tree into the on disk LocalIndex at the
+    local_index_path setting, see sym_local_index.  Files whose sha256 is
+    already indexed are skipped unless reindex is set, a file whose
+    content changed replaces its old document and documents of files no
+    longer under a directory are deleted.  Buffered documents are
+    committed every commit_every documents and at the end, also when
+    cancelled returns true and the run stops early.
+    """
+    index = local_index()
 
-    ret = ""
+    doc_ids = index_files(path, workers=workers)
+    stats = IndexProgress(total=len(doc_ids))
+    if os.path.isdir(path):
+        index.prune(path, doc_ids)
+
+    if not reindex:
+        pending = {}
+        for file, doc_id in doc_ids.items():
+            source = index.source(doc_id)
+            if source is None:
+                pending[file] = doc_id
+            elif index.paths.get(file) != doc_id:
+                # Known content under a new path, the path joins its document
+                index.add(doc_id, source, path=file)
+        stats.skipped = stats.total - len(pending)
+        stats.total = len(pending)
+        doc_ids = pending
 
     try:
-        res = es.search(index=settings['elasticsearch_index'],
-                           body={
-                              "track_total_hits": True,
-                              "sort": [
-                                {
-                                  "_score": {
-                                    "order": "desc"
-                                  }
-                                }
-                              ],
-                              "fields": [
-                                {
-                                  "field": "*",
-                                  "include_unmapped": "true"
-                                }
-                              ],
-                              "size": 10000,
-                              "version": True,
-                              "script_fields": {},
-                              "stored_fields": [
-                                "*"
-                              ],
-                              "runtime_mappings": {},
-                              "_source": False,
-                              "query": {
-                                "bool": {
-                                  "must": [
-                                    {
-                                      "query_string": {
-                                        "query": query,
-                                        "analyze_wildcard": True,
-                                        "time_zone": "America/New_York"
-                                      }
-                                    }
-                                  ],
-                                  "filter": [],
-                                  "should": [],
-                                  "must_not": []
-                                }
-                              }
-                            }
-                        )
-
-        ret = res.copy()
-    except:
-        log(f'Error running query: {query}')
+        for file, content in summarize_files(doc_ids, workers=workers, n_process=n_process):
+            if settings['debug']:
+                log(f'Processing file {file}.')
+            index.add(doc_ids[file], content, path=file)
+            stats.update(True)
+            if stats.indexed % commit_every == 0:
+                index.commit()
+            if progress is not None:
+                progress(stats)
+            if cancelled is not None and cancelled():
+                break
+    finally:
+        index.commit()
+
+    log(f"Indexed {path}: {stats.summary()}")
+    return stats.failed == 0
+
+def search_query(query):
+    return {
+            "query_string": {
+                "query": query,
+                "analyze_wildcard": True,
+                "time_zone": "America/New_York"
+            }
+        }
 
-    return ret 
+def iter_search(query, fields=("METADATA.SourceFile",), page_size=500, keep_alive="1m"):
+    """
+    Yield every hit of a query_string query, best first, from the backend
+    the index_backend setting selects.  Elasticsearch is paged with a
+    point in time and search_after, so the first hits arrive after one
+    page and memory is bounded by page_size.  Only the named fields are
+    returned, fields=None asks for all of them.
+    """
+    if index_backend() == 'local':
+        yield from local_index().iter_search(query, fields=fields, page_size=page_size)
+        return
 
-def display_documents(json_data):
-    # Load the JSON data
-    data = json.loads(json_data)
-    output = None
+    es = es_connect()
+    if es is None:
+        return
 
-    display_fields = ["METADATA.SourceFile"]
+    pit = None
+    try:
+        pit = es.open_point_in_time(index=settings['elasticsearch_index'], keep_alive=keep_alive)["id"]
+        search_after = None
+        while True:
+            page = {"search_after": search_after} if search_after is not None else {}
+            res = es.search(
+                    pit={"id": pit, "keep_alive": keep_alive},
+                    query=search_query(query),
+                    sort=[{"_score": {"order": "desc"}}, {"_shard_doc": {"order": "asc"}}],
+                    fields=list(fields) if fields is not None else ["*"],
+                    source=False,
+                    size=page_size,
+                    track_total_hits=False,
+                    **page
+                )
+            pit = res.get("pit_id", pit)
+            hits = res["hits"]["hits"]
+            yield from hits
+
+            if len(hits) < page_size:
+                break
+            search_after = hits[-1]["sort"]
+    except exceptions.ConnectionError as e:
+        log(f"Problem with the connection: {e}")
+    except exceptions.TransportError as e:
+        log(f'Error running query: {query}: {e}')
+    finally:
+        if pit is not None:
+            try:
+                es.close_point_in_time(id=pit)
+            except Exception:
+                pass
 
-    # Extract the 'hits' data
-    hits = data["hits"]["hits"]
+def search_index(query, size=100, fields=None):
+    ''' The first size hits of a query as an Elasticsearch style response, see iter_search '''
+    hits = list(itertools.islice(iter_search(query, fields=fields, page_size=min(size, 1000)), size))
+    return {"hits": {"total": {"value": len(hits), "relation": "gte"}, "hits": hits}}
 
-    # Create a list to store the documents
-    documents = []
+def display_documents(hits, display_fields=("METADATA.SourceFile",), page_size=50):
+    """
+    Print hits as table rows while they arrive, one table per page_size
+    hits, so the first results show before a broad query is exhausted.
+    hits is an iterable such as iter_search, or a response dictionary or
+    its JSON.  Returns the number of hits shown.
+    """
+    if isinstance(hits, (str, bytes)):
+        hits = json.loads(hits)
+    if isinstance(hits, dict):
+        hits = hits["hits"]["hits"]
 
-    # Iterate through the hits and extract the fields data
+    shown = 0
+    table = None
     for hit in hits:
-        fields = hit["fields"]
-
-        fields = {k: v for k, v in fields.items() if not k.endswith('.keyword')}
-
-        documents.append(fields)
-
-    # Create a Pandas DataFrame from the documents
-    df = pd.DataFrame(documents)
-
-    # Print the DataFrame as a table
-    try:
-        output = df[display_fields]
-    except:
+        if table is None:
+            # Fixed column widths keep the tables of successive pages aligned
+            table = Table(show_header=shown == 0, expand=True)
+            table.add_column("Score", justify="right", style="gold1", width=8)
+            for field in display_fields:
+                table.add_column(field, ratio=1, overflow="fold")
+
+        fields = hit.get("fields", {})
+        values = [", ".join(str(value) for value in fields.get(field, [])) for field in display_fields]
+        score = hit.get("_score")
+        table.add_row(f"{score:.2f}" if isinstance(score, (int, float)) else "", *values)
+        shown += 1
+
+        if shown % page_size == 0:
+            console.print(table)
+            table = None
+
+    if table is not None:
+        console.print(table)
+
+    if not shown:
         log("No results found.")
 
-    return output 
+    return shown
 
 """"
 def grep_files(es_results, search_term):
@@ -522,38 +700,29 @@ def break_text(text, num_words):
     chunks = [' '.join(words[i:i + num_words]) for i in range(0, len(words), num_words)]
     return chunks
 
-def convert_audio_to_wav(file_path):
-    # Extract the file extension
-    _, ext = os.path.splitext(file_path)
-    ext = ext.lstrip('.')
-
-    # Use pydub to convert to WAV
-    audio = AudioSegment.from_file(file_path, format=ext)
-    wav_file_path = file_path.replace(ext, 'wav')
-    audio.export(wav_file_path, format='wav')
-
-    return wav_file_path
-
-def transcribe_audio_file(audio_file):
-    recognizer = sr.Recognizer()
-    _, ext = os.path.splitext(audio_file)
-    text = ""
-    # Convert the file to WAV if necessary
-    if ext.lower() not in ['.wav', '.wave']:
-        audio_file = convert_audio_to_wav(audio_file)
+def transcribe_audio_file(audio_file, workers=8):
+    """
+    Transcribe an audio file with Google Speech Recognition.  The audio is
+    decoded through an ffmpeg pipe, split at pauses and the segments are
+    recognized in parallel, see sym_audio.
+    """
+    pieces = []
     try:
-        with sr.AudioFile(audio_file) as source:
-            audio = recognizer.record(source)
-
-        text = recognizer.recognize_google(audio)
-    except sr.UnknownValueError:
-        log("Google Speech Recognition could not understand audio")
+        for start, text in transcribe_segments(audio_file, workers=workers):
+            if text:
+                pieces.append(text)
+    except FileNotFoundError:
+        log("ffmpeg is required to transcribe audio")
         return None
     except sr.RequestError as e:
         log(f"Could not request results from Google Speech Recognition service; {e}")
         return None
 
-    return text
+    if not pieces:
+        log("Google Speech Recognition could not understand audio")
+        return None
+
+    return " ".join(pieces)
 
 def lucene_like_to_regex(query):
     # Replace field:term to term
@@ -613,7 +782,7 @@ def image_to_ascii(image_path):
     image_width = int(term_width * 0.7)
 
     # Display the ASCII art, scaled to fit 70% of the terminal width
-    image = convert(image_path, width=image_width, is_unicode=True, **color_to_flags(color_types.color256))
+    image = climage.convert(image_path, width=image_width, is_unicode=True, **climage.color_to_flags(climage.color_types.color256))
     remove_file(file_path)
 
     # Calculate padding to center the image
@@ -678,83 +847,156 @@ def is_url(path):
 
     return None
 
-def pdf_to_markdown(pdf_path):
+def pdf_table_markdown(table):
+    """Converts a PDF table to Markdown format."""
+    table_md = ""
+    for row in table:
+        table_md += "| " + " | ".join(cell or "" for cell in row) + " |\n"
+    if table and len(table[0]) > 0:
+        table_md += "|---" * len(table[0]) + "|\n"
+    return table_md
+
+def pdf_image_markdown(image_data, page_num, image_num):
+    """Saves an image and returns the Markdown link to it."""
+    image_path = f"/tmp/page-{page_num}-image-{image_num}.png"
+    with open(image_path, "wb") as img_file:
+        img_file.write(image_data)
+
+    image_md = handle_image_file(image_path)
+    image_dat = f"![Image {image_num}](./{image_path})\n\n"
+    if image_md:
+        image_dat += image_md
+
+    return image_dat
+
+def pdf_page_markdown(pdf_path, page, page_num):
     """
-    Converts a PDF to Markdown, including text, tables, and images.
+    Converts one PDF page to Markdown, including text, tables, and images.
     """
-    markdown_content = ""
+    markdown_content = f"\n\n## Page {page_num}\n\n"
 
-    def table_to_markdown(table):
-        """Converts a PDF table to Markdown format."""
-        table_md = ""
-        for row in table:
-            table_md += "| " + " | ".join(row) + " |\n"
-        if table and len(table[0]) > 0:
-            table_md += "|---" * len(table[0]) + "|\n"
-        return table_md
+    # Extract text
+    try:
+        text = page.extract_text()
+        if text:
+            markdown_content += text + "\n\n"
+        else:
+            markdown_content += "No text found on this page.\n\n"
+    except Exception as e:
+        log(f"Error processing pdf: {pdf_path}\n{e}")
 
-    def save_image(image_data, page_num, image_num):
-        """Saves an image and returns the Markdown link to it."""
-        image_dat = ""
-        image_path = f"/tmp/page-{page_num}-image-{image_num}.png"
-        with open(image_path, "wb") as img_file:
-            img_file.write(image_data)
+    # Extract tables
+    try:
+        tables = page.extract_tables()
+        if tables:
+            for table_num, table in enumerate(tables, start=1):
+                markdown_content += f"### Table {table_num}\n\n"
+                markdown_content += pdf_table_markdown(table)
+        else:
+            markdown_content += "No tables found on this page.\n\n"
+    except Exception as e:
+        log(f"Error processing pdf: {pdf_path}\n{e}")
 
-        image_md = handle_image_file(image_path)
-        image_dat += f"![Image {image_num}](./{image_path})\n\n"
-        if image_md:
-            image_dat += image_md
+    # Extract images
+    try:
+        if page.images:
+            for image_num, image in enumerate(page.images, start=1):
+                if "data" in image:
+                    image_md = pdf_image_markdown(image["data"], page_num, image_num)
+                    markdown_content += f"{image_md}\n\n"
+        else:
+            markdown_content += "No images found on this page.\n\n"
+    except Exception as e:
+        log(f"Error processing pdf: {pdf_path}\n{e}")
 
+    return markdown_content
+
+def pdf_pages_markdown(page_range, pdf_path):
+    ''' Markdown of pages first to last - 1 (0 based) of page_range, run in the worker processes '''
+    first, last = page_range
+    with pdfplumber.open(pdf_path) as pdf:
+        return [pdf_page_markdown(pdf_path, pdf.pages[index], index + 1) for index in range(first, last)]
+
+def iter_pdf_markdown(pdf_path, workers=None, pages_per_task=4, min_parallel_pages=16):
+    """
+    Yields a PDF's Markdown in page order: the metadata section first, then
+    one string per page.  Documents of min_parallel_pages or more are
+    converted in page ranges of pages_per_task by the shared worker
+    processes, see sym_workers.map_ordered.  Closing the generator early
+    cancels the conversion of the rest.
+    """
     with pdfplumber.open(pdf_path) as pdf:
         # Extract metadata
         metadata = pdf.metadata
+        page_count = len(pdf.pages)
         if metadata:
-            markdown_content += "## Metadata\n"
+            markdown_content = "## Metadata\n"
             for key, value in metadata.items():
                 markdown_content += f"- **{key}**: {value}\n"
             markdown_content += "\n"
+            yield markdown_content
 
-        # Process each page
-        if pdf.pages:
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or page_count < min_parallel_pages or in_worker():
             for page_num, page in enumerate(pdf.pages, start=1):
-                markdown_content += f"\n\n## Page {page_num}\n\n"
-
-                # Extract text
-                try:
-                    text = page.extract_text()
-                    if text:
-                        markdown_content += text + "\n\n"
-                    else:
-                        markdown_content += "No text found on this page.\n\n"
-                except Exception as e:
-                    log(f"Error processing pdf: {pdf_path}\n{e}")
-
-                # Extract tables
-                try:
-                    tables = page.extract_tables()
-                    if tables:
-                        for table_num, table in enumerate(tables, start=1):
-                            markdown_content += f"### Table {table_num}\n\n"
-                            markdown_content += table_to_markdown(table)
-                    else:
-                        markdown_content += "No tables found on this page.\n\n"
-                except Exception as e:
-                    log(f"Error processing pdf: {pdf_path}\n{e}")
-
-                # Extract images
-                try:
-                    if page.images:
-                        for image_num, image in enumerate(page.images, start=1):
-                            if "data" in image:
-                                image_data = image["data"]
-                                image_md = save_image(image_data, page_num, image_num)
-                                markdown_content += f"{image_md}\n\n"
-                    else:
-                        markdown_content += "No images found on this page.\n\n"
-                except Exception as e:
-                    log(f"Error processing pdf: {pdf_path}\n{e}")
+                yield pdf_page_markdown(pdf_path, page, page_num)
+                # Parsed page objects are cached by pdfplumber, drop them
+                page.flush_cache()
+            return
 
-        return markdown_content
+    ranges = ((first, min(first + pages_per_task, page_count)) for first in range(0, page_count, pages_per_task))
+    for pages in map_ordered(pdf_pages_markdown, ranges, workers, pdf_path):
+        yield from pages
+
+def pdf_to_markdown(pdf_path):
+    """
+    Converts a PDF to Markdown, including text, tables, and images.
+    """
+    return "".join(iter_pdf_markdown(pdf_path))
+
+def pdf_to_markdown_budget(pdf_path, max_tokens, counter, sha256=None):
+    """
+    Markdown of a PDF up to max_tokens, converting pages only until the
+    budget is used.  Complete conversions are stored in the extraction
+    cache and a cached conversion is cut to the budget.
+    """
+    cache = get_extract_cache()
+    version = converter_versions["pdf_to_markdown"]
+    if cache is not None:
+        sha256 = sha256 or cache.file_hash(pdf_path)
+        content = cache.get(sha256, "pdf_to_markdown", version)
+        if content is not None:
+            return truncate_tokens(content, max_tokens, counter)
+
+    pieces = []
+    tokens = 0
+    pages = iter_pdf_markdown(pdf_path)
+    for piece in pages:
+        piece_tokens = counter.count(piece)
+        if tokens + piece_tokens > max_tokens:
+            pieces.append(truncate_tokens(piece, max_tokens - tokens, counter))
+            pieces.append(f"\n[Conversion stopped at the {max_tokens} token budget]\n")
+            pages.close()
+            return "".join(pieces)
+
+        pieces.append(piece)
+        tokens += piece_tokens
+
+    content = "".join(pieces)
+    if cache is not None and content:
+        cache.put(sha256, "pdf_to_markdown", version, content)
+
+    return content
+
+def truncate_tokens(text, max_tokens, counter):
+    ''' The start of text that fits max_tokens, estimated from its token density '''
+    tokens = counter.count(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    return text[:len(text) * max_tokens // tokens]
 
 def word_to_markdown(file_path):
     """
@@ -762,7 +1004,7 @@ def word_to_markdown(file_path):
     """
     file_path = clean_path(file_path)
     # Load the Word document
-    doc = Document(file_path)
+    doc = docx.Document(file_path)
     markdown_content = ""
 
     # Helper function to process tables
@@ -867,78 +1109,74 @@ def handle_image_file(file_path):
 
     return None
 
-def extract_metadata(file_path, output=None):
+def inspect_file(file_path, max_tokens=None, counter=None):
     """
-    Extracts information from a file of unknown or unsupported type.
+    Metadata and text of a file from a single read, returned as
+    (metadata, content).  Text files are decoded during the scan, other
+    formats are handed to their converter with the detected MIME type.
+    With a token budget, PDFs are only converted as far as it reaches.
     """
     file_path = clean_path(file_path)
-    file_stats = os.stat(file_path)
-    creation_time = datetime.fromtimestamp(file_stats.st_ctime)
-    modified_time = datetime.fromtimestamp(file_stats.st_mtime)
-    file_info = {
-        "file_path": str(file_path),
-        "file_size": str(file_stats.st_size),
-        "creation_time": str(creation_time),
-        "modification_time": str(modified_time), 
-        "permissions": oct(file_stats.st_mode & 0o777),
-        "mime_type": str(magic.from_file(file_path, mime=True)),
-        "hashes": {},
-        "readable_strings": [],
-        "magic_numbers": None,
-        "embedded_urls": [],
-        "entropy": None,
-        "exif": {},
-    }
+    metadata, text = scan_metadata(file_path)
+    metadata["exif"] = exif_fields(file_path, metadata)
+    sha256 = metadata["hashes"]["sha256"]
+    mime_type = metadata["mime_type"]
+    if mime_type == 'application/pdf' and max_tokens is not None and counter is not None:
+        try:
+            content = pdf_to_markdown_budget(file_path, max_tokens, counter, sha256=sha256) or None
+        except Exception as e:
+            log(f"Error reading {file_path}: {e}")
+            content = None
+    else:
+        content = extract_text(file_path, mime_type=mime_type, text=text, sha256=sha256)
 
-    exif_data = extract_exif(file_path) 
+    return metadata, content
+
+def scan_metadata(file_path):
+    '''
+    (metadata, text) from a FileScan of file_path, text being None unless
+    the scan decoded it.  With the extraction cache a file whose stat is
+    unchanged is not read: its metadata is cached by sha256 like converter
+    output and only the fields from its stat are refreshed.
+    '''
+    cache = get_extract_cache()
+    if cache is None:
+        scan = scan_file(file_path)
+        return scan.metadata(), scan.content
+
+    version = converter_versions["file_scan"]
+    stat = os.stat(file_path)
+    sha256 = cache.known_hash(file_path, stat)
+    if sha256 is not None:
+        cached = cache.get(sha256, "file_scan", version)
+        if cached is not None:
+            metadata = json.loads(cached)
+            metadata.update(stat_metadata(file_path, stat))
+            return metadata, None
+
+    scan = scan_file(file_path)
+    metadata = scan.metadata()
+    sha256 = scan.hashes["sha256"]
+    cache.remember(file_path, sha256, scan.stat)
+    cache.put(sha256, "file_scan", version, json.dumps(metadata))
+    return metadata, scan.content
+
+def exif_fields(file_path, file_info):
+    exif = {}
+    exif_data = extract_exif(file_path) or {}
     for key, value in exif_data.items():
         if key not in file_info:
-            file_info["exif"][key] = value 
-
-    def calculate_entropy(data):
-        """Calculate Shannon entropy to assess randomness in the file."""
-        if not data:
-            return 0
-        counter = Counter(data)
-        length = len(data)
-        entropy = -sum((count / length) * math.log2(count / length) for count in counter.values())
-        return str(entropy)
-
-    def extract_strings(data):
-        """Extract readable ASCII and Unicode strings."""
-        ascii_regex = re.compile(rb'[ -~]{4,}')  # ASCII strings of length >= 4
-        unicode_regex = re.compile(rb'(?:[\x20-\x7E][\x00]){4,}')  # Unicode UTF-16 strings
-        strings = []
-        strings.extend(match.decode('ascii') for match in ascii_regex.findall(data))
-        strings.extend(match.decode('utf-16') for match in unicode_regex.findall(data))
-        return strings
-
-    def find_binary_urls(data):
-        """Find embedded URLs in the file."""
-        url_regex = re.compile(rb'https?://[^\s]+')  # Regex to match URLs
-        urls = []
-        for match in url_regex.findall(data):
-            try:
-                urls.append(match.decode('ascii'))  # Try decoding with ASCII
-            except UnicodeDecodeError:
-                urls.append(match.decode('utf-8', errors='ignore'))  # Fall back to UTF-8 with error handling
-            urls = list(set(urls))
-        return urls
-
-    # Read the file as binary
-    with open(file_path, 'rb') as file:
-        binary_data = file.read()
-        # Compute hashes
-        file_info["hashes"]["sha256"] = hashlib.sha256(binary_data).hexdigest()
-        file_info["hashes"]["md5"] = hashlib.md5(binary_data).hexdigest()
-        # Extract readable strings
-        file_info["readable_strings"] = extract_strings(binary_data)
-        # Extract embedded URLs
-        file_info["embedded_urls"] = find_binary_urls(binary_data)
-        # Calculate entropy
-        file_info["entropy"] = calculate_entropy(binary_data)
-        # Extract magic numbers (first 4 bytes)
-        file_info["magic_numbers"] = binary_data[:4].hex()
+            exif[key] = value 
+
+    return exif
+
+def extract_metadata(file_path, output=None):
+    """
+    Extracts information from a file of unknown or unsupported type.
+    """
+    file_path = clean_path(file_path)
+    file_info = scan_file(file_path, text=False).metadata()
+    file_info["exif"] = exif_fields(file_path, file_info)
 
     if output == "json":
         return json.dumps(file_info, indent=4)
@@ -958,7 +1196,7 @@ def extract_metadata(file_path, output=None):
 
         if "exif" in file_info:
             markdown_content += "## Exif Data (Exiftool)\n"
-            for key, value in file_info["exif"]:
+            for key, value in file_info["exif"].items():
                 markdown_content += f"**{key}***: {value}\n"
 
         markdown_content += "## Readable Strings\n"
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+# sym_workers.py
+
+import os
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_pool = None
+_lock = threading.Lock()
+
+def process_pool():
+    '''
+    The one pool of worker processes shared by everything in the session,
+    one process per CPU, started on first use.  Callers on many threads,
+    e.g. a directory ingest converting several PDFs at once, queue their
+    work in it, so there are never more worker processes than CPUs.
+    Workers are spawned, not forked: they do not inherit the session's
+    threads and locks.
+    '''
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def discard_pool(pool):
+    ''' Forget a broken pool, the next caller starts a new one '''
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def in_worker():
+    ''' True in a worker process, where work runs in order rather than in another pool '''
+    return multiprocessing.parent_process() is not None
+
+def map_ordered(func, items, workers=1, *args):
+    '''
+    Yield func(item, *args) for each item, in order.  With more than one
+    worker the items go to the shared process pool, at most two per worker
+    ahead of the consumer, so memory stays bounded however many there are.
+    func must be importable by the workers, i.e. defined at module level.
+    Closing the generator early cancels the items not yet started.
+    '''
+    if workers <= 1 or in_worker():
+        for item in items:
+            yield func(item, *args)
+        return
+
+    pool = process_pool()
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(func, item, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        discard_pool(pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
@@ -10,7 +10,9 @@
 
 import random
 from prompt_toolkit.styles import Style
-from InquirerPy import inquirer
+from symbiote.sym_lazy import lazy_import
+
+inquirer = lazy_import("InquirerPy.inquirer")
 
 class ThemeManager:
     def __init__(self):
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+#
+# bench_dispatch.py
+#
+# Per input dispatch cost of the old regex cascade (every command pattern
+# searched in turn) against CommandRouter, for small and multi-megabyte input.
+
+import re
+import sys
+import timeit
+
+from symbiote.sym_router import CommandRouter
+from symbiote.sym_session import command_table
+
+def build_router():
+    router = CommandRouter()
+    for names, pattern, handler in command_table:
+        router.register(names, pattern, lambda text, match: None)
+    return router
+
+def cascade(text, patterns):
+    for pattern in patterns:
+        if re.search(pattern, text):
+            return pattern
+    return None
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    router = build_router()
+    patterns = [pattern for _, pattern, _ in command_table]
+
+    paragraph = "Please review the deployment notes, the key: value pairs and the log output below.\n"
+    inputs = {
+        "small chat": "What is the capital of France?",
+        "small command": "summarize file:/tmp/notes.txt: for me",
+        f"{megabytes}MB paste": paragraph * (megabytes * 1024 * 1024 // len(paragraph)),
+        f"{megabytes}MB paste + command": "file:/tmp/notes.txt: " + paragraph * (megabytes * 1024 * 1024 // len(paragraph)),
+    }
+
+    print(f"{'input':<28}{'cascade':>14}{'router':>14}{'speedup':>10}")
+    for label, text in inputs.items():
+        number = 200 if len(text) < 1024 else 3
+        old = timeit.timeit(lambda: cascade(text, patterns), number=number) / number
+        new = timeit.timeit(lambda: router.match(text), number=number) / number
+        print(f"{label:<28}{old * 1e6:>12.1f}us{new * 1e6:>12.1f}us{old / new:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
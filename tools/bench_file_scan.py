@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+#
+# bench_file_scan.py
+#
+# Throughput of FileScan, the chunked numpy analysis behind extract_metadata,
+# against the whole-file read, Counter entropy and regex scans it replaced,
+# in MB/s over random binary data and over text.
+#
+# usage: bench_file_scan.py [megabytes]
+
+import os
+import re
+import sys
+import math
+import time
+import hashlib
+import tempfile
+from collections import Counter
+
+from symbiote.sym_file_scan import scan_file
+
+def whole_file(file_path):
+    with open(file_path, 'rb') as file:
+        data = file.read()
+
+    hashlib.sha256(data).hexdigest()
+    hashlib.md5(data).hexdigest()
+    strings = [match.decode('ascii') for match in re.findall(rb'[ -~]{4,}', data)]
+    strings.extend(match.decode('utf-16') for match in re.findall(rb'(?:[\x20-\x7E][\x00]){4,}', data))
+    urls = list(set(match.decode('utf-8', errors='ignore') for match in re.findall(rb'https?://[^\s]+', data)))
+    counts = Counter(data)
+    entropy = -sum((count / len(data)) * math.log2(count / len(data)) for count in counts.values())
+    return strings, urls, entropy
+
+def sample_files(directory, megabytes):
+    size = megabytes << 20
+    binary = os.path.join(directory, "random.bin")
+    with open(binary, "wb") as file:
+        file.write(os.urandom(size))
+
+    text = os.path.join(directory, "text.log")
+    line = b"2024-01-01 12:00:00 INFO GET https://example.com/api/v1/items?id=42 200 0.013s\n"
+    with open(text, "wb") as file:
+        file.write(line * (size // len(line)))
+
+    return [("random", binary), ("text", text)]
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'data':<10}{'whole file':>14}{'FileScan':>14}")
+        for label, file_path in sample_files(directory, megabytes):
+            start = time.perf_counter()
+            whole_file(file_path)
+            old = time.perf_counter() - start
+
+            start = time.perf_counter()
+            scan_file(file_path, text=False)
+            new = time.perf_counter() - start
+
+            print(f"{label:<10}{megabytes / old:>10.0f}MB/s{megabytes / new:>10.0f}MB/s")
+
+if __name__ == "__main__":
+    main()
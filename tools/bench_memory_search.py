@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#
+# bench_memory_search.py
+#
+# SymMemoryStore.search with the inverted index against a full walk of the
+# store (what search did before the index), over a store of synthetic
+# documents sized like file:: and get:: content.
+#
+# usage: bench_memory_search.py [store megabytes] [document kilobytes]
+
+import re
+import sys
+import time
+import random
+
+from symbiote.sym_memory_index import walk
+from symbiote.sym_memory_store import SymMemoryStore
+
+vocabulary = [f"{stem}{suffix}" for stem in (
+        "kernel", "socket", "buffer", "deploy", "config", "python", "thread", "memory",
+        "packet", "router", "schema", "tensor", "vector", "cursor", "cipher", "signal",
+    ) for suffix in ("", "s", "ed", "ing", "er", "_id", "42", "x")]
+
+def document(size, rng):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+def full_walk(store, query):
+    is_regex = isinstance(query, re.Pattern)
+    results = []
+    for key, value, value_type, parent, is_key in walk(store.MemoryStorage):
+        if store._matches(query, value, is_regex):
+            results.append(key)
+    return results
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    kilobytes = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    rng = random.Random(7)
+
+    store = SymMemoryStore()
+    documents = megabytes * 1024 // kilobytes
+    start = time.perf_counter()
+    for number in range(documents):
+        store.MemoryStorage[f"file_{number}"] = {
+                "path": f"/srv/data/file_{number}.txt",
+                "content": document(kilobytes * 1024, rng),
+            }
+        # A few documents mention rare terms the queries look for
+        if number % 97 == 0:
+            store.MemoryStorage[f"file_{number}"]["content"] += " quarantine-handler watchdog_timeout"
+    print(f"built {documents} x {kilobytes}KB documents in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    store.index.rebuild(store.MemoryStorage)
+    print(f"index build, done once by the first search, {time.perf_counter() - start:.1f}s, {len(store.index.postings)} words")
+
+    start = time.perf_counter()
+    store.create("file_extra", {"path": "/tmp/extra.txt", "content": document(kilobytes * 1024, rng)})
+    print(f"create one {kilobytes}KB document {(time.perf_counter() - start) * 1000:.1f}ms (includes indexing)")
+
+    queries = ["watchdog_timeout", "quarantine-handler", "file_12", re.compile(r"watchdog_t\w+|quarantine")]
+    print(f"{'query':<40}{'full walk':>12}{'indexed':>12}{'results':>10}")
+    for query in queries:
+        start = time.perf_counter()
+        expected = full_walk(store, query)
+        walked = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = store.search(query, n=20, x=20)
+        indexed = time.perf_counter() - start
+
+        assert [result["key"] for result in results] == expected
+        label = query.pattern if isinstance(query, re.Pattern) else query
+        print(f"{label:<40}{walked * 1000:>10.0f}ms{indexed * 1000:>10.1f}ms{len(results):>10}")
+
+if __name__ == "__main__":
+    main()
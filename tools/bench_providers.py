@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+#
+# bench_providers.py
+#
+# Time to first token and tokens/sec for each backend through the same
+# ProviderBackend.stream() path send_message uses.  Requests to every model
+# run concurrently on one event loop.
+#
+# usage: bench_providers.py ollama:llama3.1:8b openai:gpt-4o-mini groq:llama-3.1-8b-instant
+
+import sys
+import asyncio
+
+from symbiote.sym_providers import ProviderError, StreamStats, get_backend, split_model
+from symbiote.sym_tokenizer import get_counter
+
+prompt = "Explain in three short paragraphs how a write-ahead log makes a key value store crash safe."
+
+async def measure(model_setting, runs):
+    provider, model = split_model(model_setting)
+    backend = get_backend(provider)
+    results = []
+    for run in range(runs):
+        stats = StreamStats(provider, model, counter=get_counter(model_setting))
+        try:
+            async for text in backend.stream(model, [{"role": "user", "content": prompt}], stats=stats):
+                pass
+        except ProviderError as e:
+            print(f"{model_setting}: {e}")
+            break
+        results.append(stats)
+    return model_setting, results
+
+async def main():
+    models = [arg for arg in sys.argv[1:] if not arg.isdigit()] or ["ollama:llama3.1:8b"]
+    runs = next((int(arg) for arg in sys.argv[1:] if arg.isdigit()), 3)
+
+    measured = await asyncio.gather(*(measure(model, runs) for model in models))
+
+    print(f"{'model':<40}{'ttft':>10}{'tokens/sec':>12}{'tokens':>8}")
+    for model, results in measured:
+        for stats in results:
+            ttft = f"{stats.ttft * 1000:.0f}ms" if stats.ttft is not None else "-"
+            rate = f"{stats.tokens_per_sec:.1f}" if stats.tokens_per_sec is not None else "-"
+            print(f"{model:<40}{ttft:>10}{rate:>12}{stats.tokens:>8}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#
+# bench_tokenizer.py
+#
+# Accuracy and cost of token estimates for a growing conversation: the old
+# len(json.dumps(history)) estimate and the chars/4 heuristic against a real
+# vocab file, and the per turn cost of counting with and without the
+# memoized TokenCounter and with the incremental ConversationHistory total.
+#
+# usage: bench_tokenizer.py [vocab file (.tiktoken, .model, tokenizer.json)] [turns]
+
+import sys
+import json
+import time
+
+from symbiote.sym_history import ConversationHistory
+from symbiote.sym_tokenizer import CharTokenizer, TokenCounter, load_tokenizer
+
+def conversation(turns):
+    paragraph = ("The deployment failed at 03:12 UTC after the config reload; "
+                 "see the attached log excerpt and the key: value pairs below.\n")
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Turn {turn}: " + paragraph * (1 + turn % 7)})
+        messages.append({"role": "assistant", "content": paragraph * (2 + turn % 5)})
+    return messages
+
+def per_turn_cost(messages, count):
+    ''' Total seconds spent counting the history once per turn as it grows '''
+    start = time.perf_counter()
+    for turn in range(1, len(messages) + 1):
+        count(messages[:turn])
+    return time.perf_counter() - start
+
+def incremental_cost(messages, counter):
+    ''' Total seconds for ConversationHistory to track the same growth '''
+    start = time.perf_counter()
+    history = ConversationHistory(counter=counter)
+    for message in messages:
+        history.append(message)
+        history.total_tokens
+    return time.perf_counter() - start
+
+def main():
+    vocab_file = sys.argv[1] if len(sys.argv) > 1 else None
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    messages = conversation(turns)
+
+    tokenizer = load_tokenizer(vocab_file)
+    if isinstance(tokenizer, CharTokenizer):
+        print("No vocab file loaded, reference counts use the chars/4 heuristic.")
+
+    reference = TokenCounter(tokenizer).count_messages(messages)
+    estimates = {
+            "len(json)": len(json.dumps(messages)),
+            "chars/4": TokenCounter(CharTokenizer()).count_messages(messages),
+            tokenizer.name: reference,
+        }
+
+    print(f"{len(messages)} messages")
+    print(f"{'estimator':<24}{'tokens':>12}{'vs reference':>14}")
+    for label, count in estimates.items():
+        print(f"{label:<24}{count:>12}{count / reference:>13.2f}x")
+
+    uncached = TokenCounter(tokenizer, cache_size=0)
+    cached = TokenCounter(tokenizer)
+    costs = {
+            "len(json) every turn": per_turn_cost(messages, lambda history: len(json.dumps(history))),
+            "tokenize every turn": per_turn_cost(messages, uncached.count_messages),
+            "memoized recount": per_turn_cost(messages, cached.count_messages),
+            "incremental history": incremental_cost(messages, TokenCounter(tokenizer)),
+        }
+
+    print()
+    print(f"{'counting':<24}{'total':>12}{'per turn':>14}")
+    for label, seconds in costs.items():
+        print(f"{label:<24}{seconds * 1e3:>10.1f}ms{seconds / len(messages) * 1e6:>12.1f}us")
+    print(f"memoized hit rate {cached.hits / (cached.hits + cached.misses):.1%}")
+
+if __name__ == "__main__":
+    main()
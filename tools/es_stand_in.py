@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+#
+# es_stand_in.py
+#
+# In-memory stand-in for the parts of the Elasticsearch HTTP API that
+# create_es_index and iter_search use: ping, index exists/create, _mget,
+# _bulk, _refresh, point in time open/close and _search with
+# search_after.  Point the elasticsearch setting at it to exercise index::
+# and index_search:: without a cluster.  query_string queries are matched
+# as case insensitive words against string values, scored by the number
+# of words found.
+#
+# usage: es_stand_in.py [port]
+
+import sys
+import json
+import itertools
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class Store:
+    def __init__(self):
+        self.indices = {}
+        self.lock = threading.Lock()
+        self.bulk_requests = 0
+        self.refreshes = 0
+        self.searches = 0
+        self.pits = {}
+        self.pit_ids = itertools.count(1)
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store = Store()
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def route(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        return parts, parse_qs(url.query)
+
+    def do_HEAD(self):
+        parts, query = self.route()
+        if not parts:
+            return self.reply(200)
+        self.reply(200 if parts[0] in self.store.indices else 404)
+
+    def do_GET(self):
+        parts, query = self.route()
+        if not parts:
+            return self.reply(200, {
+                    "name": "stand-in",
+                    "cluster_name": "stand-in",
+                    "version": {"number": "8.15.0", "build_flavor": "default"},
+                    "tagline": "You Know, for Search",
+                })
+        self.do_POST()
+
+    def do_PUT(self):
+        parts, query = self.route()
+        if parts[-1].startswith("_"):
+            return self.do_POST()
+        self.body()
+        with self.store.lock:
+            if parts[0] in self.store.indices:
+                return self.reply(400, {"error": {"type": "resource_already_exists_exception"}, "status": 400})
+            self.store.indices[parts[0]] = {}
+        self.reply(200, {"acknowledged": True, "index": parts[0]})
+
+    def do_POST(self):
+        parts, query = self.route()
+        body = self.body()
+        action = parts[-1] if parts else ""
+        index = parts[0] if len(parts) > 1 else None
+
+        if action == "_bulk":
+            return self.bulk(index, body)
+        if action == "_mget":
+            return self.mget(index, json.loads(body or b"{}"))
+        if action == "_pit":
+            return self.open_pit(index)
+        if action == "_search":
+            return self.search(json.loads(body or b"{}"))
+        if action == "_refresh":
+            self.store.refreshes += 1
+            return self.reply(200, {"_shards": {"total": 1, "successful": 1, "failed": 0}})
+
+        self.reply(404, {"error": {"type": "unsupported", "reason": self.path}, "status": 404})
+
+    def do_DELETE(self):
+        parts, query = self.route()
+        request = json.loads(self.body() or b"{}")
+        if parts == ["_pit"]:
+            found = self.store.pits.pop(request.get("id"), None) is not None
+            return self.reply(200, {"succeeded": found, "num_freed": int(found)})
+        self.reply(404, {"error": {"type": "unsupported", "reason": self.path}, "status": 404})
+
+    def open_pit(self, index):
+        with self.store.lock:
+            pit_id = f"pit-{next(self.store.pit_ids)}"
+            # A frozen view of the index, later writes are not seen
+            self.store.pits[pit_id] = (index, list(self.store.indices.get(index, {}).items()))
+        self.reply(200, {"id": pit_id})
+
+    def search(self, request):
+        pit_id = request.get("pit", {}).get("id")
+        if pit_id not in self.store.pits:
+            return self.reply(404, {"error": {"type": "search_context_missing_exception"}, "status": 404})
+
+        index, documents = self.store.pits[pit_id]
+        query = request.get("query", {}).get("query_string", {}).get("query", "")
+        words = [word.lower() for word in query.split() if word not in ("AND", "OR")]
+
+        ranked = []
+        for shard_doc, (doc_id, source) in enumerate(documents):
+            fields = flatten(source)
+            text = " ".join(str(value) for values in fields.values() for value in values).lower().split()
+            score = float(sum(1 for word in words if word in text))
+            if score:
+                ranked.append((-score, shard_doc, doc_id, fields))
+        ranked.sort()
+
+        search_after = request.get("search_after")
+        if search_after is not None:
+            after = (-search_after[0], search_after[1])
+            ranked = [entry for entry in ranked if entry[:2] > after]
+
+        wanted = request.get("fields", ["*"])
+        hits = []
+        for score, shard_doc, doc_id, fields in ranked[:request.get("size", 10)]:
+            if wanted != ["*"]:
+                fields = {name: fields[name] for name in wanted if name in fields}
+            hits.append({"_index": index, "_id": doc_id, "_score": -score, "fields": fields, "sort": [-score, shard_doc]})
+
+        self.store.searches += 1
+        self.reply(200, {"took": 1, "pit_id": pit_id, "hits": {"hits": hits}})
+
+    def mget(self, index, request):
+        docs = []
+        with self.store.lock:
+            for doc_id in request.get("ids", []):
+                documents = self.store.indices.get(index, {})
+                docs.append({"_index": index, "_id": doc_id, "found": doc_id in documents})
+        self.reply(200, {"docs": docs})
+
+    def bulk(self, index, body):
+        lines = [line for line in body.split(b"\n") if line.strip()]
+        items = []
+        errors = False
+        with self.store.lock:
+            self.store.bulk_requests += 1
+            position = 0
+            while position < len(lines):
+                header = json.loads(lines[position])
+                operation, meta = next(iter(header.items()))
+                target = meta.get("_index", index)
+                documents = self.store.indices.setdefault(target, {})
+                if operation == "delete":
+                    found = documents.pop(meta["_id"], None) is not None
+                    items.append({operation: {"_index": target, "_id": meta["_id"], "status": 200 if found else 404}})
+                    position += 1
+                    continue
+
+                source = json.loads(lines[position + 1])
+                doc_id = meta.get("_id") or str(len(documents))
+                if operation == "create" and doc_id in documents:
+                    errors = True
+                    items.append({operation: {"_index": target, "_id": doc_id, "status": 409,
+                                              "error": {"type": "version_conflict_engine_exception"}}})
+                else:
+                    created = doc_id not in documents
+                    documents[doc_id] = source
+                    items.append({operation: {"_index": target, "_id": doc_id, "status": 201 if created else 200,
+                                              "result": "created" if created else "updated"}})
+                position += 2
+
+        self.reply(200, {"took": 1, "errors": errors, "items": items})
+
+def flatten(source, prefix=""):
+    fields = {}
+    if isinstance(source, dict):
+        for key, value in source.items():
+            for name, values in flatten(value, f"{prefix}{key}.").items():
+                fields.setdefault(name, []).extend(values)
+    elif isinstance(source, list):
+        for item in source:
+            for name, values in flatten(item, prefix).items():
+                fields.setdefault(name, []).extend(values)
+    elif source is not None and source != "":
+        fields[prefix[:-1]] = [source]
+    return fields
+
+def serve(port=9200):
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9200
+    server = serve(port)
+    print(f"Elasticsearch stand-in on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()